@@ -15,7 +15,7 @@ import numpy
 # Import synthesis solvers from pyCSalgos package
 import pyCSalgos.BP.l1eq_pd
 import pyCSalgos.BP.cvxopt_lp
-import pyCSalgos.OMP.omp_QR
+import pyCSalgos.omp
 import pyCSalgos.SL0.SL0
 import pyCSalgos.TST.RecommendedTST
 
@@ -68,7 +68,7 @@ def ompeps(y,M,Omega,epsilon):
   opts = dict()
   opts['stopCrit'] = 'mse'
   opts['stopTol'] = epsilon
-  return numpy.dot(D , pyCSalgos.OMP.omp_QR.greed_omp_qr(ytilde,Atilde,Atilde.shape[1],opts)[0])
+  return numpy.dot(D , pyCSalgos.omp.omp_sparsify_greed_omp_qr(ytilde,Atilde,Atilde.shape[1],opts)[0])
 
 def ompk(y,M,Omega,k):
   """
@@ -86,7 +86,7 @@ def ompk(y,M,Omega,k):
   
   opts = dict()
   opts['stopTol'] = k
-  return numpy.dot(D , pyCSalgos.OMP.omp_QR.greed_omp_qr(ytilde,Atilde,Atilde.shape[1],opts)[0])
+  return numpy.dot(D , pyCSalgos.omp.omp_sparsify_greed_omp_qr(ytilde,Atilde,Atilde.shape[1],opts)[0])
 
 def sl0(y,M,Omega, sigma_min, sigma_decrease_factor=0.5, mu_0=2, L=3, true_s=None):
   """
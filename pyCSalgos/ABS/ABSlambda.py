@@ -15,7 +15,7 @@ import numpy
 # Import synthesis solvers from pyCSalgos package
 import pyCSalgos.BP.l1qc
 import pyCSalgos.SL0.SL0_approx
-import pyCSalgos.OMP.omp_QR
+import pyCSalgos.omp
 import pyCSalgos.TST.RecommendedTST
 
 def sl0(y,M,Omega,epsilon,lbd,sigma_min, sigma_decrease_factor=0.5, mu_0=2, L=3, A_pinv=None, true_s=None):
@@ -62,7 +62,7 @@ def ompeps(y,M,Omega,epsilon,lbd):
   opts = dict()
   opts['stopCrit'] = 'mse'
   opts['stopTol'] = epsilon**2 / aggy.size
-  return numpy.dot(D, pyCSalgos.OMP.omp_QR.greed_omp_qr(aggy,aggD,aggD.shape[1],opts)[0])
+  return numpy.dot(D, pyCSalgos.omp.omp_sparsify_greed_omp_qr(aggy,aggD,aggD.shape[1],opts)[0])
   
 def tst_recom(y,M,Omega,epsilon,lbd, nsweep=300, xinitial=None, ro=None):
   """
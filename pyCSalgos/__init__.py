@@ -4,15 +4,22 @@ The :mod:`pyCSalgos` module: Python Compressed Sensing algorithms.
 
 from .generate import make_sparse_coded_signal
 from .generate import make_compressed_sensing_problem
+from .generate import make_joint_sparse_compressed_sensing_problem
 from .generate import make_cosparse_coded_signal
 from .generate import make_analysis_compressed_sensing_problem
+from .generate import make_compressed_sensing_problem_batches
+from .generate import make_analysis_compressed_sensing_problem_batches
 
 from .omp import OrthogonalMatchingPursuit
+from .omp import SimultaneousOrthogonalMatchingPursuit
 from .l1min import L1Min
 from .sl0 import SmoothedL0
 from .tst import TwoStageThresholding
 from .amp import ApproximateMessagePassing
 from .iht import IterativeHardThresholding
+from .cosamp import CompressiveSamplingMatchingPursuit
+from .cosamp import SubspacePursuit
+from .stomp import StagewiseOrthogonalMatchingPursuit
 
 from .analysisl1min import AnalysisL1Min
 from .gap import GreedyAnalysisPursuit
@@ -22,22 +29,31 @@ from .uap import UnconstrainedAnalysisPursuit
 from .phase_transition import SynthesisPhaseTransition
 from .phase_transition import AnalysisPhaseTransition
 from .phase_transition import SynthesisSparseCoding
+from .results_table import read_results_table
 
 
 __all__ = ['make_sparse_coded_signal',
            'make_compressed_sensing_problem',
+           'make_joint_sparse_compressed_sensing_problem',
            'make_cosparse_coded_signal',
            'make_analysis_compressed_sensing_problem',
+           'make_compressed_sensing_problem_batches',
+           'make_analysis_compressed_sensing_problem_batches',
            'OrthogonalMatchingPursuit',
+           'SimultaneousOrthogonalMatchingPursuit',
            'L1Min',
            'SmoothedL0',
            'TwoStageThresholding',
            'ApproximateMessagePassing',
            'IterativeHardThresholding',
+           'CompressiveSamplingMatchingPursuit',
+           'SubspacePursuit',
+           'StagewiseOrthogonalMatchingPursuit',
            'AnalysisL1Min',
            'GreedyAnalysisPursuit',
            'AnalysisBySynthesis',
            'UnconstrainedAnalysisPursuit',
            'SynthesisPhaseTransition',
            'AnalysisPhaseTransition',
-           'SynthesisSparseCoding']
+           'SynthesisSparseCoding',
+           'read_results_table']
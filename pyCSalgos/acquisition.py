@@ -0,0 +1,220 @@
+"""
+acquisition.py
+
+Structured acquisition operators, applied without forming the matrix (matrix-free),
+ as scipy.sparse.linalg.LinearOperator objects
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import tempfile
+
+import numpy
+import scipy.fft
+import scipy.sparse
+from scipy.sparse.linalg import LinearOperator, aslinearoperator
+from sklearn.utils import check_random_state
+
+
+def fwht(x):
+    """
+    Fast Walsh-Hadamard transform (natural/Sylvester ordering, not normalized) along the first axis.
+
+    :param x: A vector or matrix, with a power of 2 number of rows
+    :return: The transform, same shape as x (float32 for float32 input, float64 otherwise)
+    """
+    x = numpy.asarray(x)
+    x = x.astype(numpy.result_type(x.dtype, numpy.float32), copy=False)
+    n = x.shape[0]
+    if n & (n - 1) != 0:
+        raise ValueError("Walsh-Hadamard transform size must be a power of 2")
+
+    y = x.reshape(n, -1)
+    h = 1
+    while h < n:
+        # butterflies between the two halves of every block of size 2h, for all blocks and columns at once
+        y = y.reshape(n // (2*h), 2, h, -1)
+        y = numpy.concatenate((y[:, 0] + y[:, 1], y[:, 0] - y[:, 1]), axis=1)
+        h *= 2
+    return y.reshape(x.shape)
+
+
+class SubsampledDCT(LinearOperator):
+    """
+    Rows ``rows'' of the orthonormal DCT-II matrix of size n, scaled by sqrt(n/m) so that the columns have unit norm
+     on average. Applied with the fast DCT in O(n log n) per signal, in the precision of ``dtype''
+     (or of the input, if higher).
+    """
+
+    def __init__(self, rows, n, dtype=numpy.float64):
+        self.rows = numpy.asarray(rows)
+        self.scale = float(numpy.sqrt(float(n) / self.rows.size))
+        super(SubsampledDCT, self).__init__(dtype=numpy.dtype(dtype), shape=(self.rows.size, n))
+
+    def _matmat(self, X):
+        X = numpy.asarray(X, dtype=numpy.result_type(self.dtype, X.dtype))
+        return self.scale * scipy.fft.dct(X, axis=0, norm='ortho')[self.rows]
+
+    def _rmatmat(self, Y):
+        Z = numpy.zeros((self.shape[1], Y.shape[1]), dtype=numpy.result_type(self.dtype, Y.dtype))
+        Z[self.rows] = self.scale * Y
+        return scipy.fft.idct(Z, axis=0, norm='ortho')
+
+    def _matvec(self, x):
+        return self._matmat(x.reshape(-1, 1)).ravel()
+
+    def _rmatvec(self, y):
+        return self._rmatmat(y.reshape(-1, 1)).ravel()
+
+    def toarray(self):
+        # rows of the orthonormal DCT-II matrix, from its closed form
+        n = self.shape[1]
+        matrix = numpy.cos(numpy.pi * numpy.outer(self.rows, 2 * numpy.arange(n) + 1) / (2 * n)) * numpy.sqrt(2. / n)
+        matrix[self.rows == 0] /= numpy.sqrt(2)
+        return (self.scale * matrix).astype(self.dtype, copy=False)
+
+
+class SubsampledRandomizedHadamard(LinearOperator):
+    """
+    Rows ``rows'' of the Walsh-Hadamard matrix of size n, normalized to unit norm columns, applied after random
+     sign flips ``signs''. Applied with the fast Walsh-Hadamard transform in O(n log n) per signal, in the precision
+     of ``dtype'' (or of the input, if higher). n must be a power of 2.
+    """
+
+    def __init__(self, rows, signs, dtype=numpy.float64):
+        self.rows = numpy.asarray(rows)
+        self.signs = numpy.asarray(signs, dtype=dtype)
+        n = self.signs.size
+        if n & (n - 1) != 0:
+            raise ValueError("Walsh-Hadamard transform size must be a power of 2")
+        self.scale = float(1 / numpy.sqrt(self.rows.size))
+        super(SubsampledRandomizedHadamard, self).__init__(dtype=numpy.dtype(dtype), shape=(self.rows.size, n))
+
+    def _matmat(self, X):
+        return fwht(self.signs[:, None] * X)[self.rows] * self.scale
+
+    def _rmatmat(self, Y):
+        Z = numpy.zeros((self.shape[1], Y.shape[1]), dtype=numpy.result_type(self.dtype, Y.dtype))
+        Z[self.rows] = Y
+        return self.signs[:, None] * fwht(Z) * self.scale
+
+    def _matvec(self, x):
+        return self._matmat(x.reshape(-1, 1)).ravel()
+
+    def _rmatvec(self, y):
+        return self._rmatmat(y.reshape(-1, 1)).ravel()
+
+    def toarray(self):
+        # rows of the Walsh-Hadamard matrix: H[i, j] = (-1)^(number of common bits of i and j)
+        n = self.shape[1]
+        common = numpy.bitwise_and.outer(self.rows, numpy.arange(n))
+        parity = numpy.zeros(common.shape, dtype=common.dtype)
+        while numpy.any(common):
+            parity ^= common & 1
+            common >>= 1
+        return ((1 - 2.0 * parity) * self.signs * self.scale).astype(self.dtype, copy=False)
+
+
+def make_partial_dct(num_measurements, signal_size, random_state=None, dtype=numpy.float64):
+    """
+    Random subset of ``num_measurements'' rows of the orthonormal DCT matrix of size ``signal_size'',
+     scaled to unit norm columns on average.
+
+    :param num_measurements: Number of measurements
+    :param signal_size: Signal dimension
+    :param random_state: Random number generator state
+    :param dtype: Floating point type of the operator
+    :return: A SubsampledDCT linear operator, size (num_measurements x signal_size)
+    """
+    rng = check_random_state(random_state)
+    rows = numpy.sort(rng.permutation(signal_size)[:num_measurements])
+    return SubsampledDCT(rows, signal_size, dtype)
+
+
+def make_randomized_hadamard(num_measurements, signal_size, random_state=None, dtype=numpy.float64):
+    """
+    Random subset of ``num_measurements'' rows of the Walsh-Hadamard matrix of size ``signal_size'' (a power of 2),
+     with random sign flips of the signal, normalized to unit norm columns.
+
+    :param num_measurements: Number of measurements
+    :param signal_size: Signal dimension, a power of 2
+    :param random_state: Random number generator state
+    :param dtype: Floating point type of the operator
+    :return: A SubsampledRandomizedHadamard linear operator, size (num_measurements x signal_size)
+    """
+    rng = check_random_state(random_state)
+    signs = rng.randint(2, size=signal_size) * 2.0 - 1
+    rows = numpy.sort(rng.permutation(signal_size)[:num_measurements])
+    return SubsampledRandomizedHadamard(rows, signs, dtype)
+
+
+def make_sparse_sign(num_measurements, signal_size, nnz_per_column=8, random_state=None, dtype=numpy.float64):
+    """
+    Sparse random matrix with ``nnz_per_column'' non-zeros equal to +1 or -1 (normalized) in every column,
+     at random rows. Applied in O(nnz).
+
+    :param num_measurements: Number of measurements
+    :param signal_size: Signal dimension
+    :param nnz_per_column: Number of non-zeros in every column (at most num_measurements)
+    :param random_state: Random number generator state
+    :param dtype: Floating point type of the matrix
+    :return: A linear operator wrapping the sparse matrix, size (num_measurements x signal_size)
+    """
+    rng = check_random_state(random_state)
+    d = min(nnz_per_column, num_measurements)
+
+    # d distinct random rows for every column (imported here because generate imports this module)
+    from .generate import make_random_support
+    indices = make_random_support(num_measurements, d, signal_size, random_state=rng)
+    values = ((rng.randint(2, size=(d, signal_size)) * 2.0 - 1) / numpy.sqrt(d)).astype(dtype)
+    indptr = numpy.arange(0, d * signal_size + 1, d)
+    matrix = scipy.sparse.csc_matrix((values.T.ravel(), indices.T.ravel(), indptr),
+                                     shape=(num_measurements, signal_size))
+    return aslinearoperator(matrix)
+
+
+def effective_dictionary(acqumatrix, dictionary):
+    """
+    Returns the product of the acquisition matrix and the dictionary, each of them being a numpy array, a scipy sparse
+     matrix or (only the acquisition matrix) a linear operator. The result is sparse only if both are sparse.
+    For a memory-mapped (out-of-core) dictionary, the product is computed in blocks of atoms into a temporary
+     memory-mapped file.
+    """
+    if isinstance(dictionary, numpy.memmap):
+        shape = (acqumatrix.shape[0], dictionary.shape[1])
+        dtype = numpy.result_type(acqumatrix.dtype, dictionary.dtype)
+        result = numpy.memmap(tempfile.TemporaryFile(), dtype=dtype, mode='w+', shape=shape, order='F')
+        blocksize = max(1, 2**22 // max(shape[0], dictionary.shape[0]))
+        for start in range(0, shape[1], blocksize):
+            result[:, start:start + blocksize] = acqumatrix @ numpy.asarray(dictionary[:, start:start + blocksize])
+        return result
+    if scipy.sparse.issparse(dictionary) and isinstance(acqumatrix, LinearOperator):
+        dictionary = dictionary.toarray()
+    return acqumatrix @ dictionary
+
+
+def as_dense(acqumatrix):
+    """
+    Returns the acquisition matrix as a dense numpy array, whether it is a numpy array, a scipy sparse matrix or a
+     linear operator. Used for solvers that need the explicit matrix.
+    The structured operators are built from their closed form, other linear operators are applied to blocks of
+     columns of the identity matrix.
+    """
+    if isinstance(acqumatrix, numpy.ndarray):
+        return acqumatrix
+    if scipy.sparse.issparse(acqumatrix) or isinstance(acqumatrix, (SubsampledDCT, SubsampledRandomizedHadamard)):
+        return acqumatrix.toarray()
+    matrix = getattr(acqumatrix, 'A', None)
+    if isinstance(matrix, numpy.ndarray) or scipy.sparse.issparse(matrix):
+        # wrapped matrix, e.g. from aslinearoperator()
+        return as_dense(matrix)
+    m, n = acqumatrix.shape
+    result = numpy.empty((m, n), dtype=acqumatrix.dtype)
+    blocksize = max(1, 2**22 // max(m, n))
+    for start in range(0, n, blocksize):
+        stop = min(start + blocksize, n)
+        block = numpy.zeros((n, stop - start), dtype=acqumatrix.dtype)
+        block[numpy.arange(start, stop), numpy.arange(stop - start)] = 1
+        result[:, start:stop] = acqumatrix.matmat(block)
+    return result
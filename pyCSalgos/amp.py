@@ -12,6 +12,7 @@ import math
 import numpy as np
 
 from .base import SparseSolver
+from .utils import solution_dtype, dense_columns, matrix_norm, matvec, rmatvec
 
 class ApproximateMessagePassing(SparseSolver):
     """
@@ -30,14 +31,21 @@ class ApproximateMessagePassing(SparseSolver):
         self.maxiter = maxiter
         self.debias = debias
 
+    def uses_realdict(self):
+        return self.debias == "real"
+
     def __str__(self):
         return "AMP ("+str(self.stoptol)+" | " + str(self.maxiter) + ")"
 
     def solve(self, data, dictionary, realdict=None):
 
         # DEBUG: normalize to avoid convergence problems
-        norm = np.linalg.norm(dictionary)
-        dictionary = dictionary/norm
+        norm = matrix_norm(dictionary)
+        if isinstance(dictionary, np.memmap):
+            # out-of-core dictionary: don't copy it, scale the products instead
+            scale = norm
+        else:
+            dictionary, scale = dictionary/norm, 1.
         data = data/norm
 
         # Force data 2D
@@ -48,10 +56,10 @@ class ApproximateMessagePassing(SparseSolver):
 
         N = dictionary.shape[1]
         Ndata = data.shape[1]
-        coef = np.zeros((N, Ndata))
+        coef = np.zeros((N, Ndata), dtype=solution_dtype(data, dictionary))
 
         for i in range(Ndata):
-            coef[:,i] = _amp(dictionary, data[:,i], tol=self.stoptol, maxiter=self.maxiter)
+            coef[:,i] = _amp(dictionary, data[:,i], tol=self.stoptol, maxiter=self.maxiter, scale=scale)
 
             # Debias
             if self.debias == True:
@@ -83,7 +91,7 @@ class ApproximateMessagePassing(SparseSolver):
 
             if self.debias is not False and np.any(supp):
                 gamma2 = np.zeros_like(coef[:,i])
-                gamma2[supp] = np.dot( np.linalg.pinv(dictionary[:, supp]) , data[:, i])
+                gamma2[supp] = np.dot( np.linalg.pinv(dense_columns(dictionary, supp) / scale) , data[:, i])
                 gamma2[~supp] = 0
                 # Rule of thumb check is debiasing went ok: if very different
                 #  from original gamma, debiasing is likely to have gone bad
@@ -95,8 +103,10 @@ class ApproximateMessagePassing(SparseSolver):
 
         return coef
 
-def _amp(dictionary, measurements, tol=0.00001, maxiter=500):
+def _amp(dictionary, measurements, tol=0.00001, maxiter=500, scale=1.):
 
+    # dictionary is a numpy, scipy.sparse or memory-mapped matrix (read in blocks), only used in products,
+    #  divided by ``scale
     [n,N] = dictionary.shape
 
     # Initial solution
@@ -106,7 +116,7 @@ def _amp(dictionary, measurements, tol=0.00001, maxiter=500):
     # Start estimation
     for t in range(maxiter):
         # Pre-threshold value
-        gamma = xhat + np.dot(dictionary.T, z)
+        gamma = xhat + rmatvec(dictionary, z) / scale
 
         # Find n-th largest coefficient of gamma
         threshold = largestElement(np.abs(gamma), n)
@@ -115,10 +125,11 @@ def _amp(dictionary, measurements, tol=0.00001, maxiter=500):
         xhat = eta(gamma, threshold)
 
         # Update the residual
-        z = measurements - np.dot(dictionary, xhat) + (z/n)*np.sum(etaprime(gamma, threshold))
+        Dxhat = matvec(dictionary, xhat) / scale
+        z = measurements - Dxhat + (z/n)*np.sum(etaprime(gamma, threshold))
 
         # Stopping criteria
-        if(np.linalg.norm(measurements - np.dot(dictionary,xhat), 2)/np.linalg.norm(measurements,2) < tol):
+        if(np.linalg.norm(measurements - Dxhat, 2)/np.linalg.norm(measurements,2) < tol):
             break
 
     return xhat
@@ -9,6 +9,7 @@ import math
 import numpy as np
 
 from .base import AnalysisSparseSolver
+from .utils import solution_dtype
 
 
 class AnalysisL1Min(AnalysisSparseSolver):
@@ -42,7 +43,7 @@ class AnalysisL1Min(AnalysisSparseSolver):
 
         N = acqumatrix.shape[1]
         Ndata = measurements.shape[1]
-        outdata = np.zeros((N, Ndata))
+        outdata = np.zeros((N, Ndata), dtype=solution_dtype(measurements, acqumatrix, operator))
 
         if self.algorithm == "nesta":
             U,S,V = np.linalg.svd(acqumatrix, full_matrices = True)
@@ -43,9 +43,20 @@ class SparseSolver(with_metaclass(ABCMeta, BaseEstimator)):
         :param data: The data vector or matrix. If a matrix, it should contain multiple vectors as columns
         :param dictionary: The dictionary, with columnwise atoms
 
-        :return: The coefficient matrix. Each column is the decomposition of the corresponding data vector
+        :return: The coefficient matrix. Each column is the decomposition of the corresponding data vector.
+         The coefficients are float32 if the data and the dictionary are float32 (single precision mode),
+         float64 otherwise (see utils.solution_dtype()).
          """
 
+    def uses_realdict(self):
+        """
+        Returns True if solve() needs the real data information (``realdict``) of the problem, e.g. the real sparsity.
+
+        Solvers which don't use it can solve signals with different sparsity levels (but same dictionary)
+         in a single solve() call.
+        """
+        return False
+
     # __repr()__ mist return a string object, not an unicode object!
     #def __repr__(self):
     #    """
@@ -86,7 +97,8 @@ class AnalysisSparseSolver(with_metaclass(ABCMeta, BaseEstimator)):
         :param operator: The operator matrix
         :param realdict:
 
-        :return: The recovered signals. Each column is the signal recovered from the corresponding measurements vector
+        :return: The recovered signals. Each column is the signal recovered from the corresponding measurements vector.
+         The signals are float32 if all the inputs are float32 (single precision mode), float64 otherwise.
          """
 
 class ERCcheckMixin:
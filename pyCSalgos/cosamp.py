@@ -0,0 +1,192 @@
+"""
+cosamp.py
+
+Provides Compressive Sampling Matching Pursuit (CoSaMP) and Subspace Pursuit (SP)
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import numpy as np
+
+from .base import SparseSolver
+from .utils import fast_lstsq, solution_dtype, dense_columns, rmatvec
+
+
+class CompressiveSamplingMatchingPursuit(SparseSolver):
+    """
+    Compressive Sampling Matching Pursuit (D. Needell, J. A. Tropp, "CoSaMP: Iterative signal recovery from
+     incomplete and inaccurate samples", 2009)
+
+    Every iteration adds the 2k atoms most correlated with the residual to the current support, solves the
+     least-squares problem on the merged support and keeps the k largest coefficients.
+
+    sparsity is the number of atoms k, or "real" to use the real sparsity of the data.
+    Stops when the residual norm is below stoptol times the signal norm, when the residual doesn't decrease anymore,
+     or after maxiter iterations. The number of iterations of every signal in the last solve() is kept in n_iter_.
+    """
+
+    def __init__(self, sparsity, stoptol=1e-6, maxiter=100):
+
+        # parameter check
+        if stoptol < 0:
+            raise ValueError("stopping tolerance is negative")
+        if maxiter <= 0:
+            raise ValueError("number of iterations is not positive")
+
+        self.sparsity = sparsity
+        self.stoptol = stoptol
+        self.maxiter = maxiter
+
+    def uses_realdict(self):
+        return self.sparsity == "real"
+
+    def __str__(self):
+        return "CoSaMP (" + str(self.sparsity) + ", " + str(self.stoptol) + " | " + str(self.maxiter) + ")"
+
+    def solve(self, data, dictionary, realdict=None):
+        coef, self.n_iter_ = cosamp(data, dictionary, _get_sparsity(self.sparsity, realdict), self.stoptol,
+                                    self.maxiter, return_n_iter=True)
+        return coef
+
+
+class SubspacePursuit(SparseSolver):
+    """
+    Subspace Pursuit (W. Dai, O. Milenkovic, "Subspace pursuit for compressive sensing signal reconstruction", 2009)
+
+    Every iteration adds the k atoms most correlated with the residual to the current support, solves the
+     least-squares problem on the merged support, keeps the k atoms with the largest coefficients and solves the
+     least-squares problem again on them.
+
+    sparsity is the number of atoms k, or "real" to use the real sparsity of the data.
+    Stops when the residual norm is below stoptol times the signal norm, when the residual doesn't decrease anymore,
+     or after maxiter iterations. The number of iterations of every signal in the last solve() is kept in n_iter_.
+    """
+
+    def __init__(self, sparsity, stoptol=1e-6, maxiter=100):
+
+        # parameter check
+        if stoptol < 0:
+            raise ValueError("stopping tolerance is negative")
+        if maxiter <= 0:
+            raise ValueError("number of iterations is not positive")
+
+        self.sparsity = sparsity
+        self.stoptol = stoptol
+        self.maxiter = maxiter
+
+    def uses_realdict(self):
+        return self.sparsity == "real"
+
+    def __str__(self):
+        return "SP (" + str(self.sparsity) + ", " + str(self.stoptol) + " | " + str(self.maxiter) + ")"
+
+    def solve(self, data, dictionary, realdict=None):
+        coef, self.n_iter_ = subspace_pursuit(data, dictionary, _get_sparsity(self.sparsity, realdict),
+                                              self.stoptol, self.maxiter, return_n_iter=True)
+        return coef
+
+
+def _get_sparsity(sparsity, realdict):
+    if sparsity == "real":
+        if realdict is None or realdict.get('support') is None:
+            raise ValueError('sparsity set to "real" but no real support given')
+        return realdict['support'].shape[0]
+    return sparsity
+
+
+def cosamp(data, dictionary, sparsity, stoptol=1e-6, maxiter=100, return_n_iter=False):
+    """
+    Compressive Sampling Matching Pursuit, see CompressiveSamplingMatchingPursuit.
+
+    :param data: The data vector or matrix, with signals as columns
+    :param dictionary: The dictionary (numpy, scipy.sparse or memory-mapped matrix)
+    :param sparsity: Number of atoms
+    :param stoptol: Stop when the residual norm is below stoptol times the signal norm
+    :param maxiter: Maximum number of iterations
+    :param return_n_iter: If True, also return the number of iterations for every signal
+    :return: The coefficients, and the number of iterations if return_n_iter is True
+    """
+    return _multiple_atom_pursuit(data, dictionary, sparsity, stoptol, maxiter, "cosamp", return_n_iter)
+
+
+def subspace_pursuit(data, dictionary, sparsity, stoptol=1e-6, maxiter=100, return_n_iter=False):
+    """
+    Subspace Pursuit, see SubspacePursuit.
+
+    :param data: The data vector or matrix, with signals as columns
+    :param dictionary: The dictionary (numpy, scipy.sparse or memory-mapped matrix)
+    :param sparsity: Number of atoms
+    :param stoptol: Stop when the residual norm is below stoptol times the signal norm
+    :param maxiter: Maximum number of iterations
+    :param return_n_iter: If True, also return the number of iterations for every signal
+    :return: The coefficients, and the number of iterations if return_n_iter is True
+    """
+    return _multiple_atom_pursuit(data, dictionary, sparsity, stoptol, maxiter, "sp", return_n_iter)
+
+
+def _largest(values, k):
+    # indices of the k largest values in magnitude
+    if k >= values.size:
+        return np.arange(values.size)
+    return np.argpartition(np.abs(values), -k)[-k:]
+
+
+def _multiple_atom_pursuit(data, dictionary, sparsity, stoptol, maxiter, algorithm, return_n_iter):
+    # CoSaMP and SP differ only in the number of atoms added per iteration and in the final least-squares step.
+    # The correlations of all the signals still running are computed with a single product with the dictionary,
+    #  the least-squares problems are solved for every signal on its own support.
+
+    if sparsity < 1 or sparsity > min(dictionary.shape):
+        raise ValueError("sparsity must be between 1 and min(signal size, dictionary size)")
+
+    squeeze = (data.ndim == 1)
+    data = data.reshape(data.shape[0], -1)
+    N = dictionary.shape[1]
+    Ndata = data.shape[1]
+    dtype = solution_dtype(data, dictionary)
+    coef = np.zeros((N, Ndata), dtype=dtype)
+    n_iter = np.zeros(Ndata, dtype=int)
+    num_new = 2 * sparsity if algorithm == "cosamp" else sparsity
+
+    supports = [np.zeros(0, dtype=int) for _ in range(Ndata)]
+    residual = data.astype(dtype)
+    datanorms = np.linalg.norm(data, axis=0)
+    resnorms = datanorms.copy()
+    active = np.arange(Ndata)
+
+    for iteration in range(maxiter):
+        active = active[resnorms[active] > stoptol * datanorms[active]]
+        if active.size == 0:
+            break
+
+        correlations = rmatvec(dictionary, residual[:, active])
+        running = []
+        for j, i in enumerate(active):
+            n_iter[i] += 1
+            merged = np.union1d(supports[i], _largest(correlations[:, j], num_new))
+            atoms = dense_columns(dictionary, merged)
+            b = fast_lstsq(atoms, data[:, i])
+            keep = _largest(b, sparsity)
+            if algorithm == "cosamp":
+                x = b[keep]
+            else:
+                x = fast_lstsq(atoms[:, keep], data[:, i])
+            newresidual = data[:, i] - np.dot(atoms[:, keep], x)
+            newnorm = np.linalg.norm(newresidual)
+
+            # stop when the residual doesn't decrease, keeping the previous solution
+            if newnorm < resnorms[i]:
+                supports[i] = merged[keep]
+                coef[:, i] = 0
+                coef[supports[i], i] = x
+                residual[:, i] = newresidual
+                resnorms[i] = newnorm
+                running.append(i)
+        active = np.array(running, dtype=int)
+
+    if squeeze:
+        coef, n_iter = coef[:, 0], n_iter[0]
+    if return_n_iter:
+        return coef, n_iter
+    return coef
@@ -14,7 +14,7 @@ import numpy as np
 import scipy.linalg
 
 from .base import AnalysisSparseSolver, ERCcheckMixin
-from .utils import fast_lstsq
+from .utils import fast_lstsq, solution_dtype
 
 
 class GreedyAnalysisPursuit(ERCcheckMixin, AnalysisSparseSolver):
@@ -43,7 +43,7 @@ class GreedyAnalysisPursuit(ERCcheckMixin, AnalysisSparseSolver):
 
         numdata = measurements.shape[1]
         signalsize = acqumatrix.shape[1]
-        outdata = np.zeros((signalsize, numdata))
+        outdata = np.zeros((signalsize, numdata), dtype=solution_dtype(measurements, acqumatrix, operator))
 
         gapparams = {"num_iteration" : 1000,
                      "greedy_level" : 0.9,
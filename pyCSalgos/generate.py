@@ -5,39 +5,198 @@ Contains function to generate datasets and problems
 # Author: Nicolae Cleju
 # License: BSD 3 clause
 
+import importlib.util
+import os
+import tempfile
+
 import numpy
 import scipy
+import scipy.sparse
+from scipy.sparse.linalg import LinearOperator
 from sklearn.utils import check_random_state
 
-try:
-    import sklearn.datasets
-    has_sklearn_datasets = True
-except ImportError as e:
-    # module doesn't exist
-    has_sklearn_datasets = False
+from . import acquisition as acq
+from .noise import add_noise_snr
+from .utils import matvec, astype
+
+# sklearn.datasets is slow to import, so only check here if it exists and import it when needed
+has_sklearn_datasets = importlib.util.find_spec("sklearn") is not None
 
-def add_noise_snr(data, snr_db, rng=None):
+def make_random_support(size, support_size, num_data, random_state=None, block_elements=2**22):
     """
-    Adda a certain amount of noise over some data.
-    The amount of noise is specified in SNR [db]
+    Generate random supports: for every signal, a subset of ``support_size'' distinct indices out of ``size'',
+     drawn uniformly at random, independently for every signal.
+
+    All supports are drawn at once, vectorized over the signals:
+     - for small supports, with Floyd's sampling algorithm (``support_size'' steps, one random integer per signal
+       and step);
+     - otherwise, by taking the positions of the smallest ``support_size'' values of i.i.d. uniform random numbers,
+       in blocks of signals to limit the temporary memory.
+
+    Parameters
+    ----------
+    size : int
+        Total number of indices (e.g. dictionary size).
+    support_size : int
+        Number of indices in every support.
+    num_data : int
+        Number of supports to generate.
+    random_state : int or RandomState instance, optional (default=None)
+        Set random number generator state.
+    block_elements : int, optional (default=2**22)
+        Maximum number of random values drawn at once.
+
+    Returns
+    -------
+    support : array_like
+        The supports as columns, sorted, size (support_size x num_data)
     """
-    if rng is not None:
-        # Add noise on data
-        if numpy.isfinite(snr_db):
-            noise = rng.randn(*data.shape)
-            SNR_norm = 10**(snr_db/20.)
-            for i in range(data.shape[1]):
-                # Make norm 1
-                noise[:,i] = noise[:,i] / numpy.linalg.norm(noise[:,i])
-                # Make noise norm = smaller than data by SNR_norm
-                noise[:,i] = noise[:,i] * numpy.linalg.norm(data[:,i]) / SNR_norm
+
+    rng = check_random_state(random_state)
+
+    if support_size < 0 or support_size > size:
+        raise ValueError("Support size must be between 0 and size")
+    if support_size == size:
+        return numpy.tile(numpy.arange(size)[:, None], (1, num_data))
+
+    support = numpy.zeros((support_size, num_data), dtype=int)
+    if support_size == 0:
+        return support
+
+    if support_size * support_size <= 32 * size:
+        # Floyd's algorithm: at step j, draw t in [0, j]; if t was already chosen, choose j instead
+        for i, j in enumerate(range(size - support_size, size)):
+            t = rng.randint(0, j + 1, size=num_data)
+            t[(support[:i] == t).any(axis=0)] = j
+            support[i] = t
+    else:
+        blocksize = max(1, block_elements // size)
+        for start in range(0, num_data, blocksize):
+            stop = min(start + blocksize, num_data)
+            values = rng.random_sample((stop - start, size))
+            support[:, start:stop] = numpy.argpartition(values, support_size - 1, axis=1)[:, :support_size].T
+    support.sort(axis=0)
+    return support
+
+
+def make_dictionary(signal_size, dict_size, dictionary="randn", random_state=None, dtype=numpy.float64):
+    """
+    Generate a dictionary, or check the shape of a given one.
+
+    Parameters
+    ----------
+    signal_size : int
+        Signal dimension.
+    dict_size : int
+        Dictionary dimension.
+    dictionary : {'randn', 'orthonormal', a numpy matrix, a scipy.sparse matrix}, optional (default="randn")
+         The type of dictionary. Can be one of the following:
+        - "randn" (default): i.i.d. random gaussian entries, atoms (columns) are normalized
+        - "orthonormal": a random orthonormal matrix
+        - a numpy matrix that will be used.
+        - a scipy.sparse matrix that will be used, kept sparse (in CSC format).
+        - a memory-mapped matrix (numpy.memmap), e.g. from ``make_memmap_dictionary()'', used without loading it.
+          If its dtype is not ``dtype'', it is cast block-wise into a temporary memory-mapped file.
+    random_state : int or RandomState instance, optional (default=None)
+        Set random number generator state.
+    dtype : numpy dtype, optional (default=numpy.float64)
+        Floating point type of the generated arrays, e.g. numpy.float32 for single precision.
+
+    Returns
+    -------
+    dictionary : array_like or sparse matrix
+        The dictionary matrix, size (signal_size x dict_size)
+    """
+
+    rng = check_random_state(random_state)
+
+    if isinstance(dictionary, str) and dictionary == "randn":
+        # generate random dictionary and normalize
+        dictionary = rng.randn(signal_size, dict_size)
+        dictionary = dictionary / numpy.sqrt(numpy.sum(dictionary**2, axis=0))
+    elif isinstance(dictionary, str) and dictionary == "orthonormal":
+        if signal_size != dict_size:
+            raise ValueError("Orthonormal dictionary has n==N")
+        # generate random square dictionary and orthonormalize
+        dictionary = rng.randn(signal_size,dict_size)
+        dictionary = scipy.linalg.orth(dictionary)
+    elif isinstance(dictionary, numpy.ndarray) or scipy.sparse.issparse(dictionary):
+        # dictionary is given
+        if signal_size != dictionary.shape[0] or dict_size != dictionary.shape[1]:
+            raise ValueError("Dictionary shape different from (n,N)")
+        if scipy.sparse.issparse(dictionary):
+            # solvers access the atoms (columns)
+            dictionary = scipy.sparse.csc_matrix(dictionary)
+    else:
+        raise ValueError("Wrong dictionary parameter")
+
+    # a memory-mapped dictionary stays out-of-core
+    return astype(dictionary, dtype)
+
+
+def make_memmap_dictionary(filename, signal_size, dict_size, dictionary="randn", random_state=None, dtype=numpy.float64,
+                           block_elements=2**22):
+    """
+    Generate a dictionary directly in a file, block-wise, and return it memory-mapped (out-of-core).
+
+    The dictionary is never held in memory as a whole: it is written in blocks of atoms (columns), in a .npy file
+     in column-major (Fortran) order so that every atom is contiguous on disk. It can be reopened later with
+     ``numpy.load(filename, mmap_mode='r')''. The solvers read memory-mapped dictionaries in blocks of atoms
+     (see utils.matvec() and utils.rmatvec()).
+
+    Parameters
+    ----------
+    filename : str
+        The .npy file where the dictionary is written.
+    signal_size : int
+        Signal dimension.
+    dict_size : int
+        Dictionary dimension.
+    dictionary : {'randn', a numpy matrix}, optional (default="randn")
+         The type of dictionary. Can be one of the following:
+        - "randn" (default): i.i.d. random gaussian entries, atoms (columns) are normalized.
+          The atoms are generated block by block, so the values differ from those of ``make_dictionary()''.
+        - a numpy matrix (possibly memory-mapped itself) that is copied block-wise.
+    random_state : int or RandomState instance, optional (default=None)
+        Set random number generator state.
+    dtype : numpy dtype, optional (default=numpy.float64)
+        Floating point type of the dictionary, e.g. numpy.float32 for single precision.
+    block_elements : int, optional (default=2**22)
+        Maximum number of elements written at once.
+
+    Returns
+    -------
+    dictionary : numpy.memmap
+        The read-only memory-mapped dictionary, size (signal_size x dict_size)
+    """
+
+    rng = check_random_state(random_state)
+
+    if isinstance(dictionary, numpy.ndarray):
+        if signal_size != dictionary.shape[0] or dict_size != dictionary.shape[1]:
+            raise ValueError("Dictionary shape different from (n,N)")
+    elif not (isinstance(dictionary, str) and dictionary == "randn"):
+        raise ValueError("Wrong dictionary parameter")
+
+    out = numpy.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=(signal_size, dict_size),
+                                       fortran_order=True)
+    blocksize = max(1, block_elements // signal_size)
+    for start in range(0, dict_size, blocksize):
+        stop = min(start + blocksize, dict_size)
+        if isinstance(dictionary, str):
+            block = rng.randn(signal_size, stop - start)
+            block /= numpy.sqrt(numpy.sum(block**2, axis=0))
         else:
-            noise = 0
-    
-    return data + noise
+            block = dictionary[:, start:stop]
+        out[:, start:stop] = block
+    out.flush()
+    del out
+
+    return numpy.load(filename, mmap_mode='r')
+
 
 def make_sparse_coded_signal(signal_size, dict_size, sparsity, num_data, snr_db_sparse, snr_db_signal, dictionary="randn",
-                             use_sklearn=True, random_state=None):
+                             use_sklearn=True, random_state=None, dtype=numpy.float64, group_size=1):
     """
     Generate sparse coded signals.
 
@@ -53,22 +212,29 @@ def make_sparse_coded_signal(signal_size, dict_size, sparsity, num_data, snr_db_
         Number of signals to generate.
     snr_db : float
         Signal to Noise Ratio (dB). Can be numpy.inf for no noise.
-    dictionary : {'randn', 'orthonormal', a numpy matrix}, optional (default="randn")
+    dictionary : {'randn', 'orthonormal', a numpy matrix, a scipy.sparse matrix}, optional (default="randn")
          The type of dictionary. Can be one of the following:
         - "randn" (default): i.i.d. random gaussian entries, atoms (columns) are normalized
         - "orthonormal": a random orthonormal matrix
         - a numpy matrix that will be used.
+        - a scipy.sparse matrix that will be used, kept sparse (in CSC format).
+        - a memory-mapped matrix (numpy.memmap), e.g. from ``make_memmap_dictionary()'', used without loading it.
     use_sklearn : boolean, optional (default=True)
         If true (default), use the corresponding function from the scikit-learn package, if available.
         If false or scikit-learn not available, use the local similar version.
     random_state : int or RandomState instance, optional (default=None)
         Set random number generator state.
+    dtype : numpy dtype, optional (default=numpy.float64)
+        Floating point type of the generated arrays, e.g. numpy.float32 for single precision.
+    group_size : int, optional (default=1)
+        Number of consecutive signals (columns) sharing the same support (joint sparsity).
+        ``num_data'' must be a multiple of ``group_size''. The scikit-learn function is not used if group_size > 1.
 
     Returns
     -------
     data : array_like
         The sparse signal(s), as a vector or a (signal_size x num_data) matrix containing the sparse signals as columns.
-    dictionary : array_like
+    dictionary : array_like or sparse matrix
         The dictionary matrix, size (signal_size x dict_size)
     gamma :
         The sparse codes themselves, size (dict_size x num_data)
@@ -76,74 +242,117 @@ def make_sparse_coded_signal(signal_size, dict_size, sparsity, num_data, snr_db_
         The locations of the non-zeros in ``gamma'', size (sparsity x num_data)
     """
 
-    rng = check_random_state(random_state)
+    if group_size < 1 or num_data % group_size != 0:
+        raise ValueError("Number of signals is not a multiple of the group size")
 
-    # Generate coefficients matrix
-    support = numpy.zeros((sparsity, num_data), dtype=int)
+    rng = check_random_state(random_state)
 
-    if isinstance(dictionary, str) and dictionary == "randn" and use_sklearn and has_sklearn_datasets:
+    if isinstance(dictionary, str) and dictionary == "randn" and use_sklearn and has_sklearn_datasets \
+            and group_size == 1:
         # use random normalized dictionary from scikit-learn
+        import sklearn.datasets
         data, dictionary, gamma = sklearn.datasets.make_sparse_coded_signal(n_samples=num_data, n_features=signal_size,
                                                                 n_components=dict_size ,n_nonzero_coefs=sparsity,
                                                                 random_state=rng)
-        for i in range(num_data):
-            support[:, i] = numpy.nonzero(gamma[:, i])[0]
+        # every column has exactly ``sparsity'' non-zeros, found in column order when scanning gamma.T
+        support = numpy.nonzero(gamma.T)[1].reshape(num_data, sparsity).T
+        data = data.astype(dtype, copy=False)
+        dictionary = dictionary.astype(dtype, copy=False)
+        gamma = gamma.astype(dtype, copy=False)
 
     else:
         # Create dictionary
-        if isinstance(dictionary, str) and dictionary == "randn":
-            # generate random dictionary and normalize
-            dictionary = rng.randn(signal_size, dict_size)
-            dictionary = dictionary / numpy.sqrt(numpy.sum(dictionary**2, axis=0))
-        elif isinstance(dictionary, str) and dictionary == "orthonormal":
-            if signal_size != dict_size:
-                raise ValueError("Orthonormal dictionary has n==N")
-            # generate random square dictionary and orthonormalize
-            dictionary = rng.randn(signal_size,dict_size)
-            dictionary = scipy.linalg.orth(dictionary)
-        elif isinstance(dictionary, numpy.ndarray):
-            # dictionary is given
-            if signal_size != dictionary.shape[0] or dict_size != dictionary.shape[1]:
-                raise ValueError("Dictionary shape different from (n,N)")
-            dictionary = dictionary
-        else:
-            raise ValueError("Wrong dictionary parameter")
+        dictionary = make_dictionary(signal_size, dict_size, dictionary, random_state=rng, dtype=dtype)
 
-        # Generate coefficients matrix
-        gamma = numpy.zeros((dict_size, num_data))
-        for i in range(num_data):
-            support[:, i] = rng.permutation(dict_size)[:sparsity]
-            gamma[support[:, i],i] = rng.randn(sparsity)
+        # Generate coefficients matrix: draw all supports at once (one per group), then scatter all the values
+        support = make_random_support(dict_size, sparsity, num_data // group_size, random_state=rng)
+        if group_size > 1:
+            support = numpy.repeat(support, group_size, axis=1)
+        gamma = numpy.zeros((dict_size, num_data), dtype=dtype)
+        gamma[support, numpy.arange(num_data)] = rng.randn(sparsity, num_data)
 
-        # Generate data
-        data = numpy.dot(dictionary,gamma)
+        # Generate data (reads only the atoms in the support from a memory-mapped dictionary)
+        data = matvec(dictionary, gamma)
 
     # Add sparsity noise (noise on the decomposition vector)
-    cleargamma = gamma.copy()  # sparse gamma with no noise
-    gamma = add_noise_snr(gamma, snr_db_sparse, rng)
-    data = numpy.dot(dictionary, gamma)
+    if numpy.isfinite(snr_db_sparse):
+        add_noise_snr(gamma, snr_db_sparse, rng, out=gamma)
+        data = matvec(dictionary, gamma)
 
     # Add signal noise
-    # if numpy.isfinite(snr_db_signal):
-    #     noise = rng.randn(signal_size, num_data)
-    #     SNR_norm = 10**(snr_db_signal/20.)
-    #     for i in range(num_data):
-    #         # Make norm 1
-    #         noise[:,i] = noise[:,i] / numpy.linalg.norm(noise[:,i])
-    #         # Make smaller than data by SNR_norm
-    #         noise[:,i] = noise[:,i] / SNR_norm * numpy.linalg.norm(data[:,i])
-    #         #(numpy.linalg.norm(data[:,i])**2 / numpy.linalg.norm(noise[:,i]))
-    # else:
-    #     noise = 0
     cleardata = data.copy() # data with no signal noise
-    data = add_noise_snr(data, snr_db_signal, rng)
-    #data = data + noise
+    add_noise_snr(data, snr_db_signal, rng, out=data)
 
     return data,dictionary,gamma,support,cleardata
 
 
+def make_acquisition(num_measurements, signal_size, acquisition="randn", random_state=None, dtype=numpy.float64):
+    """
+    Generate an acquisition matrix, or check the shape of a given one.
+
+    Parameters
+    ----------
+    num_measurements : int
+        Number of measurements.
+    signal_size : int
+        Signal dimension.
+    acquisition : {'randn', 'dct', 'hadamard', 'sparse', a numpy matrix, a scipy.sparse matrix, a LinearOperator,
+                   a callable}, optional (default="randn")
+         The type of acquisition. Can be one of the following:
+        - "randn" (default): i.i.d. random gaussian entries
+        - "dct": random rows of the DCT matrix (matrix-free)
+        - "hadamard": random rows of the Walsh-Hadamard matrix, with random sign flips (matrix-free).
+          ``signal_size'' must be a power of 2.
+        - "sparse": sparse matrix with a few random +1 / -1 entries in every column
+        - a numpy matrix that will be used as acquisition matrix.
+        - a scipy.sparse matrix that will be used as acquisition matrix, kept sparse (in CSR format).
+        - a scipy.sparse.linalg.LinearOperator that will be used as acquisition operator
+        - a callable, called as ``acquisition(num_measurements, signal_size)'', returning the acquisition matrix
+        The structured types are returned as scipy.sparse.linalg.LinearOperator objects, applied in O(n log n)
+         or O(nnz) per signal (see acquisition.py). Apply them with ``acqumatrix.dot()''.
+    random_state : int or RandomState instance, optional (default=None)
+        Set random number generator state.
+    dtype : numpy dtype, optional (default=numpy.float64)
+        Floating point type of the acquisition matrix, also of the structured operators ("dct", "hadamard",
+         "sparse"). Given linear operators are used as they are.
+
+    Returns
+    -------
+    acqumatrix : array_like, sparse matrix or LinearOperator
+        The acquisition matrix, size (num_measurements x signal_size)
+    """
+
+    rng = check_random_state(random_state)
+
+    if isinstance(acquisition, str) and acquisition == "randn":
+        acqumatrix = rng.randn(num_measurements, signal_size)
+    elif isinstance(acquisition, str) and acquisition == "dct":
+        acqumatrix = acq.make_partial_dct(num_measurements, signal_size, random_state=rng, dtype=dtype)
+    elif isinstance(acquisition, str) and acquisition == "hadamard":
+        acqumatrix = acq.make_randomized_hadamard(num_measurements, signal_size, random_state=rng, dtype=dtype)
+    elif isinstance(acquisition, str) and acquisition == "sparse":
+        acqumatrix = acq.make_sparse_sign(num_measurements, signal_size, random_state=rng, dtype=dtype)
+    elif isinstance(acquisition, (numpy.ndarray, LinearOperator)) or scipy.sparse.issparse(acquisition):
+        # acquisition matrix is given
+        if num_measurements != acquisition.shape[0] or signal_size != acquisition.shape[1]:
+            raise ValueError("Acquisition matrix shape different from (m,n)")
+        acqumatrix = acquisition
+    elif callable(acquisition):
+        acqumatrix = acquisition(num_measurements, signal_size)
+    else:
+        raise ValueError("Unrecognized acquisition matrix type")
+
+    if isinstance(acqumatrix, numpy.ndarray):
+        acqumatrix = acqumatrix.astype(dtype, copy=False)
+    elif scipy.sparse.issparse(acqumatrix):
+        # applied to the signals (rows)
+        acqumatrix = scipy.sparse.csr_matrix(acqumatrix, dtype=dtype)
+    return acqumatrix
+
+
 def make_compressed_sensing_problem(num_measurements, signal_size, dict_size, sparsity, num_data, snr_db_sparse, snr_db_signal, snr_db_meas,
-                                    dictionary="randn", acquisition="randn", use_sklearn=True, random_state=None):
+                                    dictionary="randn", acquisition="randn", use_sklearn=True, random_state=None,
+                                    dtype=numpy.float64, group_size=1):
     """
     Generate a random compressed sensing problem.
 
@@ -165,15 +374,15 @@ def make_compressed_sensing_problem(num_measurements, signal_size, dict_size, sp
         Signal to Noise Ratio (dB) of the signal (dict * decomposition). Can be numpy.inf for no noise.
     snr_db_meas: float
         Signal to Noise Ratio (dB) of the measurements (acquisition * dict * decomposition). Can be numpy.inf for no noise.
-    dictionary : {'randn', 'orthonormal', a numpy matrix}, optional (default="randn")
+    dictionary : {'randn', 'orthonormal', a numpy matrix, a scipy.sparse matrix}, optional (default="randn")
          The type of dictionary. Can be one of the following:
         - "randn" (default): i.i.d. random gaussian entries, atoms (columns) are normalized
         - "orthonormal": a random orthonormal matrix
         - a numpy matrix that will be used.
-    acquisition : {'randn', a numpy matrix}, optional (default="randn")
-         The type of acquisition. Can be one of the following:
-        - "randn" (default): i.i.d. random gaussian entries
-        - a numpy matrix that will be used as acquisition matrix.
+        - a scipy.sparse matrix that will be used, kept sparse (in CSC format).
+        - a memory-mapped matrix (numpy.memmap), e.g. from ``make_memmap_dictionary()'', used without loading it.
+    acquisition : {'randn', a numpy matrix, a callable}, optional (default="randn")
+         The type of acquisition, see ``make_acquisition()''.
     use_sklearn : boolean, optional (default=True)
         Argument passed to ``make_sparse_coded_signal()''
         If true (default), use the function ``make_sparse_coded_signal()'' from the scikit-learn package
@@ -181,17 +390,21 @@ def make_compressed_sensing_problem(num_measurements, signal_size, dict_size, sp
         If false or scikit-learn not available, use the local similar version.
     random_state : int or RandomState instance, optional (default=None)
         Set random number generator state.
+    dtype : numpy dtype, optional (default=numpy.float64)
+        Floating point type of the generated arrays, e.g. numpy.float32 for single precision.
+    group_size : int, optional (default=1)
+        Number of consecutive signals sharing the same support (joint sparsity), see ``make_sparse_coded_signal()''.
 
     Returns
     -------
     measurements : array_like
         The measurement vector/matrix, size (num_measurements x num_data)
-    acqumatrix : array_like
+    acqumatrix : array_like, sparse matrix or LinearOperator
         The acquisition matrix, size (num_measurements x signal_size)
     data : array_like
         The sparse signal(s), as a vector or a (signal_size x num_data) matrix
          containing the sparse signals as columns.
-    dictionary : array_like
+    dictionary : array_like or sparse matrix
         The dictionary matrix, size (signal_size x dict_size)
     gamma :
         The sparse codes themselves, size (dict_size x num_data)
@@ -203,32 +416,312 @@ def make_compressed_sensing_problem(num_measurements, signal_size, dict_size, sp
 
     # generate sparse coded data
     data, dictionary, gamma, support, cleardata = make_sparse_coded_signal(signal_size, dict_size, sparsity ,num_data, snr_db_sparse, snr_db_signal,
-                                                                dictionary, use_sklearn, random_state=rng)
+                                                                dictionary, use_sklearn, random_state=rng, dtype=dtype,
+                                                                group_size=group_size)
 
     # generate acquisition matrix
-    if isinstance(acquisition, str) and acquisition == "randn":
-        acqumatrix = rng.randn(num_measurements, signal_size)
-    elif isinstance(acquisition, numpy.ndarray):
-        # acquisition matrix is given
-        if num_measurements != acquisition.shape[0] or signal_size != acquisition.shape[1]:
-            raise ValueError("Acquisition matrix shape different from (m,n)")
-        acqumatrix = acquisition
-    elif callable(acquisition):
-        acqumatrix = acquisition(num_measurements, signal_size)
-    else:
-        raise ValueError("Unrecognized acquisition matrix type")
+    acqumatrix = make_acquisition(num_measurements, signal_size, acquisition, random_state=rng, dtype=dtype)
 
-    measurements = numpy.dot(acqumatrix, data)
+    measurements = acqumatrix.dot(data).astype(dtype, copy=False)
 
     # Add measurement noise
-    measurements = add_noise_snr(measurements, snr_db_meas, rng)
+    add_noise_snr(measurements, snr_db_meas, rng, out=measurements)
 
     return measurements, acqumatrix, data, dictionary, gamma, support, cleardata
 
 
 
+def make_joint_sparse_compressed_sensing_problem(num_measurements, signal_size, dict_size, sparsity, num_groups,
+                                                 group_size, snr_db_sparse, snr_db_signal, snr_db_meas,
+                                                 dictionary="randn", acquisition="randn", group_acquisition=False,
+                                                 random_state=None, dtype=numpy.float64):
+    """
+    Generate a random joint-sparse (Multiple Measurement Vectors) compressed sensing problem.
+
+    The signals come in ``num_groups'' groups of ``group_size'' consecutive columns. All the signals in a group
+     share the same support, and are acquired with the same acquisition matrix. Group i is made of the columns
+     ``i*group_size'' to ``(i+1)*group_size - 1'' of all the returned signal matrices, so it can be solved
+     as a single matrix problem, e.g.:
+
+        cols = slice(i * group_size, (i + 1) * group_size)
+        solve(measurements[:, cols], acqumatrix[i].dot(dictionary))   # acqumatrix.dot() for a shared acquisition
+
+    Parameters
+    ----------
+    num_groups : int
+        Number of groups of signals.
+    group_size : int
+        Number of signals (columns) in every group.
+    group_acquisition : boolean, optional (default=False)
+        If False (default), all the groups are acquired with the same acquisition matrix.
+        If True, every group has its own acquisition matrix, generated as specified by ``acquisition''.
+
+    For the other parameters, see ``make_compressed_sensing_problem()''.
+
+    Returns
+    -------
+    measurements : array_like
+        The measurement matrix, size (num_measurements x num_groups*group_size)
+    acqumatrix : array_like, sparse matrix, LinearOperator or list
+        The acquisition matrix, size (num_measurements x signal_size), or the list of the ``num_groups''
+         acquisition matrices if ``group_acquisition'' is True
+    data : array_like
+        The sparse signals as columns, size (signal_size x num_groups*group_size)
+    dictionary : array_like or sparse matrix
+        The dictionary matrix, size (signal_size x dict_size)
+    gamma :
+        The sparse codes themselves, size (dict_size x num_groups*group_size)
+    support :
+        The support of every group, size (sparsity x num_groups)
+    """
+
+    rng = check_random_state(random_state)
+
+    # generate joint-sparse coded data
+    data, dictionary, gamma, support, cleardata = make_sparse_coded_signal(signal_size, dict_size, sparsity,
+                                                                num_groups * group_size, snr_db_sparse, snr_db_signal,
+                                                                dictionary, random_state=rng, dtype=dtype,
+                                                                group_size=group_size)
+
+    # generate acquisition matrices and measure every group
+    if group_acquisition:
+        acqumatrix = [make_acquisition(num_measurements, signal_size, acquisition, random_state=rng, dtype=dtype)
+                      for _ in range(num_groups)]
+        measurements = numpy.empty((num_measurements, data.shape[1]), dtype=dtype)
+        for i, groupacqu in enumerate(acqumatrix):
+            cols = slice(i * group_size, (i + 1) * group_size)
+            measurements[:, cols] = groupacqu.dot(data[:, cols])
+    else:
+        acqumatrix = make_acquisition(num_measurements, signal_size, acquisition, random_state=rng, dtype=dtype)
+        measurements = acqumatrix.dot(data).astype(dtype, copy=False)
+
+    # Add measurement noise
+    add_noise_snr(measurements, snr_db_meas, rng, out=measurements)
+
+    return measurements, acqumatrix, data, dictionary, gamma, support[:, ::group_size], cleardata
+
+
+def make_tight_frame(operator_size, signal_size, random_state=None, tol=1e-6, max_iter=200, cache_dir=None):
+    """
+    Generate a random tight frame (tall matrix) with normalized rows.
+
+    Alternating projections (algorithm from Nam's GAP code) between the tight frames, obtained with the polar factor
+     of the matrix, and the matrices with normalized rows. The first polar factor is computed with an SVD,
+     the following ones from the eigendecomposition of the small (signal_size x signal_size) Gram matrix,
+     or again with an SVD when the Gram matrix is singular (e.g. for operator_size < signal_size).
+    The iterations stop when the frame is tight up to ``tol'', i.e. when the spread of the nonzero eigenvalues of the
+     Gram matrix, relative to their mean, is smaller than ``tol''.
+
+    Parameters
+    ----------
+    operator_size : int
+        Operator dimension (number of rows).
+    signal_size : int
+        Signal dimension (number of columns).
+    random_state : int or RandomState instance, optional (default=None)
+        Set random number generator state.
+    tol : float, optional (default=1e-6)
+        Tolerance on the tightness of the frame.
+    max_iter : int, optional (default=200)
+        Maximum number of iterations.
+    cache_dir : str, optional (default=None)
+        If given and ``random_state'' is an int, the operator is stored in this directory, in a file named after
+         the shape, the seed, ``tol'' and ``max_iter'', and is loaded from there the next time it is requested.
+
+    Returns
+    -------
+    operator : array_like
+        The operator matrix, size (operator_size x signal_size)
+    """
+
+    filename = None
+    if cache_dir is not None and isinstance(random_state, (int, numpy.integer)):
+        filename = os.path.join(cache_dir, "tightframe_{}x{}_seed{}_tol{:g}_iter{}.npy".format(
+            operator_size, signal_size, int(random_state), tol, max_iter))
+        if os.path.isfile(filename):
+            return numpy.load(filename)
+
+    rng = check_random_state(random_state)
+
+    # number of nonzero eigenvalues of the Gram matrix
+    rank = min(operator_size, signal_size)
+
+    U, S, Vh = numpy.linalg.svd(rng.randn(operator_size, signal_size), full_matrices=False)
+    operator = numpy.dot(U, Vh)
+    for _ in range(max_iter):
+        operator /= numpy.sqrt(numpy.sum(operator**2, axis=1))[:, None]
+        w, V = numpy.linalg.eigh(numpy.dot(operator.T, operator))
+        if w[-1] - w[-rank] <= tol * numpy.mean(w[-rank:]):
+            break
+        if w[0] > numpy.finfo(w.dtype).eps * w[-1]:
+            # polar factor: operator * (operator^T * operator)^(-1/2)
+            operator = numpy.dot(operator, numpy.dot(V / numpy.sqrt(w), V.T))
+        else:
+            # singular Gram matrix, polar factor from the SVD
+            U, S, Vh = numpy.linalg.svd(operator, full_matrices=False)
+            operator = numpy.dot(U, Vh)
+
+    if filename is not None:
+        # write to a temporary file and rename, so that concurrent processes never read a partial file
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(suffix=".npy", dir=cache_dir)
+        with os.fdopen(fd, "wb") as f:
+            numpy.save(f, operator)
+        os.replace(tmpname, filename)
+
+    return operator
+
+
+def make_operator(signal_size, operator_size, operator="tightframe", random_state=None, cache_dir=None,
+                  dtype=numpy.float64):
+    """
+    Generate an analysis operator, or check the shape of a given one.
+
+    Parameters
+    ----------
+    signal_size : int
+        Signal dimension.
+    operator_size : int
+        Operator dimension.
+    operator : {'tightframe', 'randn', 'orthonormal', a numpy matrix, a scipy.sparse matrix},
+               optional (default="tightframe")
+         The type of operator. Can be one of the following:
+        - "tightframe" (default): a random tight frame (tall matrix), with normalized rows
+        - "randn": i.i.d. random gaussian entries, atoms (rows) are normalized
+        - "orthonormal": a random orthonormal matrix
+        - a numpy matrix that will be used as operator matrix
+        - a scipy.sparse matrix that will be used as operator matrix, kept sparse (in CSR format)
+    random_state : int or RandomState instance, optional (default=None)
+        Set random number generator state.
+    cache_dir : str, optional (default=None)
+        Directory where tight frames are cached, see ``make_tight_frame()''. Used only if ``random_state'' is an
+         int, since otherwise the cached frame would never be requested again.
+        A tight frame is built with its own seed, drawn from the random state, so the result is the same whether
+         the cache is used or not.
+    dtype : numpy dtype, optional (default=numpy.float64)
+        Floating point type of the generated arrays, e.g. numpy.float32 for single precision.
+
+    Returns
+    -------
+    operator : array_like or sparse matrix
+        The operator matrix, size (operator_size x signal_size)
+    """
+    return _make_operator(signal_size, operator_size, operator, check_random_state(random_state),
+                          _seeded_cache(random_state, cache_dir), dtype)
+
+
+def _seeded_cache(random_state, cache_dir):
+    # The tight frame cache is used only when the caller gives an int seed. The seed of the frame is then
+    #  drawn deterministically from it, otherwise every call would write a new file that is never read again.
+    if isinstance(random_state, (int, numpy.integer)):
+        return cache_dir
+    return None
+
+
+def _make_operator(signal_size, operator_size, operator, rng, cache_dir, dtype):
+    # make_operator() with a RandomState, and the cache directory already checked with _seeded_cache()
+    if isinstance(operator, str) and operator == "randn":
+        # generate random operator and normalize
+        operator = rng.randn(operator_size, signal_size)
+        operator = operator / numpy.sqrt(numpy.sum(operator**2, axis=1))[:, None]
+    elif isinstance(operator, str) and operator == "orthonormal":
+        if signal_size != operator_size:
+            raise ValueError("Orthonormal operator has n==N")
+        # generate random square operator and orthonormalize
+        operator = rng.randn(operator_size, signal_size)
+        operator = scipy.linalg.orth(operator)
+    elif isinstance(operator, str) and operator == "tightframe":
+        seed = rng.randint(numpy.iinfo(numpy.int32).max)
+        operator = make_tight_frame(operator_size, signal_size, random_state=seed, cache_dir=cache_dir)
+    elif isinstance(operator, numpy.ndarray) or scipy.sparse.issparse(operator):
+        # operator is given
+        if operator_size != operator.shape[0] or signal_size != operator.shape[1]:
+            raise ValueError("Operator shape different from (n,N)")
+        if scipy.sparse.issparse(operator):
+            # the cosupports are rows of the operator
+            operator = scipy.sparse.csr_matrix(operator)
+    else:
+        raise ValueError("Wrong operatortype parameter")
+
+    return operator.astype(dtype, copy=False)
+
+
+def sample_cosparse_nullspace(operator, cosupport, random_state=None, block_elements=2**22):
+    """
+    Draw one random signal from the nullspace of the rows of ``operator'' indexed by every column of ``cosupport''.
+
+    Every signal is the orthogonal projection of an i.i.d. gaussian vector z onto the nullspace,
+     i.e. an isotropic gaussian vector in the nullspace:
+
+        x = z - A^T (A A^T)^{-1} A z,  with A = operator[cosupport[:, i], :]
+
+    All the products with the operator are done for all signals at once, and the Gram matrices A A^T are
+     gathered from the Gram matrix of the full operator, computed once. The small cosupport systems of a block of
+     signals are stacked and solved with a single batched call, instead of one QR decomposition per signal.
+    Blocks where some cosupport rows are linearly dependent fall back to a batched QR decomposition.
+
+    Parameters
+    ----------
+    operator : array_like or sparse matrix
+        The operator matrix, size (operator_size x signal_size)
+    cosupport : array_like
+        The cosupports as columns, size (cosparsity x num_data)
+    random_state : int or RandomState instance, optional (default=None)
+        Set random number generator state.
+    block_elements : int, optional (default=2**22)
+        Maximum number of elements of the stacked cosupport matrices processed at once.
+
+    Returns
+    -------
+    data : array_like
+        The signals as columns, size (signal_size x num_data)
+    """
+
+    rng = check_random_state(random_state)
+
+    cosparsity, num_data = cosupport.shape
+    operator_size, signal_size = operator.shape
+    data = rng.randn(signal_size, num_data)
+
+    if cosparsity == 0:
+        return data
+    if cosparsity >= signal_size:
+        # nullspace is {0} (for operators in general position)
+        return numpy.zeros((signal_size, num_data))
+
+    gram = operator.dot(operator.T)
+    if scipy.sparse.issparse(gram):
+        gram = gram.toarray()
+    projections = operator.dot(data)
+
+    # Coefficients of the rows of the operator to subtract from every signal, scattered on the cosupport
+    weights = numpy.zeros((operator_size, num_data))
+
+    blocksize = max(1, block_elements // (cosparsity * max(cosparsity, signal_size)))
+    for start in range(0, num_data, blocksize):
+        stop = min(start + blocksize, num_data)
+        cosupp = cosupport[:, start:stop].T
+        columns = numpy.arange(start, stop)[:, None]
+        rhs = projections[cosupp, columns][:, :, None]
+        try:
+            w = numpy.linalg.solve(gram[cosupp[:, :, None], cosupp[:, None, :]], rhs)
+        except numpy.linalg.LinAlgError:
+            # singular cosupport Gram matrices: use the orthonormal basis of the rows instead
+            rows = operator[cosupp.ravel()]
+            if scipy.sparse.issparse(rows):
+                rows = rows.toarray()
+            Q = numpy.linalg.qr(rows.reshape(cosupp.shape + (signal_size,)).transpose(0, 2, 1))[0]
+            z = data[:, start:stop].T[:, :, None]
+            data[:, start:stop] -= numpy.matmul(Q, numpy.matmul(Q.transpose(0, 2, 1), z))[:, :, 0].T
+            continue
+        weights[cosupp, columns] = w[:, :, 0]
+
+    data -= operator.T.dot(weights)
+    return data
+
+
 def make_cosparse_coded_signal(signal_size, operator_size, cosparsity, num_data, snr_db, operator="tightframe",
-                               random_state=None):
+                               random_state=None, operator_cache=None, dtype=numpy.float64):
     """
     Generate co-sparse coded signals
 
@@ -244,20 +737,26 @@ def make_cosparse_coded_signal(signal_size, operator_size, cosparsity, num_data,
         Number of signals to generate.
     snr_db : float
         Signal to Noise Ratio (dB). Can be numpy.inf for no noise.
-    operator : {'tightframe', 'randn', 'orthonormal', a numpy matrix}, optional (default="tightframe")
+    operator : {'tightframe', 'randn', 'orthonormal', a numpy matrix, a scipy.sparse matrix},
+               optional (default="tightframe")
          The type of operator. Can be one of the following:
         - "tightframe" (default): a random tight frame (tall matrix), with normalized rows
         - "randn": i.i.d. random gaussian entries, atoms (rows) are normalized
         - "orthonormal": a random orthonormal matrix
         - a numpy matrix that will be used as operator matrix
+        - a scipy.sparse matrix that will be used as operator matrix, kept sparse (in CSR format)
     random_state : int or RandomState instance, optional (default=None)
         Set random number generator state.
+    operator_cache : str, optional (default=None)
+        Directory where the generated tight frames are cached, see ``make_tight_frame()''.
+    dtype : numpy dtype, optional (default=numpy.float64)
+        Floating point type of the generated arrays, e.g. numpy.float32 for single precision.
 
     Returns
     -------
     data : array_like
         The cosparse signal(s), as a vector or a (signal_size x num_data) matrix containing the signals as columns.
-    operator : array_like
+    operator : array_like or sparse matrix
         The operator matrix, size (operator_size x signal_size)
     gamma :
         The sparse codes themselves, size (operator_size x num_data)
@@ -267,90 +766,28 @@ def make_cosparse_coded_signal(signal_size, operator_size, cosparsity, num_data,
 
     rng = check_random_state(random_state)
 
-    # Prepare matrices
-    data = numpy.zeros((signal_size, num_data))
-    cosupport = numpy.zeros((cosparsity, num_data), dtype=int)
-    bNonZerosupport = numpy.zeros((operator_size, num_data), dtype=bool)
-    gamma = numpy.zeros((operator_size, num_data))
-
     # Create operator
-    if operator == "randn":
-        # generate random operator and normalize
-        operator = rng.randn(operator_size,signal_size)
-        for i in range(operator.shape[0]):
-            operator[i,:] = operator[i,:] / numpy.linalg.norm(operator[i,:],2)
-    elif operator == "orthonormal":
-        if signal_size != operator_size:
-            raise ValueError("Orthonormal operator has n==N")
-        # generate random square operator and orthonormalize
-        operator = rng.randn(operator_size,signal_size)
-        operator = scipy.linalg.orth(operator)
-    elif operator == "tightframe":
-        # random tight frame with normalized rows
-        # algorithm from Nam's GAP code
-        operator = rng.randn(operator_size,signal_size)
-        T = numpy.zeros((operator_size, signal_size))
-        tol = 1e-8
-        max_j = 200
-        j = 1
-        while (sum(sum(abs(T-operator))) > numpy.dot(tol,numpy.dot(operator_size,signal_size)) and j < max_j):
-            j = j + 1
-            T = operator
-            [U, S, Vh] = numpy.linalg.svd(operator, full_matrices=False)
-            V = Vh.T
-            # U * In*0n * VT
-            #operatortemp = numpy.dot(numpy.dot(U, numpy.concatenate((numpy.eye(signal_size), numpy.zeros((operator_size-signal_size,signal_size))))), V.transpose())
-            operatortemp = numpy.dot(U, V.transpose())
-            #assert(numpy.linalg.norm(operatortemp - operatortemp2) < 1e-16)
-            operator = numpy.dot(numpy.diag(1.0 / numpy.sqrt(numpy.diag(numpy.dot(operatortemp,operatortemp.transpose())))), operatortemp)
-    elif isinstance(operator, numpy.ndarray):
-        # operator is given
-        if operator_size!= operator.shape[0] or signal_size != operator.shape[1]:
-            raise ValueError("Operator shape different from (n,N)")
-        operator = operator
-    else:
-        raise ValueError("Wrong operatortype parameter")
+    operator = _make_operator(signal_size, operator_size, operator, rng, _seeded_cache(random_state, operator_cache),
+                              dtype)
 
     # Generate data from the nullspace of randomly picked l rows
-    for i in range(num_data):
-        cosupport[:,i] = numpy.sort(rng.permutation(operator_size)[:cosparsity])
-
-        # ! SVD is very slow, use QR decomposition instead
-        #[U,D,Vh] = numpy.linalg.svd(operator[cosupport[:,i],:])
-        #V = Vh.T
-        #nullspace = V[:,cosparsity:]
+    cosupport = make_random_support(operator_size, cosparsity, num_data, random_state=rng)
+    data = sample_cosparse_nullspace(operator, cosupport, rng).astype(dtype, copy=False)
 
-        Q, _ = scipy.linalg.qr(operator[cosupport[:,i],:].T)
-        nullspace = Q[:, cosparsity:]
-
-        data[:,i] = numpy.squeeze(numpy.dot(nullspace, rng.randn(signal_size-cosparsity,1)))
-
-        nonzerosupport = numpy.setdiff1d(range(operator_size), cosupport[:,i],True)
-        bNonZerosupport[nonzerosupport,i] = True
-
-    #gamma[nonzerosupport, i] = numpy.dot(operator[nonzerosupport,:], data[:,i])
-    gamma[bNonZerosupport] = numpy.dot(operator, data)[bNonZerosupport]
+    # gamma is the analysis of the data, with the cosupport explicitly set to zero
+    gamma = operator.dot(data)
+    gamma[cosupport, numpy.arange(num_data)] = 0
 
     # Add noise
-    if numpy.isfinite(snr_db):
-        noise = rng.randn(signal_size, num_data)
-        SNR_norm = 10**(snr_db/20.)
-        for i in range(num_data):
-            # Make norm 1
-            noise[:,i] = noise[:,i] / numpy.linalg.norm(noise[:,i])
-            # Make smaller than data by SNR_norm
-            noise[:,i] = noise[:,i] / SNR_norm * numpy.linalg.norm(data[:,i])
-            (numpy.linalg.norm(data[:,i])**2 / numpy.linalg.norm(noise[:,i]))
-    else:
-        noise = 0
     cleardata = data.copy() # no noise data
-    data = data + noise
+    add_noise_snr(data, snr_db, rng, out=data)
 
     return data, operator, gamma, cosupport, cleardata
 
 
 def make_analysis_compressed_sensing_problem(num_measurements, signal_size, operator_size, cosparsity, num_data, snr_db,
-                                             operator="tightframe", acquisition="randn", random_state=None):
+                                             operator="tightframe", acquisition="randn", random_state=None,
+                                             operator_cache=None, dtype=numpy.float64):
     """
     Generate a random analysis compressed sensing problem
 
@@ -368,29 +805,33 @@ def make_analysis_compressed_sensing_problem(num_measurements, signal_size, oper
         Number of signals to generate.
     snr_db : float
         Signal to Noise Ratio (dB). Can be numpy.inf for no noise.
-    operator : {'tightframe', 'randn', 'orthonormal', a numpy matrix}, optional (default="tightframe")
+    operator : {'tightframe', 'randn', 'orthonormal', a numpy matrix, a scipy.sparse matrix},
+               optional (default="tightframe")
          The type of operator. Can be one of the following:
         - "tightframe" (default): a random tight frame (tall matrix), with normalized rows
         - "randn": i.i.d. random gaussian entries, atoms (rows) are normalized
         - "orthonormal": a random orthonormal matrix
         - a numpy matrix that will be used as operator matrix
-    acquisition : {'randn', a numpy matrix}, optional (default="randn")
-         The type of acquisition. Can be one of the following:
-        - "randn" (default): i.i.d. random gaussian entries
-        - a numpy matrix that will be used as acquisition matrix.
+        - a scipy.sparse matrix that will be used as operator matrix, kept sparse (in CSR format)
+    acquisition : {'randn', a numpy matrix, a callable}, optional (default="randn")
+         The type of acquisition, see ``make_acquisition()''.
     random_state : int or RandomState instance, optional (default=None)
         Set random number generator state.
+    operator_cache : str, optional (default=None)
+        Directory where the generated tight frames are cached, see ``make_tight_frame()''.
+    dtype : numpy dtype, optional (default=numpy.float64)
+        Floating point type of the generated arrays, e.g. numpy.float32 for single precision.
 
     Returns
     -------
     measurements : array_like
         The measurement vector/matrix, size (num_measurements x num_data)
-    acqumatrix : array_like
+    acqumatrix : array_like, sparse matrix or LinearOperator
         The acquisition matrix, size (num_measurements x signal_size)
     data : array_like
         The cosparse signal(s), as a vector or a (signal_size x num_data) matrix
          containing the signals as columns.
-    operator : array_like
+    operator : array_like or sparse matrix
         The operator matrix, size (operator_size x signal_size)
     gamma :
         The sparse codes themselves, size (operator_size x num_data)
@@ -400,30 +841,105 @@ def make_analysis_compressed_sensing_problem(num_measurements, signal_size, oper
 
     rng = check_random_state(random_state)
 
-    # generate cosparse coded data
+    # generate cosparse coded data (the operator first, to check the cache with the caller's random_state)
+    operator = _make_operator(signal_size, operator_size, operator, rng, _seeded_cache(random_state, operator_cache),
+                              dtype)
     data, operator, gamma, cosupport, cleardata = make_cosparse_coded_signal(signal_size, operator_size, cosparsity,
-                                                                  num_data, snr_db, operator, random_state=rng)
+                                                                  num_data, snr_db, operator, random_state=rng,
+                                                                  dtype=dtype)
 
     # generate acquisition matrix
-    if acquisition=="randn":
-        acqumatrix = rng.randn(num_measurements, signal_size)
-    elif isinstance(acquisition, numpy.ndarray):
-        # acquisition matrix is given
-        if num_measurements != acquisition.shape[0] or signal_size != acquisition.shape[1]:
-            raise ValueError("Acquisition matrix shape different from (m,n)")
-        acqumatrix = acquisition
-    else:
-        raise ValueError("Unrecognized acquisition matrix type")
+    acqumatrix = make_acquisition(num_measurements, signal_size, acquisition, random_state=rng, dtype=dtype)
 
-    measurements = numpy.dot(acqumatrix, data)
+    measurements = acqumatrix.dot(data).astype(dtype, copy=False)
 
     # TODO: add noise
 
     return measurements, acqumatrix, data, operator, gamma, cosupport, cleardata
 
 
+def _iter_batches(num_data, batch_size):
+    """
+    Sizes of the successive batches of a stream of ``num_data'' signals (infinite stream if ``num_data'' is None).
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be positive")
+    generated = 0
+    while num_data is None or generated < num_data:
+        size = batch_size if num_data is None else min(batch_size, num_data - generated)
+        generated += size
+        yield size
+
+
+def make_compressed_sensing_problem_batches(num_measurements, signal_size, dict_size, sparsity, num_data, batch_size,
+                                            snr_db_sparse, snr_db_signal, snr_db_meas, dictionary="randn",
+                                            acquisition="randn", random_state=None, dtype=numpy.float64):
+    """
+    Generate a stream of random compressed sensing problems, in batches, sharing the same dictionary and
+     acquisition matrix.
+
+    The dictionary and the acquisition matrix are generated first, and then every batch is generated as with
+     ``make_compressed_sensing_problem()''. Only one batch of signals is in memory at a time, and the whole stream
+     is reproducible from ``random_state'' (for a given ``batch_size'').
+
+    Parameters
+    ----------
+    num_data : int or None
+        Total number of signals to generate. If None, the stream is infinite.
+    batch_size : int
+        Number of signals in every batch (the last batch may be smaller).
+
+    For the other parameters, see ``make_compressed_sensing_problem()''.
+
+    Returns
+    -------
+    A generator of tuples (measurements, acqumatrix, data, dictionary, gamma, support, cleardata), one per batch,
+     as returned by ``make_compressed_sensing_problem()''.
+    """
+
+    rng = check_random_state(random_state)
+
+    dictionary = make_dictionary(signal_size, dict_size, dictionary, random_state=rng, dtype=dtype)
+    acqumatrix = make_acquisition(num_measurements, signal_size, acquisition, random_state=rng, dtype=dtype)
 
+    for size in _iter_batches(num_data, batch_size):
+        yield make_compressed_sensing_problem(num_measurements, signal_size, dict_size, sparsity, size, snr_db_sparse,
+                                              snr_db_signal, snr_db_meas, dictionary, acqumatrix, random_state=rng,
+                                              dtype=dtype)
 
 
+def make_analysis_compressed_sensing_problem_batches(num_measurements, signal_size, operator_size, cosparsity, num_data,
+                                                     batch_size, snr_db, operator="tightframe", acquisition="randn",
+                                                     random_state=None, operator_cache=None, dtype=numpy.float64):
+    """
+    Generate a stream of random analysis compressed sensing problems, in batches, sharing the same operator and
+     acquisition matrix.
+
+    The operator and the acquisition matrix are generated first, and then every batch is generated as with
+     ``make_analysis_compressed_sensing_problem()''. Only one batch of signals is in memory at a time, and the whole
+     stream is reproducible from ``random_state'' (for a given ``batch_size'').
+
+    Parameters
+    ----------
+    num_data : int or None
+        Total number of signals to generate. If None, the stream is infinite.
+    batch_size : int
+        Number of signals in every batch (the last batch may be smaller).
+
+    For the other parameters, see ``make_analysis_compressed_sensing_problem()''.
+
+    Returns
+    -------
+    A generator of tuples (measurements, acqumatrix, data, operator, gamma, cosupport, cleardata), one per batch,
+     as returned by ``make_analysis_compressed_sensing_problem()''.
+    """
+
+    rng = check_random_state(random_state)
 
+    operator = _make_operator(signal_size, operator_size, operator, rng, _seeded_cache(random_state, operator_cache),
+                              dtype)
+    acqumatrix = make_acquisition(num_measurements, signal_size, acquisition, random_state=rng, dtype=dtype)
 
+    for size in _iter_batches(num_data, batch_size):
+        yield make_analysis_compressed_sensing_problem(num_measurements, signal_size, operator_size, cosparsity, size,
+                                                       snr_db, operator, acqumatrix, random_state=rng, dtype=dtype)
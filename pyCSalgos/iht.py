@@ -13,6 +13,7 @@ import numpy as np
 import scipy
 
 from .base import SparseSolver
+from .utils import solution_dtype, dense_columns, matrix_norm, matvec, rmatvec
 
 import warnings
 
@@ -37,17 +38,24 @@ class IterativeHardThresholding(SparseSolver):
         self.sparsity = sparsity
         self.debias = debias
 
+    def uses_realdict(self):
+        return self.sparsity == "real" or self.debias == "real"
+
     def __str__(self):
         return "IHT (" + str(self.mu) + "," + str(self.stoptol) + " | " + str(self.maxiter) + " | " +  str(self.sparsity) + ")"
 
     def solve(self, data_orig, dictionary_orig, realdict=None):
 
         # DEBUG:
-        norm = np.linalg.norm(dictionary_orig, 2)
+        norm = matrix_norm(dictionary_orig, 2)
         # use more than the l2 norm here, to ensure stability => use frobenius norm
         #norm = np.linalg.norm(dictionary_orig, 'fro')
         #norm = 1. / np.sqrt(data_orig.shape[0])
-        dictionary = dictionary_orig.copy() / norm
+        if isinstance(dictionary_orig, np.memmap):
+            # out-of-core dictionary: don't copy it, scale the products instead
+            dictionary, scale = dictionary_orig, norm
+        else:
+            dictionary, scale = dictionary_orig.copy() / norm, 1.
         data = data_orig.copy() / norm
 
         # Force data 2D
@@ -58,7 +66,7 @@ class IterativeHardThresholding(SparseSolver):
 
         N = dictionary.shape[1]
         Ndata = data.shape[1]
-        coef = np.zeros((N, Ndata))
+        coef = np.zeros((N, Ndata), dtype=solution_dtype(data, dictionary))
 
         for i in range(Ndata):
             if self.sparsity == "real":
@@ -77,7 +85,7 @@ class IterativeHardThresholding(SparseSolver):
             else:
                 M = self.sparsity  #TODO check type
 
-            coef[:, i] = _iht(dictionary, data[:, i], sparsity=M, mu=self.mu, errortol=self.stoptol, deltatol=self.deltatol, maxiter=self.maxiter)
+            coef[:, i] = _iht(dictionary, data[:, i], sparsity=M, mu=self.mu, errortol=self.stoptol, deltatol=self.deltatol, maxiter=self.maxiter, scale=scale)
 
             # Debias
             if self.debias == True:
@@ -111,7 +119,7 @@ class IterativeHardThresholding(SparseSolver):
                 gamma2 = np.zeros_like(coef[:,i])
                 #gamma2[supp] = np.dot( np.linalg.pinv(dictionary[:, supp]) , data[:, i])
                 #gamma2[~supp] = 0
-                gamma2[supp] = scipy.linalg.lstsq(dictionary[:,supp], data[:, i])[0]
+                gamma2[supp] = scipy.linalg.lstsq(dense_columns(dictionary, supp) / scale, data[:, i])[0]
                 # Rule of thumb check is debiasing went ok: if very different
                 #  from original gamma, debiasing is likely to have gone bad
                 #if np.linalg.norm(coef[:,i] - gamma2) < 2 * np.linalg.norm(coef[:,i]):
@@ -123,7 +131,7 @@ class IterativeHardThresholding(SparseSolver):
         return coef
 
 
-def _iht(dictionary, measurements, sparsity=None, mu=0, deltatol=1e-10, errortol=0, maxiter=500, algorithm="accelerated"):
+def _iht(dictionary, measurements, sparsity=None, mu=0, deltatol=1e-10, errortol=0, maxiter=500, algorithm="accelerated", scale=1.):
     # x   Observation vector to be decomposed
     #               P   Either:
     #                       1) An nxm matrix (n must be dimension of x)
@@ -139,6 +147,8 @@ def _iht(dictionary, measurements, sparsity=None, mu=0, deltatol=1e-10, errortol
     #   Possible additional options:
     #   (specify as many as you want using 'option_name','option_value' pairs)
     #   See below for explanation of options:
+    #
+    #   Nic: the dictionary is used divided by ``scale'' (so that a memory-mapped dictionary needs no scaled copy)
 
     n = measurements.shape[0]
     m = dictionary.shape[1]
@@ -164,8 +174,9 @@ def _iht(dictionary, measurements, sparsity=None, mu=0, deltatol=1e-10, errortol
     else:
         #P =@(z) A*z;
         #Pt =@(z) A'*z;
-        P = lambda z: np.dot(dictionary, z)
-        Pt = lambda z: np.dot(dictionary.T, z)
+        # numpy, scipy.sparse or memory-mapped matrix (read in blocks)
+        P = lambda z: matvec(dictionary, z) / scale
+        Pt = lambda z: rmatvec(dictionary, z) / scale
 
     s_initial = np.zeros(m)
     Residual = measurements.copy()
@@ -419,7 +430,7 @@ def _iht(dictionary, measurements, sparsity=None, mu=0, deltatol=1e-10, errortol
         if gap < deltatol or iter >= maxiter:
             done = 1
         # Nic:
-        relerror = np.linalg.norm(measurements - np.dot(dictionary, s), 2) / np.linalg.norm(measurements)
+        relerror = np.linalg.norm(measurements - P(s), 2) / np.linalg.norm(measurements)
         if relerror < errortol:
             done = 1
 
@@ -10,10 +10,9 @@ Provides l1 minimization from l1magic toolbox
 import math
 import scipy
 import numpy as np
-import cvxopt
-import cvxopt.solvers
 
 from .base import SparseSolver
+from .utils import solution_dtype
 
 
 class L1Min(SparseSolver):
@@ -45,6 +44,11 @@ def _l1min(data, dictionary, stopval, algorithm):
         if data.shape[0] < data.shape[1]:
             data = np.transpose(data)
 
+    # The interior point methods need double precision: solve in float64, return in the precision of the problem
+    out_dtype = solution_dtype(data, dictionary)
+    data = np.asarray(data, dtype=np.float64)
+    dictionary = np.asarray(dictionary, dtype=np.float64)
+
     N = dictionary.shape[1]
     Ndata = data.shape[1]
     coef = np.zeros((N, Ndata))
@@ -68,7 +72,7 @@ def _l1min(data, dictionary, stopval, algorithm):
 
     else:
         raise ValueError("Algorithm '%s' does not exist", algorithm)
-    return coef
+    return coef.astype(out_dtype, copy=False)
 
 
 class l1NotImplementedError(Exception):
@@ -533,6 +537,9 @@ def l1qc_logbarrier(x0, A, At, b, epsilon, lbtol=1e-3, mu=10, cgtol=1e-8, cgmaxi
 
 
 def cvxopt_lp(y, A):
+    # cvxopt is imported only here, since it is slow to import and optional
+    import cvxopt
+    import cvxopt.solvers
 
     N = A.shape[1]
     AA = np.hstack((A, -A))
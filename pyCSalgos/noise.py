@@ -0,0 +1,62 @@
+"""
+noise.py
+
+Adding noise with a given Signal to Noise Ratio
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import numpy
+from sklearn.utils import check_random_state
+
+from .utils import solution_dtype
+
+
+def add_noise_snr(data, snr_db, rng=None, out=None):
+    """
+    Add gaussian noise over some data, with a given Signal to Noise Ratio for every signal (column).
+
+    The noise is scaled for all the signals at once, from the norms of the columns of the data and of the noise,
+     each computed in a single pass without temporary arrays.
+
+    Parameters
+    ----------
+    data : array_like
+        The data, a vector or a matrix containing the signals as columns.
+    snr_db : float
+        Signal to Noise Ratio (dB). Can be numpy.inf for no noise.
+    rng : int or RandomState instance, optional (default=None)
+        Set random number generator state.
+    out : array_like, optional (default=None)
+        Array with the shape of ``data'' where the noisy data is written. Can be ``data'' itself, to add the noise
+         in place. If None, a new array is allocated, with the dtype of ``data'' (float64 for integer data).
+
+    Returns
+    -------
+    out : array_like
+        The noisy data
+    """
+
+    data = numpy.asarray(data)
+    if out is None:
+        out = numpy.empty_like(data, dtype=solution_dtype(data))
+    elif out.shape != data.shape:
+        raise ValueError("Output array shape different from data shape")
+
+    if not numpy.isfinite(snr_db):
+        if out is not data:
+            out[...] = data
+        return out
+
+    rng = check_random_state(rng)
+    noise = rng.randn(*data.shape)
+
+    # Make noise norm smaller than data norm by SNR_norm, for every column
+    SNR_norm = 10**(snr_db/20.)
+    data_norm = numpy.sqrt(numpy.einsum('i...,i...->...', data, data))
+    noise_norm = numpy.sqrt(numpy.einsum('i...,i...->...', noise, noise))
+    noise *= data_norm / (noise_norm * SNR_norm)
+
+    numpy.add(data, noise, out=out)
+    return out
@@ -9,19 +9,24 @@ Provides Orthogonal Matching Pursuit (OMP)
 
 from .base import SparseSolver, ERCcheckMixin
 
-try:
-    import sklearn.linear_model
-    has_sklearn_omp = True
-except ImportError as e:
-    has_sklearn_omp = False
+import importlib.util
 
-#import omp_sklearn_local
-from . import omp_sklearn_local
+# sklearn.linear_model is slow to import, so only check here if it exists and import it when needed
+has_sklearn_omp = importlib.util.find_spec("sklearn") is not None
 
+import hashlib
+import json
+import os
+import tempfile
 import time
 import math
+import multiprocessing.pool
 import numpy as np
 import scipy
+import scipy.sparse
+
+from .utils import solution_dtype, dense_columns, matvec, rmatvec
+from .acquisition import as_dense, effective_dictionary
 
 class OrthogonalMatchingPursuit(ERCcheckMixin, SparseSolver):
     """
@@ -43,7 +48,12 @@ class OrthogonalMatchingPursuit(ERCcheckMixin, SparseSolver):
 
     Attention: compressed sensing problems shouldn't use sklearn's OMP because it assumes that the dictionary
      is normalized, which is not the case with the effective dictionary P*D
-     Better use "sparsify_QR" instead.
+     Better use "sparsify_QR" instead, or "auto" to pick the fastest implementation with the same results
+     as "sparsify_QR" (see select_omp_algorithm()).
+
+    stopval is the number of atoms (>= 1), an error tolerance (< 1), or "real" for the real number of atoms of every
+     signal, taken from the real data given to solve(). With "real", a single OMP path up to the largest sparsity
+     is computed for all the signals (see omp_path()), and the algorithm parameter is not used.
     """
 
     # All parameters related to the algorithm itself are given here.
@@ -51,10 +61,11 @@ class OrthogonalMatchingPursuit(ERCcheckMixin, SparseSolver):
     def __init__(self, stopval, algorithm="sklearn"):
 
         # parameter check
-        if stopval < 0:
+        if stopval == "real":
+            self.stopcrit = StopCriterion.REAL
+        elif stopval < 0:
             raise ValueError("stopping value is negative")
-
-        if stopval < 1:
+        elif stopval < 1:
             self.stopcrit = StopCriterion.TOL
         else:
             self.stopcrit = StopCriterion.FIXED
@@ -64,34 +75,71 @@ class OrthogonalMatchingPursuit(ERCcheckMixin, SparseSolver):
     def __str__(self):
         return "OMP ("+str(self.stopval)+", "+str(self.algorithm)+")"
 
+    def uses_realdict(self):
+        return self.stopcrit == StopCriterion.REAL
+
     def solve(self, data, dictionary, realdict=None):
+        if self.stopcrit == StopCriterion.REAL:
+            return _real_sparsity_orthogonal_matching_pursuit(data, dictionary, realdict)
         return _orthogonal_matching_pursuit(data, dictionary, self.stopval, self.algorithm)
 
+    def solve_path(self, data, dictionary, kmax=None):
+        """
+        Runs OMP once and returns the whole greedy path, from which the solutions of all sparsity levels
+         k <= kmax are obtained (see OMPPath). The path stops earlier if the error tolerance is reached.
+
+        :param data: The data vector or matrix, with signals as columns
+        :param dictionary: The dictionary, with columnwise atoms
+        :param kmax: Maximum number of atoms. Defaults to stopval for a fixed number of atoms, or to
+         min(signal size, dictionary size) with an error tolerance or with "real"
+        :return: An OMPPath object
+        """
+        if self.stopcrit == StopCriterion.FIXED:
+            return omp_path(data, dictionary, self.stopval if kmax is None else kmax)
+        if self.stopcrit == StopCriterion.REAL:
+            return omp_path(data, dictionary, min(dictionary.shape) if kmax is None else kmax)
+        return omp_path(data, dictionary, min(dictionary.shape) if kmax is None else kmax, self.stopval)
+
     def checkERC(self, acqumatrix, dictoper, support):
 
-        D = np.dot(acqumatrix, dictoper)
+        D = as_dense(effective_dictionary(acqumatrix, dictoper))
+        return omp_erc(D, support)
 
-        # Should normalize here the dictionary or not?
-        for i in range(D.shape[1]):
-            D[:,i] = D[:,i] / np.linalg.norm((D[:,i],2))
 
-        dict_size = dictoper.shape[1]
-        k = support.shape[0]
-        num_data = support.shape[1]
-        results = np.zeros(num_data, dtype=bool)
+class SimultaneousOrthogonalMatchingPursuit(SparseSolver):
+    """
+    Performs joint sparse coding via Simultaneous Orthogonal Matching Pursuit (SOMP), for multiple measurement
+     vectors which share the same support.
 
-        for i in range(num_data):
-            T = support[:,i]
-            Tc = np.setdiff1d(range(dict_size), T)
-            A = np.dot(D[:,Tc].T, np.linalg.pinv(D[:,T].T))
-            assert(A.shape == (dict_size-k, k))
+    The signals come in groups of ``group_size'' consecutive columns of the data (as generated by
+     make_joint_sparse_compressed_sensing_problem()). For every group, each iteration selects the atom with the
+     largest correlation energy over all the signals of the group, and a single least-squares problem with
+     multiple right-hand sides is solved, with the Gram-based QR-OMP of omp_sturm_omp_qr_gram().
 
-            linf = np.max(np.sum(np.abs(A),1))
-            if linf < 1:
-                results[i] = True
-            else:
-                results[i] = False
-        return results
+    stopval is either the number of atoms (>= 1) or an error tolerance (< 1): stop when the squared Frobenius norm of
+     the residual of a group is below stopval times the squared Frobenius norm of the group.
+    """
+
+    def __init__(self, stopval, group_size):
+
+        # parameter check
+        if stopval < 0:
+            raise ValueError("stopping value is negative")
+        if group_size < 1:
+            raise ValueError("group size must be at least 1")
+
+        if stopval < 1:
+            self.stopcrit = StopCriterion.TOL
+        else:
+            self.stopcrit = StopCriterion.FIXED
+        self.stopval = stopval
+        self.group_size = group_size
+
+    def __str__(self):
+        return "SOMP ("+str(self.stopval)+", "+str(self.group_size)+")"
+
+    def solve(self, data, dictionary, realdict=None):
+        return _simultaneous_orthogonal_matching_pursuit(data, dictionary, self.stopval, self.group_size)
 
 
 class StopCriterion:
@@ -99,25 +147,70 @@ class StopCriterion:
     Stopping criterion type:
         StopCriterion.FIXED:    fixed number of iterations
         StopCriterion.TOL:      until approximation error is below tolerance
+        StopCriterion.REAL:     real number of atoms of every signal
     """
     FIXED = 1
     TOL   = 2
+    REAL  = 3
+
+
+def _real_sparsity_orthogonal_matching_pursuit(data, dictionary, realdict):
+    """
+    OMP with the real number of atoms of every signal, from a single OMP path up to the largest one
+
+    :param data: 2D array containing the data to decompose, columnwise
+    :param dictionary: dictionary containing the atoms, columnwise
+    :param realdict: real data information, with the real decompositions ('gamma') or the real support ('support')
+    :return: coefficients
+    """
+    data = np.asarray(data).reshape(dictionary.shape[0], -1)
+    if realdict is not None and realdict.get('gamma') is not None:
+        ks = np.count_nonzero(np.asarray(realdict['gamma']).reshape(-1, data.shape[1]), axis=0)
+    elif realdict is not None and realdict.get('support') is not None:
+        ks = np.full(data.shape[1], realdict['support'].shape[0])
+    else:
+        raise ValueError('OMP Error: stopping value set to "real" but no real decomposition or support given')
+    ks = np.minimum(ks, min(dictionary.shape))
+
+    coef = np.zeros((dictionary.shape[1], data.shape[1]), dtype=solution_dtype(data, dictionary))
+    if ks.max() == 0:
+        return coef
+    path = omp_path(data, dictionary, ks.max())
+    for i in range(data.shape[1]):
+        s = min(ks[i], path.nsteps[i])
+        if s > 0:
+            coef[path.support[0:s,i],i] = scipy.linalg.solve_triangular(path.R[i,0:s,0:s], path.z[0:s,i])
+    return coef
 
 
 def _orthogonal_matching_pursuit(data, dictionary, stopval, algorithm="sklearn"):
     """
     Orthogonal Matching Pursuit algorihtm
     :param data: 2D array containing the data to decompose, columnwise
-    :param dictionary: dictionary containing the atoms, columnwise
+    :param dictionary: dictionary containing the atoms, columnwise (numpy or scipy.sparse matrix)
     :param stopval: stopping criterion
     :param algorithm: what implementation to use
     :return: coefficients
 
     Available implementations:
-      "sklearn" (default)
-      "sklearn_local"
-      "sparsify_QR"
-      "sturm_QR"
+      "sklearn" (default): scikit-learn's orthogonal_mp(), or "sklearn_local" if scikit-learn is not available
+      "sklearn_local": OMP core with Cholesky updates, with the stopping criterion of scikit-learn
+      "gram": OMP core, QR updates through the Gram matrix (GramQRUpdate)
+      "cholesky": OMP core, Cholesky updates through the Gram matrix (GramCholeskyUpdate)
+      "qr": OMP core, explicit QR without the Gram matrix (QRUpdate)
+      "sparsify_QR": QR-based OMP ported from the sparsify toolbox (see omp_sparsify_greed_omp_qr())
+      "sturm_QR": QR-based OMP by Bob Sturm, with an m x m projector (see omp_sturm_omp_qr())
+      "sturm_QR_gram": OMP core "gram", with the stopping criterion of "sturm_QR"
+      "batch": Batch-OMP, all signals at once (see omp_batch())
+      "auto": the fastest of the above with the same results as "sparsify_QR", for the problem size,
+        according to built-in rules or to a benchmark of the local machine (see select_omp_algorithm())
+
+    With stopval < 1 (error tolerance), the algorithms stop when:
+      "sklearn", "sklearn_local": ||r||^2 <= stopval
+      "gram", "cholesky", "qr", "sparsify_QR", "batch", "auto": ||r|| <= stopval * ||x||
+      "sturm_QR", "sturm_QR_gram": ||r||^2 <= stopval * ||x||^2
+    The implementations other than "sklearn" use sparse products with a scipy.sparse dictionary.
+    See profilings/profile_omp.py for a comparison of their speed.
     """
 
     # parameter check
@@ -128,7 +221,20 @@ def _orthogonal_matching_pursuit(data, dictionary, stopval, algorithm="sklearn")
     if stopval > dictionary.shape[1]:
         raise ValueError("stopping value > dictionary size")
 
+    if algorithm == "auto":
+        algorithm = select_omp_algorithm(data, dictionary, stopval)
+    vector = len(data.shape) == 1
+
+    if scipy.sparse.issparse(dictionary):
+        if algorithm == "sklearn" and has_sklearn_omp:
+            # needs the dense dictionary
+            dictionary = dictionary.toarray()
+        else:
+            # atoms (columns) are accessed one at a time
+            dictionary = scipy.sparse.csc_matrix(dictionary)
+
     if algorithm == "sklearn" and has_sklearn_omp:
+        import sklearn.linear_model
         if stopval < 1:
             # Stop criterion = tolerance
             return sklearn.linear_model.orthogonal_mp(X=dictionary, y=data, tol=stopval)
@@ -136,14 +242,22 @@ def _orthogonal_matching_pursuit(data, dictionary, stopval, algorithm="sklearn")
             # Stop criterion = No. of nonzero elements
             return sklearn.linear_model.orthogonal_mp(X=dictionary, y=data, n_nonzero_coefs=stopval)
 
-    if (algorithm == "sklearn" and not has_sklearn_omp) or algorithm == "sklearn_local":
-        #call local version of sklearn OMP
-        if stopval < 1:
-            # Stop criterion = tolerance
-            return omp_sklearn_local.orthogonal_mp(X=dictionary, y=data, tol=stopval)
+    if algorithm in ["sklearn", "sklearn_local", "gram", "cholesky", "qr", "sturm_QR_gram"]:
+        # OMP core: maximum number of atoms and residual energy threshold of every signal
+        if stopval >= 1:
+            natom, energytol = stopval, 0
         else:
-            # Stop criterion = No. of nonzero elements
-            return omp_sklearn_local.orthogonal_mp(X=dictionary, y=data, n_nonzero_coefs=stopval)
+            natom = min(dictionary.shape)
+            energy = np.einsum('i...,i...->...', data, data)
+            if algorithm in ["sklearn", "sklearn_local"]:
+                energytol = stopval
+            elif algorithm == "sturm_QR_gram":
+                energytol = stopval * energy
+            else:
+                energytol = stopval**2 * energy
+        update = {"sklearn": "cholesky", "sklearn_local": "cholesky", "sturm_QR_gram": "gram"}.get(algorithm, algorithm)
+        minatom = 1 if algorithm in ["sklearn", "sklearn_local"] else 0
+        return omp_core(data, dictionary, natom, energytol, update, minatom=minatom)
 
     if algorithm == "sparsify_QR":
         # call QR-based omp from sparsify package
@@ -160,13 +274,14 @@ def _orthogonal_matching_pursuit(data, dictionary, stopval, algorithm="sklearn")
             data = np.atleast_2d(data)
             if data.shape[0] < data.shape[1]:
                 data = np.transpose(data)
-        coef = np.zeros((dictionary.shape[1], data.shape[1]))
+        coef = np.zeros((dictionary.shape[1], data.shape[1]), dtype=solution_dtype(data, dictionary))
         for i in range(data.shape[1]):
             if ompopts["stopCrit"] == "mse":
                 # convert error tolerance to match what OMP expects
                 ompopts["stopTol"] = (np.linalg.norm(data[:,i],2) * stopval)**2 / data.shape[0]
             coef[:,i] = omp_sparsify_greed_omp_qr(data[:,i], dictionary, dictionary.shape[1], ompopts)
-        return coef
+        # a single vector gives a single vector, as with the other algorithms
+        return coef[:,0] if vector else coef
 
     if algorithm == "sturm_QR":
         # call QR-based OMP by Bob Sturm
@@ -174,17 +289,374 @@ def _orthogonal_matching_pursuit(data, dictionary, stopval, algorithm="sklearn")
             data = np.atleast_2d(data)
             if data.shape[0] < data.shape[1]:
                 data = np.transpose(data)
-        coef = np.zeros((dictionary.shape[1], data.shape[1]))
+        coef = np.zeros((dictionary.shape[1], data.shape[1]), dtype=solution_dtype(data, dictionary))
+        # The Gram matrix is the same for all signals, compute only once
+        gram = dictionary.T.dot(dictionary)
+        if scipy.sparse.issparse(gram):
+            gram = gram.toarray()
         for i in range(data.shape[1]):
             if stopval < 1:
-                coef[:,i], support = omp_sturm_omp_qr(data[:,i], dictionary, np.dot(dictionary.T, dictionary), data.shape[0], stopval)
+                coef[:,i], support = omp_sturm_omp_qr(data[:,i], dictionary, gram, data.shape[0], stopval)
             else:
-                coef[:,i], support = omp_sturm_omp_qr(data[:,i], dictionary, np.dot(dictionary.T, dictionary), stopval, 0)
-        return coef
+                coef[:,i], support = omp_sturm_omp_qr(data[:,i], dictionary, gram, stopval, 0)
+        return coef[:,0] if vector else coef
+
+    if algorithm == "batch":
+        return omp_batch(data, dictionary, stopval)
 
     raise ValueError("Algorithm '%s' does not exist", algorithm)
 
 
+# Candidates of algorithm="auto": the implementations with the same results as "sparsify_QR", also for zero signals
+# and signals with a tiny amplitude. "sklearn" is not one: its absolute thresholds change the support of such signals.
+omp_auto_algorithms = ["gram", "cholesky", "qr", "sparsify_QR", "batch"]
+
+# Problem sizes benchmarked by calibrate_omp(): signal size, dictionary size, number of atoms, number of signals
+omp_calibration_sizes = [(32, 64, 4, 1), (32, 64, 4, 200),
+                         (128, 512, 16, 1), (128, 512, 16, 50),
+                         (512, 2048, 64, 1), (512, 2048, 64, 5)]
+
+# Where the calibration of algorithm="auto" is stored by calibrate_omp()
+omp_calibration_file = os.path.join(os.path.expanduser("~"), ".pyCSalgos", "omp_calibration.json")
+
+# Calibrations already loaded, by file name (None if the file does not exist)
+_omp_calibrations = {}
+
+# Without a calibration, "batch" is used from this number of signals, "sparsify_QR" below
+# (see profilings/profile_omp.py)
+omp_auto_batch_signals = 4
+
+
+def calibrate_omp(filename=None, sizes=None, repeat=3, random_state=47):
+    """
+    Times the candidate implementations of algorithm="auto" on random problems with normalized gaussian
+     dictionaries, and stores the results in a JSON file used by select_omp_algorithm().
+    Never runs automatically: without a calibration file, algorithm="auto" uses built-in rules.
+
+    :param filename: The calibration file, defaults to omp_calibration_file
+    :param sizes: List of (signal size, dictionary size, number of atoms, number of signals),
+     defaults to omp_calibration_sizes
+    :param repeat: Every time is the best of this number of runs
+    :param random_state: Seed of the random problems
+    :return: The calibration, as a dictionary
+    """
+    if filename is None:
+        filename = omp_calibration_file
+    if sizes is None:
+        sizes = omp_calibration_sizes
+    algorithms = omp_auto_algorithms
+    rng = np.random.RandomState(random_state)
+
+    entries = []
+    for m, N, k, numdata in sizes:
+        dictionary = rng.randn(m, N)
+        dictionary /= np.linalg.norm(dictionary, axis=0)
+        coef = np.zeros((N, numdata))
+        for i in range(numdata):
+            coef[rng.permutation(N)[:k], i] = rng.randn(k)
+        data = np.dot(dictionary, coef)
+
+        times = {}
+        for algorithm in algorithms:
+            times[algorithm] = np.inf
+            for _ in range(repeat):
+                t = time.time()
+                _orthogonal_matching_pursuit(data, dictionary, k, algorithm)
+                times[algorithm] = min(times[algorithm], time.time() - t)
+        entries.append({"m": m, "N": N, "k": k, "numdata": numdata, "times": times})
+    calibration = {"entries": entries}
+
+    # write to a temporary file and rename, so that concurrent processes never read a partial file
+    dirname = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(suffix=".json", dir=dirname)
+    with os.fdopen(fd, "w") as f:
+        json.dump(calibration, f, indent=1)
+    os.replace(tmpname, filename)
+
+    _omp_calibrations[filename] = calibration
+    return calibration
+
+
+def load_omp_calibration(filename=None):
+    """
+    Returns the calibration of algorithm="auto" stored in a file by calibrate_omp().
+
+    :param filename: The calibration file, defaults to omp_calibration_file
+    :return: The calibration, as a dictionary, or None if the file does not exist
+    """
+    if filename is None:
+        filename = omp_calibration_file
+    if filename not in _omp_calibrations:
+        calibration = None
+        if os.path.isfile(filename):
+            with open(filename) as f:
+                calibration = json.load(f)
+        _omp_calibrations[filename] = calibration
+    return _omp_calibrations[filename]
+
+
+def select_omp_algorithm(data, dictionary, stopval, calibration=None):
+    """
+    Picks the implementation used by algorithm="auto": the fastest candidate on the calibrated problem size
+     nearest to this one (on a logarithmic scale of the signal size, dictionary size, number of atoms and number of
+     signals). With an error tolerance the number of atoms is not known in advance, and 1/8 of the signal size is
+     assumed, as in the calibration.
+    Without a calibration (see calibrate_omp()), "batch" is used from omp_auto_batch_signals signals and
+     "sparsify_QR" for fewer signals.
+
+    :param data: The data vector or matrix, with signals as columns
+    :param dictionary: The dictionary, with columnwise atoms
+    :param stopval: The stopping value of OrthogonalMatchingPursuit
+    :param calibration: The calibration, defaults to load_omp_calibration()
+    :return: The algorithm name
+    """
+    if calibration is None:
+        calibration = load_omp_calibration()
+
+    m, N = dictionary.shape
+    numdata = 1 if data.ndim == 1 else data.shape[1]
+    if calibration is None:
+        return "batch" if numdata >= omp_auto_batch_signals else "sparsify_QR"
+    natom = stopval if stopval >= 1 else max(1, m // 8)
+
+    size = np.log([m, N, natom, numdata])
+    nearest = min(calibration["entries"],
+                  key=lambda entry: np.sum((np.log([entry["m"], entry["N"], entry["k"], entry["numdata"]]) - size)**2))
+    times = nearest["times"]
+    candidates = [algorithm for algorithm in omp_auto_algorithms if algorithm in times]
+    if not candidates:
+        raise ValueError("The OMP calibration has no timings of the candidate algorithms")
+    return min(candidates, key=times.get)
+
+
+def _simultaneous_orthogonal_matching_pursuit(data, dictionary, stopval, group_size):
+    """
+    Simultaneous Orthogonal Matching Pursuit algorithm
+    :param data: 2D array containing the data to decompose, columnwise, in groups of group_size consecutive columns
+    :param dictionary: dictionary containing the atoms, columnwise (numpy, scipy.sparse or memory-mapped matrix)
+    :param stopval: stopping criterion
+    :param group_size: number of signals sharing the same support
+    :return: coefficients
+    """
+
+    # parameter check
+    if stopval < 0:
+        raise ValueError("stopping value is negative")
+    if stopval > dictionary.shape[0]:
+        raise ValueError("stopping value > signal size")
+    if stopval > dictionary.shape[1]:
+        raise ValueError("stopping value > dictionary size")
+
+    data = data.reshape(data.shape[0], -1)
+    if data.shape[1] % group_size != 0:
+        raise ValueError("number of signals is not a multiple of the group size")
+
+    if stopval < 1:
+        natom, tolerance = min(dictionary.shape), stopval
+    else:
+        natom, tolerance = stopval, 0
+
+    coef = np.zeros((dictionary.shape[1], data.shape[1]), dtype=solution_dtype(data, dictionary))
+    gram = dictionary.T.dot(dictionary)
+    if scipy.sparse.issparse(gram):
+        gram = gram.toarray()
+    projections = rmatvec(dictionary, data)
+    for start in range(0, data.shape[1], group_size):
+        cols = slice(start, start + group_size)
+        coef[:,cols] = omp_sturm_omp_qr_gram(projections[:,cols], np.vdot(data[:,cols], data[:,cols]), gram,
+                                             natom, tolerance)
+    return coef
+
+
+# ERC results of omp_erc() for the last checked dictionary: its hash, and the result of every support checked
+_omp_erc_cache = {"dictionary": None, "results": {}}
+
+
+def omp_erc(dictionary, support, block_elements=2**22, processes=1, cache=True):
+    """
+    Exact Recovery Condition of OMP (J. A. Tropp, "Greed is good", 2004) for many supports at once:
+     max_{j not in T} || pinv(D_T) d_j ||_1 < 1, with the atoms of the dictionary normalized.
+
+    With the Gram matrix G of the normalized dictionary, pinv(D_T) d_j = G_TT^-1 G_Tj, so every support needs only
+     the Cholesky factorization of the k x k submatrix G_TT and solves with the k x N rows G_T. The supports are
+     processed in blocks of stacked (batched) factorizations and solves, possibly in parallel threads (the batched
+     LAPACK calls release the GIL, and threads also work inside the worker processes of a phase transition).
+
+    Identical supports are checked once. With cache=True, the results are also kept for the last dictionary,
+     so checking it again (e.g. for several OMP solvers of a phase transition) only checks the new supports.
+    An empty support (k = 0) always satisfies the condition.
+
+    :param dictionary: The dictionary (dense)
+    :param support: The supports to check, as columns (k x num_data)
+    :param block_elements: Maximum number of elements of the k x N solves done at once
+    :param processes: Number of threads checking the blocks of supports
+    :param cache: Reuse and keep the results of the last checked dictionary
+    :return: A boolean vector, True where ERC holds
+    """
+    support = np.asarray(support, dtype=int)
+    if support.ndim == 1:
+        support = support[:, None]
+    support = np.sort(support, axis=0)
+    k, num_data = support.shape
+    if k == 0:
+        return np.ones(num_data, dtype=bool)
+    unique, inverse = np.unique(support, axis=1, return_inverse=True)
+    inverse = inverse.ravel()
+
+    results = {}
+    if cache:
+        key = hashlib.sha1(np.ascontiguousarray(dictionary)).hexdigest() + str(dictionary.shape)
+        if _omp_erc_cache["dictionary"] != key:
+            _omp_erc_cache["dictionary"] = key
+            _omp_erc_cache["results"] = {}
+        results = _omp_erc_cache["results"]
+    erc = np.array([results.get(T.tobytes(), False) for T in unique.T], dtype=bool)
+    todo = np.array([T.tobytes() not in results for T in unique.T], dtype=bool)
+
+    if np.any(todo):
+        # Gram matrix of the normalized atoms
+        gram = np.dot(dictionary.T, dictionary)
+        norms = np.sqrt(np.diag(gram))
+        gram = gram / np.outer(norms, norms)
+
+        supports = unique[:, todo].T                              # supports as rows
+        N = gram.shape[0]
+        blocksize = max(1, min(block_elements // (k * N), -(-supports.shape[0] // processes)))
+        blocks = [supports[start:start + blocksize] for start in range(0, supports.shape[0], blocksize)]
+        if processes > 1 and len(blocks) > 1:
+            pool = multiprocessing.pool.ThreadPool(processes=processes)
+            linf = pool.map(lambda T: _omp_erc_block(gram, T), blocks)
+            pool.close()
+        else:
+            linf = [_omp_erc_block(gram, T) for T in blocks]
+        erc[todo] = np.concatenate(linf) < 1
+        for T, value in zip(supports, erc[todo]):
+            results[T.tobytes()] = value
+    return erc[inverse]
+
+
+def _omp_erc_block(gram, T):
+    # max_{j not in T} || G_TT^-1 G_Tj ||_1 for a block of supports T (as rows)
+    GT = gram[T]                                              # G_T for every support, (supports x k x N)
+    GTT = np.take_along_axis(GT, T[:, None, :], axis=2)      # G_TT for every support, (supports x k x k)
+    try:
+        L = np.linalg.cholesky(GTT)
+        A = np.linalg.solve(np.swapaxes(L, 1, 2), np.linalg.solve(L, GT))
+    except np.linalg.LinAlgError:
+        # linearly dependent atoms in some support, use the pseudo-inverse
+        A = np.matmul(np.linalg.pinv(GTT), GT)
+    sums = np.sum(np.abs(A), axis=1)
+    # only the atoms outside the support count
+    np.put_along_axis(sums, T, 0, axis=1)
+    return np.max(sums, axis=1)
+
+
+def omp_batch(data, dictionary, stopval, block_elements=2**22):
+    """
+    Batch-OMP: Orthogonal Matching Pursuit for many signals sharing the same dictionary
+     (R. Rubinstein, M. Zibulevsky, M. Elad, "Efficient Implementation of the K-SVD Algorithm using Batch
+     Orthogonal Matching Pursuit", 2008).
+
+    The Gram matrix D^T D and the correlations D^T Y are computed only once, and the greedy selection works only
+     with them, without the signals. All the signals of a block are processed at once: every iteration selects
+     one atom for every unfinished signal and updates the inverse of the Cholesky factor of its Gram submatrix,
+     with vectorized operations. Same results as "sparsify_QR" (up to rounding errors).
+
+    :param data: 2D array containing the data to decompose, columnwise
+    :param dictionary: dictionary containing the atoms, columnwise (numpy, scipy.sparse or memory-mapped matrix)
+    :param stopval: stopping criterion: number of atoms if >= 1, otherwise tolerance on the relative residual norm
+     (stop when norm(residual) < stopval * norm(data))
+    :param block_elements: maximum number of elements of the per-signal work arrays processed at once
+    :return: coefficients
+    """
+
+    if data.ndim == 1:
+        return omp_batch(data[:, None], dictionary, stopval, block_elements)[:, 0]
+    n, num_data = data.shape
+    N = dictionary.shape[1]
+    dtype = solution_dtype(data, dictionary)
+
+    maxatoms = int(stopval) if stopval >= 1 else n
+    gram = dictionary.T.dot(dictionary)
+    if scipy.sparse.issparse(gram):
+        gram = gram.toarray()
+    gram = np.asarray(gram, dtype=dtype)
+    alpha0_all = np.asarray(rmatvec(dictionary, data), dtype=dtype)  # D^T Y
+    energy_all = np.einsum('ij,ij->j', data, data)
+    coef = np.zeros((N, num_data), dtype=dtype)
+
+    blocksize = max(1, block_elements // (maxatoms * (N + maxatoms)))
+    for start in range(0, num_data, blocksize):
+        stop = min(start + blocksize, num_data)
+        S = stop - start
+        rows = np.arange(S)
+        alpha0 = alpha0_all[:, start:stop].T
+        alpha = alpha0.copy()
+        # Gram rows of the selected atoms, and inverse of the Cholesky factor of their Gram submatrix
+        GI = np.zeros((S, maxatoms, N), dtype=dtype)
+        Linv = np.zeros((S, maxatoms, maxatoms), dtype=dtype)
+        support = np.zeros((S, maxatoms), dtype=int)
+        z = np.zeros((S, maxatoms), dtype=dtype)   # projections on the orthonormalized atoms
+        selected = np.zeros((S, N), dtype=bool)
+        residual2 = energy_all[start:stop].astype(dtype)
+        if stopval < 1:
+            tol2 = (stopval**2) * energy_all[start:stop]
+        natoms = np.zeros(S, dtype=int)
+        active = residual2 > 0
+
+        for k in range(maxatoms):
+            s = rows[active]
+            if s.size == 0:
+                break
+
+            # Select new atom
+            j = np.where(selected[s], 0, np.abs(alpha[s])).argmax(axis=1)
+
+            # Update the inverse Cholesky factor: L_new = [L 0; w^T d] => Linv_new = [Linv 0; -w^T Linv / d  1/d]
+            if k == 0:
+                w = np.zeros((s.size, 0), dtype=dtype)
+            else:
+                w = np.einsum('sij,sj->si', Linv[s, :k, :k], GI[s, :k, j])
+            d2 = gram[j, j] - np.einsum('si,si->s', w, w)
+            dependent = d2 <= np.finfo(dtype).eps * gram[j, j]
+            if np.any(dependent):
+                # atom in the span of the selected ones, cannot improve the approximation
+                active[s[dependent]] = False
+                s, j, w, d2 = s[~dependent], j[~dependent], w[~dependent], d2[~dependent]
+                if s.size == 0:
+                    break
+            d = np.sqrt(d2)
+            Linv[s, k, :k] = -np.einsum('si,sij->sj', w, Linv[s, :k, :k]) / d[:, None]
+            Linv[s, k, k] = 1 / d
+            GI[s, k] = gram[j]
+            support[s, k] = j
+            selected[s, j] = True
+            natoms[s] = k + 1
+
+            # Projection on the new orthonormalized atom, new residual energy and correlations
+            z[s, k] = np.einsum('si,si->s', Linv[s, k, :k + 1], alpha0[s[:, None], support[s, :k + 1]])
+            residual2[s] -= z[s, k]**2
+            gamma = np.einsum('sij,si->sj', Linv[s, :k + 1, :k + 1], z[s, :k + 1])
+            alpha[s] = alpha0[s] - np.einsum('sk,skn->sn', gamma, GI[s, :k + 1])
+
+            # Stopping criteria
+            done = residual2[s] <= 1e-14 * energy_all[start + s]
+            if stopval < 1:
+                done |= residual2[s] < tol2[s]
+            active[s[done]] = False
+
+        # Coefficients: gamma = Linv^T z
+        for k in np.unique(natoms):
+            s = rows[natoms == k]
+            if k == 0 or s.size == 0:
+                continue
+            gamma = np.einsum('sij,si->sj', Linv[s, :k, :k], z[s, :k])
+            coef[support[s, :k], (start + s)[:, None]] = gamma
+
+    return coef
+
+
 def omp_sparsify_greed_omp_qr(x,A,m,opts=[]):
     # greed_omp_qr: Orthogonal Matching Pursuit algorithm based on QR
     # factorisation
@@ -287,8 +759,9 @@ def omp_sparsify_greed_omp_qr(x,A,m,opts=[]):
             raise TypeError('If P is a function handle, Pt also needs to be a function handle.')
     else:
         # TODO: should check here if A is matrix
-        P  = lambda z: np.dot(A,z)
-        Pt = lambda z: np.dot(A.T,z)
+        # numpy, scipy.sparse or memory-mapped matrix (read in blocks)
+        P  = lambda z: matvec(A, z)
+        Pt = lambda z: rmatvec(A, z)
 
     ###########################################################################
     #                 Random Check to see if dictionary is normalised
@@ -298,13 +771,21 @@ def omp_sparsify_greed_omp_qr(x,A,m,opts=[]):
     ###########################################################################
     #              Check if we have enough memory and initialise
     ###########################################################################
+    # work in single precision if the problem is single precision
+    dtype = solution_dtype(x) if hasattr(A, '__call__') else solution_dtype(x, A)
+    # Nic: Q and R only have as many columns as the atoms selected so far, and grow geometrically.
+    #  With the 'M' criterion the final size is known. Otherwise maxM = n, but much fewer atoms are usually needed.
+    if STOPCRIT == 'M' or initial_given == 1:
+        capacity = maxM
+    else:
+        capacity = min(maxM, 16)
     try:
-        Q = np.zeros((n,maxM))
+        Q = np.zeros((n,capacity), dtype=dtype)
     except:
         print( 'Variable size is too large. Please try greed_omp_chol algorithm or reduce MAXITER.')
         raise
     try:
-        R = np.zeros((maxM, maxM))
+        R = np.zeros((capacity, capacity), dtype=dtype)
     except:
         print('Variable size is too large. Please try greed_omp_chol algorithm or reduce MAXITER.')
         raise
@@ -385,9 +866,22 @@ def omp_sparsify_greed_omp_qr(x,A,m,opts=[]):
         IN.append(I)
 
         # Extract new element
-        mask = np.zeros(m)
-        mask[IN[k]] = 1
-        new_element = P(mask)
+        if hasattr(A, '__call__'):
+            mask = np.zeros(m, dtype=dtype)
+            mask[IN[k]] = 1
+            new_element = P(mask)
+        else:
+            # Nic: explicit matrix, take the column directly instead of multiplying with a one-hot vector
+            new_element = np.ravel(dense_columns(A, I))
+
+        # Grow Q and R if full
+        if k >= capacity:
+            capacity = min(maxM, 2 * capacity)
+            Qnew = np.zeros((n, capacity), dtype=dtype)
+            Qnew[:, :k] = Q[:, :k]
+            Rnew = np.zeros((capacity, capacity), dtype=dtype)
+            Rnew[:k, :k] = R[:k, :k]
+            Q, R = Qnew, Rnew
 
         # Orthogonalise new element
         if k-1 >= 0:
@@ -465,14 +959,15 @@ def omp_sparsify_greed_omp_qr(x,A,m,opts=[]):
                 t = time.time()
 
         # Also stop if residual gets too small or maxIter reached
+        # Nic: relative to the signal energy, so that the result doesn't depend on the scale of the signal
         if comp_err:
-            if err_mse[iter-1] < 1e-14:
+            if err_mse[iter-1] <= 1e-14 * sigsize:
                 done = 1
                 if verbose:
                     print('Stopping. Exact signal representation found!')
         else:
             if iter > 1:
-                if ERR < 1e-14:
+                if ERR <= 1e-14 * sigsize:
                     done = 1
                     if verbose:
                         print('Stopping. Exact signal representation found!')
@@ -522,8 +1017,8 @@ def omp_sturm_omp_qr(x, dict, D, natom, tolerance):
    Parameter
    ---------
    x: measurements
-   dict: dictionary
-   D: Gramian of dictionary
+   dict: dictionary (numpy, scipy.sparse or memory-mapped matrix)
+   D: Gramian of dictionary (dense)
    natom: iterations
    tolerance: error tolerance
 
@@ -537,12 +1032,13 @@ def omp_sturm_omp_qr(x, dict, D, natom, tolerance):
     msize, dictsize = dict.shape
     normr2 = np.vdot(x,x)
     normtol2 = tolerance*normr2
-    R = np.zeros((natom,natom))
-    Q = np.zeros((msize,natom))
+    dtype = solution_dtype(x, dict)
+    R = np.zeros((natom,natom), dtype=dtype)
+    Q = np.zeros((msize,natom), dtype=dtype)
     gamma = []
 
     # find initial projections
-    origprojections = np.dot(x.T,dict)
+    origprojections = rmatvec(dict, x)
     origprojectionsT = origprojections.T
     projections = origprojections.copy();
 
@@ -554,32 +1050,438 @@ def omp_sturm_omp_qr(x, dict, D, natom, tolerance):
         # update QR factorization, projections, and residual energy
         if k == 0:
             R[0,0] = 1
-            Q[:,0] = dict[:,newgam].copy()
+            Q[:,0] = np.ravel(dense_columns(dict, newgam))
             # update projections
             QtempQtempT = np.outer(Q[:,0],Q[:,0])
-            projections -= np.dot(x.T, np.dot(QtempQtempT,dict))
+            projections -= rmatvec(dict, np.dot(QtempQtempT,x))
             # update residual energy
             normr2 -= np.vdot(x, np.dot(QtempQtempT,x))
         else:
             w = scipy.linalg.solve_triangular(R[0:k,0:k],D[gamma[0:k],newgam],trans=1)
             R[k,k] = np.sqrt(1-np.vdot(w,w))
             R[0:k,k] = w.copy()
-            Q[:,k] = (dict[:,newgam] - np.dot(QtempQtempT,dict[:,newgam]))/R[k,k]
+            newatom = np.ravel(dense_columns(dict, newgam))
+            Q[:,k] = (newatom - np.dot(QtempQtempT,newatom))/R[k,k]
             QkQkT = np.outer(Q[:,k],Q[:,k])
             xTQkQkT = np.dot(x.T,QkQkT)
             QtempQtempT += QkQkT
             # update projections
-            projections -= np.dot(xTQkQkT,dict)
+            projections -= rmatvec(dict, xTQkQkT)
             # update residual energy
             normr2 -= np.dot(xTQkQkT,x)
 
         k += 1
 
     # build solution
+    #x_hat = np.zeros((dictsize,1))
+    x_hat = np.zeros((dictsize), dtype=dtype)
+    if k == 0:
+        # zero signal, no atom selected
+        return x_hat, gamma
     tempR = R[0:k,0:k]
     w = scipy.linalg.solve_triangular(tempR,origprojectionsT[gamma[0:k]],trans=1)
-    #x_hat = np.zeros((dictsize,1))
-    x_hat = np.zeros((dictsize))
     x_hat[gamma[0:k]] = scipy.linalg.solve_triangular(tempR,w)
 
     return x_hat, gamma
+
+
+def omp_sturm_omp_qr_gram(projections, normx2, G, natom, tolerance, return_path=False):
+    """ QR implementation of OMP working only with the Gram matrix, without the m x m projector of omp_sturm_omp_qr()
+
+   The dictionary is never used directly: with the selected atoms A = QR, the correlations of all the atoms
+    with the new orthonormal vector q_k are dict^T q_k = (G[:,newgam] - sum_j<k (dict^T q_j) R[j,k]) / R[k,k],
+    so every iteration costs O(Nk) instead of O(m^2 N), and neither Q nor the residual are formed.
+    This is the "gram" update of the OMP core (see omp_core()).
+
+   With a matrix of projections (N x L), the L signals share the same support (Simultaneous OMP): the atom with
+    the largest correlation energy over all signals is selected, and the norms are Frobenius norms.
+
+   Parameter
+   ---------
+   projections: correlations of the atoms with the signal, dict^T x (vector, or matrix for joint sparsity)
+   normx2: squared norm of the signal
+   G: Gramian of dictionary (dense)
+   natom: iterations
+   tolerance: error tolerance
+   return_path: if True, return the factors of the greedy path instead of the estimate
+
+   Return
+   ------
+   x_hat : estimate of x
+   or, if return_path is True:
+   gamma : indices of the selected atoms, in order
+   R : triangular factor of the selected atoms (k x k)
+   z : coordinates of the signal in the orthonormal basis Q (k)
+   normr2 : squared residual norm before the first and after every iteration (k+1)
+   """
+    update = GramQRUpdate(projections, G, natom)
+    gamma, normr2s = _omp_greedy(update, natom, tolerance*normx2, normx2)
+    k = len(gamma)
+
+    if return_path:
+        return gamma, update.R[0:k,0:k], update.z[0:k], normr2s
+
+    # build solution
+    x_hat = np.zeros((G.shape[0],) + projections.shape[1:], dtype=update.dtype)
+    x_hat[gamma] = update.coef()
+    return x_hat
+
+
+#------------------------------------------------------------------------------------------------------------------
+# OMP core
+#
+# All the OMP variants share the same greedy loop (_omp_greedy()), and differ only in:
+#  - the selection strategy: a function of the current correlations of the atoms with the residual, returning the
+#     index of the new atom (select_max_correlation() by default)
+#  - the update strategy: how the least-squares solution, the correlations and the residual energy are updated
+#     when an atom is added (GramQRUpdate, GramCholeskyUpdate, QRUpdate)
+#  - the stopping strategy: a maximum number of atoms and a threshold on the residual energy of every signal
+#     (see omp_core())
+#------------------------------------------------------------------------------------------------------------------
+
+def select_max_correlation(projections):
+    """
+    Selection strategy of OMP: the atom with the largest correlation with the residual (in magnitude),
+     or with the largest correlation energy over all the signals for a matrix of correlations (joint sparsity).
+    """
+    if projections.ndim == 1:
+        return np.argmax(np.abs(projections))
+    return np.argmax(np.einsum('ij,ij->i', projections, projections))
+
+
+class GramQRUpdate(object):
+    """
+    OMP update through the Gram matrix, keeping the triangular factor R of the selected atoms A = QR and the
+     correlations dict^T Q of all the atoms with the orthonormal basis Q. O(Nk) per atom, Q itself is not formed.
+    """
+
+    def __init__(self, projections, gram, natom):
+        self.gram = gram
+        self.dtype = np.result_type(projections, gram)
+        self.projections = projections.astype(self.dtype)
+        self.R = np.zeros((natom,natom), dtype=self.dtype)
+        self.DtQ = np.zeros((gram.shape[0],natom), dtype=self.dtype)
+        self.z = np.zeros((natom,) + projections.shape[1:], dtype=self.dtype)
+        self.k = 0
+
+    def add(self, j):
+        """
+        Adds atom j. Returns the decrease of the residual energy, or None if the atom is linearly dependent
+         on the selected ones.
+        """
+        G, R, DtQ, k = self.gram, self.R, self.DtQ, self.k
+        R[0:k,k] = DtQ[j,0:k]
+        Rkk2 = G[j,j] - np.vdot(R[0:k,k],R[0:k,k])
+        if Rkk2 <= np.finfo(self.dtype).eps * G[j,j]:
+            return None
+        R[k,k] = np.sqrt(Rkk2)
+        DtQ[:,k] = (G[:,j] - np.dot(DtQ[:,0:k],R[0:k,k])) / R[k,k]
+        self.z[k] = self.projections[j] / R[k,k]
+        self.projections -= np.multiply.outer(DtQ[:,k], self.z[k])
+        self.k += 1
+        return np.vdot(self.z[k], self.z[k])
+
+    def coef(self):
+        """
+        Returns the coefficients of the selected atoms, in the order of selection (empty if no atom was selected)
+        """
+        if self.k == 0:
+            return self.z[0:0]
+        return scipy.linalg.solve_triangular(self.R[0:self.k,0:self.k], self.z[0:self.k])
+
+
+class GramCholeskyUpdate(object):
+    """
+    OMP update through the Gram matrix, keeping the Cholesky factor L of the Gram matrix of the selected atoms
+     (as scikit-learn's orthogonal_mp_gram()). The coefficients are solved at every step, and the correlations
+     are recomputed from them: O(Nk + k^2) per atom.
+    """
+
+    def __init__(self, projections, gram, natom):
+        self.gram = gram
+        self.dtype = np.result_type(projections, gram)
+        self.Xy = projections.astype(self.dtype)
+        self.projections = self.Xy.copy()
+        self.L = np.zeros((natom,natom), dtype=self.dtype)
+        self.support = []
+        self.gamma = np.zeros((0,) + projections.shape[1:], dtype=self.dtype)
+        self.explained = 0.
+
+    def add(self, j):
+        """
+        Adds atom j. Returns the decrease of the residual energy, or None if the atom is linearly dependent
+         on the selected ones.
+        """
+        G, L, k = self.gram, self.L, len(self.support)
+        if k > 0:
+            w = scipy.linalg.solve_triangular(L[0:k,0:k], G[self.support,j], lower=True, check_finite=False)
+            Lkk2 = G[j,j] - np.vdot(w, w)
+            L[k,0:k] = w
+        else:
+            Lkk2 = G[j,j]
+        if Lkk2 <= np.finfo(self.dtype).eps * G[j,j]:
+            return None
+        L[k,k] = np.sqrt(Lkk2)
+        self.support.append(j)
+        self.gamma = scipy.linalg.cho_solve((L[0:k+1,0:k+1], True), self.Xy[self.support], check_finite=False)
+        self.projections = self.Xy - np.dot(G[:,self.support], self.gamma)
+        explained = np.vdot(self.gamma, self.Xy[self.support])
+        decrease, self.explained = explained - self.explained, explained
+        return decrease
+
+    def coef(self):
+        """
+        Returns the coefficients of the selected atoms, in the order of selection
+        """
+        return self.gamma
+
+
+class QRUpdate(object):
+    """
+    OMP update with the explicit orthonormal basis Q of the selected atoms (modified Gram-Schmidt with one
+     reorthogonalization), without the Gram matrix: the correlations are updated with a product with the
+     dictionary, O(mN) per atom. Better for large dictionaries and few signals, and for scipy.sparse or
+     memory-mapped dictionaries.
+    """
+
+    def __init__(self, projections, dictionary, data, natom):
+        self.dictionary = dictionary
+        self.dtype = solution_dtype(data, dictionary)
+        self.projections = projections.astype(self.dtype)
+        self.residual = data.astype(self.dtype)
+        self.Q = np.zeros((dictionary.shape[0],natom), dtype=self.dtype)
+        self.R = np.zeros((natom,natom), dtype=self.dtype)
+        self.z = np.zeros((natom,) + data.shape[1:], dtype=self.dtype)
+        self.k = 0
+
+    def add(self, j):
+        """
+        Adds atom j. Returns the decrease of the residual energy, or None if the atom is linearly dependent
+         on the selected ones.
+        """
+        Q, R, k = self.Q, self.R, self.k
+        atom = np.ravel(dense_columns(self.dictionary, j))
+        v = atom.astype(self.dtype)
+        for _ in range(2):
+            w = np.dot(Q[:,0:k].T, v)
+            v -= np.dot(Q[:,0:k], w)
+            R[0:k,k] += w
+        Rkk2 = np.vdot(v, v)
+        if Rkk2 <= np.finfo(self.dtype).eps * np.vdot(atom, atom):
+            R[0:k,k] = 0
+            return None
+        R[k,k] = np.sqrt(Rkk2)
+        Q[:,k] = v / R[k,k]
+        self.z[k] = np.dot(Q[:,k], self.residual)
+        self.residual -= np.multiply.outer(Q[:,k], self.z[k])
+        self.projections -= np.multiply.outer(rmatvec(self.dictionary, Q[:,k]), self.z[k])
+        self.k += 1
+        return np.vdot(self.z[k], self.z[k])
+
+    def coef(self):
+        """
+        Returns the coefficients of the selected atoms, in the order of selection (empty if no atom was selected)
+        """
+        if self.k == 0:
+            return self.z[0:0]
+        return scipy.linalg.solve_triangular(self.R[0:self.k,0:self.k], self.z[0:self.k])
+
+
+def _omp_greedy(update, natom, energytol, normx2, select=select_max_correlation, minatom=0):
+    # The greedy loop of OMP: select an atom, update, until natom atoms are selected, the residual energy is not
+    #  above energytol (checked only after minatom atoms), or the new atom is linearly dependent on the selected ones.
+    # Returns the selected atoms and the residual energy before the first and after every step
+    support = []
+    normr2 = normx2
+    normr2s = [normr2]
+    while (normr2 > energytol or len(support) < minatom) and len(support) < natom:
+        j = select(update.projections)
+        decrease = update.add(j)
+        if decrease is None:
+            break
+        support.append(j)
+        normr2 -= decrease
+        normr2s.append(normr2)
+    return support, np.array(normr2s)
+
+
+omp_updates = {"gram": GramQRUpdate, "cholesky": GramCholeskyUpdate, "qr": QRUpdate}
+
+
+def omp_core(data, dictionary, natom, energytol, update="gram", select=select_max_correlation, minatom=0):
+    """
+    OMP core used by all the algorithm variants of OrthogonalMatchingPursuit except "sklearn", "sparsify_QR",
+     "sturm_QR" and "batch".
+
+    :param data: The data vector or matrix, with signals as columns
+    :param dictionary: The dictionary (numpy, scipy.sparse or memory-mapped matrix)
+    :param natom: Maximum number of atoms
+    :param energytol: Stop when the squared residual norm is not above energytol (a scalar, or one value per signal).
+     As in "sparsify_QR" and "batch", also stops when the squared residual norm is not above 1e-14 times the squared
+     signal norm (exact recovery).
+    :param update: Update strategy, "gram" (GramQRUpdate), "cholesky" (GramCholeskyUpdate), "qr" (QRUpdate)
+     or a class with the same interface
+    :param select: Selection strategy, a function of the correlations returning the index of the new atom
+    :param minatom: Minimum number of atoms selected before checking energytol (scikit-learn selects at least one)
+    :return: The coefficients, same number of dimensions as the data
+    """
+    if isinstance(update, str):
+        if update not in omp_updates:
+            raise ValueError("Update '%s' does not exist" % update)
+        update = omp_updates[update]
+
+    squeeze = (data.ndim == 1)
+    data = data.reshape(data.shape[0], -1)
+    energytol = np.maximum(np.broadcast_to(energytol, (data.shape[1],)), 1e-14 * np.einsum('ij,ij->j', data, data))
+    coef = np.zeros((dictionary.shape[1], data.shape[1]), dtype=solution_dtype(data, dictionary))
+
+    projections = rmatvec(dictionary, data)
+    if update is not QRUpdate:
+        gram = dictionary.T.dot(dictionary)
+        if scipy.sparse.issparse(gram):
+            gram = gram.toarray()
+    for i in range(data.shape[1]):
+        if update is QRUpdate:
+            state = QRUpdate(projections[:,i], dictionary, data[:,i], natom)
+        else:
+            state = update(projections[:,i], gram, natom)
+        support, normr2s = _omp_greedy(state, natom, energytol[i], np.vdot(data[:,i], data[:,i]), select, minatom)
+        coef[support,i] = state.coef()
+    return coef[:,0] if squeeze else coef
+
+
+def orthogonal_mp(X, y, n_nonzero_coefs=None, tol=None):
+    """
+    OMP with the interface and the stopping criterion of scikit-learn's orthogonal_mp(), on the OMP core with Cholesky
+     updates. Replaces the local copy of scikit-learn's OMP.
+
+    :param X: The dictionary, with columnwise atoms
+    :param y: The data vector or matrix, with signals as columns
+    :param n_nonzero_coefs: Number of atoms, defaults to 10% of the number of atoms. Ignored if tol is given.
+    :param tol: Stop when the squared residual norm is not above tol
+    :return: The coefficients, same number of dimensions as y
+    """
+    if tol is None:
+        natom, energytol = (max(int(0.1 * X.shape[1]), 1) if n_nonzero_coefs is None else n_nonzero_coefs), 0
+    else:
+        natom, energytol = min(X.shape), tol
+    return omp_core(y, X, natom, energytol, "cholesky", minatom=1)
+
+
+def orthogonal_mp_gram(Gram, Xy, n_nonzero_coefs=None, tol=None, norms_squared=None):
+    """
+    orthogonal_mp() from the Gram matrix X^T X and the correlations X^T y only, as scikit-learn's
+     orthogonal_mp_gram().
+
+    :param Gram: The Gram matrix of the dictionary
+    :param Xy: The correlations of the atoms with the signals, a vector or a matrix with signals as columns
+    :param n_nonzero_coefs: Number of atoms, defaults to 10% of the number of atoms. Ignored if tol is given.
+    :param tol: Stop when the squared residual norm is not above tol
+    :param norms_squared: The squared norms of the signals, needed with tol
+    :return: The coefficients, same number of dimensions as Xy
+    """
+    if tol is not None and norms_squared is None:
+        raise ValueError("norms_squared is needed with tol")
+    squeeze = (Xy.ndim == 1)
+    Xy = Xy.reshape(Xy.shape[0], -1)
+    if tol is None:
+        natom, tol = (max(int(0.1 * Gram.shape[0]), 1) if n_nonzero_coefs is None else n_nonzero_coefs), 0
+        norms_squared = np.full(Xy.shape[1], np.inf)
+    else:
+        natom = Gram.shape[0]
+    norms_squared = np.atleast_1d(norms_squared)
+    coef = np.zeros(Xy.shape, dtype=solution_dtype(Gram, Xy))
+    for i in range(Xy.shape[1]):
+        state = GramCholeskyUpdate(Xy[:,i], Gram, natom)
+        support, normr2s = _omp_greedy(state, natom, tol, norms_squared[i], minatom=1)
+        coef[support,i] = state.coef()
+    return coef[:,0] if squeeze else coef
+
+
+def omp_path(data, dictionary, kmax, tolerance=0):
+    """
+    Runs OMP up to kmax atoms for every signal and keeps the whole greedy path, since the path to k atoms contains
+     the paths to all smaller k. Uses the Gram matrix kernel omp_sturm_omp_qr_gram().
+
+    :param data: The data vector or matrix, with signals as columns
+    :param dictionary: The dictionary (numpy, scipy.sparse or memory-mapped matrix)
+    :param kmax: Maximum number of atoms
+    :param tolerance: Stop earlier when the squared residual norm is below tolerance * squared signal norm
+    :return: An OMPPath object
+    """
+    if kmax < 1 or kmax > min(dictionary.shape):
+        raise ValueError("kmax must be between 1 and min(signal size, dictionary size)")
+
+    data = np.asarray(data).reshape(dictionary.shape[0], -1)
+    gram = dictionary.T.dot(dictionary)
+    if scipy.sparse.issparse(gram):
+        gram = gram.toarray()
+    projections = rmatvec(dictionary, data)
+
+    dtype = solution_dtype(data, dictionary)
+    numdata = data.shape[1]
+    support = -np.ones((kmax, numdata), dtype=int)
+    R = np.zeros((numdata, kmax, kmax), dtype=dtype)
+    z = np.zeros((kmax, numdata), dtype=dtype)
+    residual_norms = np.zeros((kmax + 1, numdata))
+    nsteps = np.zeros(numdata, dtype=int)
+    for i in range(numdata):
+        gamma, Ri, zi, normr2 = omp_sturm_omp_qr_gram(projections[:,i], np.vdot(data[:,i], data[:,i]), gram,
+                                                    kmax, tolerance, return_path=True)
+        k = len(gamma)
+        nsteps[i] = k
+        support[0:k,i] = gamma
+        R[i,0:k,0:k] = Ri
+        z[0:k,i] = zi
+        # the solution doesn't change after the path stops
+        residual_norms[:,i] = np.sqrt(np.maximum(normr2[np.minimum(np.arange(kmax + 1), k)], 0))
+    return OMPPath(support, R, z, residual_norms, nsteps, dictionary.shape[1])
+
+
+class OMPPath(object):
+    """
+    Greedy path of OMP for a set of signals, as returned by omp_path() or OrthogonalMatchingPursuit.solve_path().
+
+    For every signal, the selected atoms A = QR are kept as the selection order and the triangular factor R,
+     together with the coordinates z = Q^T x of the signal. The k-sparse solution uses the first k atoms,
+     with coefficients R[:k,:k]^-1 z[:k].
+
+    Attributes:
+        support: indices of the selected atoms, in order (kmax x numdata), -1 after the path stopped
+        R: triangular factors (numdata x kmax x kmax)
+        z: coordinates of the signals in the orthonormal bases (kmax x numdata)
+        residual_norms: residual norms with k = 0 .. kmax atoms ((kmax+1) x numdata)
+        nsteps: number of atoms selected for every signal, smaller than kmax if the tolerance was reached
+    """
+
+    def __init__(self, support, R, z, residual_norms, nsteps, dictsize):
+        self.support = support
+        self.R = R
+        self.z = z
+        self.residual_norms = residual_norms
+        self.nsteps = nsteps
+        self.dictsize = dictsize
+
+    @property
+    def kmax(self):
+        return self.support.shape[0]
+
+    def coef(self, k):
+        """
+        Returns the OMP solutions with k atoms (fewer for the signals whose path stopped earlier),
+         one column for every signal.
+        """
+        if k < 0 or k > self.kmax:
+            raise ValueError("k must be between 0 and kmax")
+        coef = np.zeros((self.dictsize, self.support.shape[1]), dtype=self.R.dtype)
+        for i in range(self.support.shape[1]):
+            s = min(k, self.nsteps[i])
+            if s > 0:
+                coef[self.support[0:s,i],i] = scipy.linalg.solve_triangular(self.R[i,0:s,0:s], self.z[0:s,i])
+        return coef
+
+    def coefs(self):
+        """
+        Returns the solutions for all k = 1 .. kmax, as an array (kmax x dictsize x numdata)
+        """
+        return np.stack([self.coef(k) for k in range(1, self.kmax + 1)])
@@ -13,21 +13,27 @@ from abc import ABCMeta, abstractmethod
 import types
 
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-import matplotlib.colors as mcolors
-from matplotlib.ticker import FormatStrFormatter
+import scipy.sparse
 
+import copy
 import datetime
-import hdf5storage
+import time
 import pickle as cPickle   # Python3 has no cPickle
 import multiprocessing
 
+# matplotlib and hdf5storage are slow to import and not needed for running (e.g. in worker processes),
+#  so they are imported only in the functions that use them
+
 from . import generate as gen
+from .acquisition import as_dense, effective_dictionary
+from .utils import matvec
+from .omp import OrthogonalMatchingPursuit, StopCriterion
+from . import results_table
 
 
 class PhaseTransition(with_metaclass(ABCMeta, object)):
-    def __init__(self, signaldim, dictdim, deltas, rhos, numdata, snr_db_sparse, snr_db_signal, snr_db_meas, solvers=[]):
+    def __init__(self, signaldim, dictdim, deltas, rhos, numdata, snr_db_sparse, snr_db_signal, snr_db_meas, solvers=[],
+                 dtype=np.float64):
 
         self.signaldim = signaldim
         self.dictdim = dictdim
@@ -37,12 +43,17 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
         self.snr_db_sparse = snr_db_sparse
         self.snr_db_signal = snr_db_signal
         self.snr_db_meas   = snr_db_meas
+        # Floating point type of the generated data and of the decompositions (np.float32 for single precision)
+        self.dtype = dtype
 
         self.err = None
+        self.solvetime = None
+        self.iterations = None
         self.ERCsuccess = None
         self.gamma = None
         self.support = None
         self.simData = []
+        self.shard = None
 
         self.solvers = solvers
         self.ERCsolvers = [solver for solver in self.solvers if hasattr(solver, 'checkERC')]
@@ -59,10 +70,31 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
 
     def clear(self):
         self.err = None
+        self.solvetime = None
+        self.iterations = None
         self.ERCsuccess = None
         self.gamma = None
-        self.support = None        
+        self.support = None
         self.simData = []
+        self.shard = None
+
+    def get_cells(self, shard=None):
+        """
+        Returns the list of (idelta, irho) cells of the phase transition, in row-major order.
+
+        :param shard: None for all cells, or a tuple (i, K) to get only the cells of shard i out of K.
+         Cells are assigned to shards in round-robin fashion, so that every shard gets a similar mix
+         of cheap (small delta, small rho) and expensive cells.
+        :return: A list of (idelta, irho) tuples
+        """
+        cells = [(idelta, irho) for idelta in range(len(self.deltas)) for irho in range(len(self.rhos))]
+        if shard is None:
+            return cells
+
+        ishard, numshards = shard
+        if numshards < 1 or not 0 <= ishard < numshards:
+            raise ValueError("Shard must be (i, K) with 0 <= i < K")
+        return cells[ishard::numshards]
 
     def set_solvers(self, solvers):
         self.clear()
@@ -120,6 +152,7 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
         + "Gamma matrix = " + gammastr + "\n")
 
     def plot(self, subplot=True, solve=True, check=False, thresh=None, show=True, basename=None, saveexts=[], showtitle=False):
+        import matplotlib.pyplot as plt
         # plt.ion() # Turn interactive off
 
         if solve is False and check is False:
@@ -217,13 +250,7 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
                 plot_phase_transition(currentdata, reverse_colormap=reverse_colormap[idatasource])
                 if showtitle:
                     plt.title(datasources_titles[idatasource][icurrentdata])
-                plt.xlabel(r"$\delta$")
-                plt.ylabel(r"$\rho$")
-                # Show x and y ticks: always 3 ticks: left, middle, right
-                tcks = [0, round((self.deltas.size-1)/2), self.deltas.size-1]
-                plt.xticks(tcks, ["%.2f"%(val) for val in self.deltas[tcks]])
-                tcks = [0, round((self.rhos.size-1)/2), self.rhos.size-1]
-                plt.yticks(tcks, ["%.2f"%(val) for val in self.rhos[tcks]])
+                label_delta_rho_axes(self.deltas, self.rhos)
 
                 if not subplot:
                     # separate figure, save each
@@ -241,6 +268,51 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
         if show:
             plt.show()
 
+    def export_figures(self, basename, saveexts=['pdf', 'png'], solve=True, check=False, thresh=None,
+                       showtitle=False, processes=None):
+        """
+        Renders and saves one figure per solver, in parallel worker processes using the non-interactive
+         'Agg' backend. Much faster than plot(subplot=False, ...) for many solvers and file formats.
+
+        :param basename: Base name of the files. Files are named basename + "_err_" + i + "." + ext
+         and basename + "_erc_" + i + "." + ext, with i the index of the solver
+        :param saveexts: List of file extensions (formats) to save each figure in
+        :param solve: If True, export the error figures
+        :param check: If True, export the ERC figures
+        :param thresh: Threshold for success, as in plot()
+        :param showtitle: If True, show solver name as figure title
+        :param processes: Number of processes to use (default = number of CPUs)
+        :return: List with the names of the saved files
+        """
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        tasks = []
+        if solve is True:
+            if self.err is None:
+                raise ValueError("No data to plot (have you run()?)")
+            # Averages are computed once here, workers only receive 2D matrices
+            for isolver, data in enumerate(self._compute_average(self.err, thresh)):
+                tasks.append((data, self.deltas, self.rhos, thresh is None, self.solverNames[isolver] if showtitle else None,
+                              basename + "_err_" + str(isolver), saveexts))
+        if check is True:
+            if self.ERCsuccess is None:
+                raise ValueError("No data to plot (have you check()-ed?)")
+            for isolver, data in enumerate(self._compute_average(self.ERCsuccess, thresh=None)):
+                tasks.append((data, self.deltas, self.rhos, False, self.ERCsolverNames[isolver] if showtitle else None,
+                              basename + "_erc_" + str(isolver), saveexts))
+
+        if processes != 1 and len(tasks) > 1:
+            pool = multiprocessing.Pool(processes=min(processes, len(tasks)))
+            try:
+                results = pool.map(render_phase_transition_figure, tasks)
+            finally:
+                pool.close()
+        else:
+            results = map(render_phase_transition_figure, tasks)
+
+        return [filename for result in results for filename in result]
+
     def _compute_average(self, data, thresh, ignorenan=True):
         """
         Computes average
@@ -267,6 +339,8 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
         Saves data and parameters to mat file
         :return:
         """
+        import hdf5storage
+
         if basename is None:
             basename = datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S_%f")
 
@@ -275,7 +349,7 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
                  u'deltas': self.deltas, u'rhos': self.rhos, 
                  u'snr_db_sparse': self.snr_db_sparse, u'snr_db_signal': self.snr_db_signal, u'snr_db_meas': self.snr_db_meas,
                  u'solverNames': self.solverNames, u'ERCsolverNames': self.ERCsolverNames,
-                 u'err': self.err, u'ERCsuccess': self.ERCsuccess, u'gamma': self.gamma, u'support': self.support, u'simData': self.simData,
+                 u'err': self.err, u'solvetime': self.solvetime, u'iterations': self.iterations, u'ERCsuccess': self.ERCsuccess, u'gamma': self.gamma, u'support': self.support, u'simData': self.simData,
                  u'description': self.get_description()}
 
         hdf5storage.savemat(basename + '.mat', mdict)
@@ -287,6 +361,16 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
         with open(basename+".txt", "w") as f:
             f.write(self.get_description())
 
+    def export_table(self, filename, thresh=1e-6):
+        """
+        Exports the results as a long table (one row per solver, delta, rho and signal) to a compressed columnar
+         HDF5 file. Read it back with read_results_table().
+        :param filename: Name of the HDF5 file
+        :param thresh: Threshold on the error for a signal to be counted as successfully recovered
+        :return: Nothing
+        """
+        results_table.write_results_table(self, filename, thresh)
+
     def savedescription(self, basename=None):
         """
         Saves description to a text file
@@ -306,6 +390,7 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
         :param picklefilename:
         :return:
         """
+        import hdf5storage
 
         if picklefilename1 is not None:
             with open(picklefilename1, "rb") as f:
@@ -330,6 +415,10 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
             self.ERCsolverNames = mdict[u'ERCsolverNames'].copy()
             if mdict[u'err'] is not None:
                 self.err = mdict[u'err'].copy()
+            if u'solvetime' in mdict.keys() and mdict[u'solvetime'] is not None:
+                self.solvetime = mdict[u'solvetime'].copy()
+            if u'iterations' in mdict.keys() and mdict[u'iterations'] is not None:
+                self.iterations = mdict[u'iterations'].copy()
             if mdict[u'ERCsuccess'] is not None:
                 self.ERCsuccess = mdict[u'ERCsuccess'].copy()
             if mdict[u'gamma'] is not None:
@@ -359,6 +448,126 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
             obj = cPickle.load(f)
         return obj
 
+    def savepartial(self, filename):
+        """
+        Saves the results of a sharded run (see run(shard=...)) to a partial result file, to be combined later
+         with merge_partial().
+
+        The file holds three consecutive pickle records:
+         - the object itself, without results and simulation data
+         - a dictionary with the shard spec, the list of cells and the results for these cells only
+         - the simulation data for these cells only
+        so that merging can read the results without deserializing the simulation data.
+        :param filename: Name of the partial result file
+        :return: Nothing
+        """
+        if self.shard is None:
+            raise RuntimeError("Object was not run on a shard (use run(shard=(i, K)))")
+
+        cells = self.get_cells(self.shard)
+        partial = {u'shard': self.shard, u'cells': cells, u'err': None, u'solvetime': None, u'iterations': None,
+                   u'ERCsuccess': None, u'gamma': None, u'support': None}
+        if self.err is not None:
+            partial[u'err'] = np.stack([self.err[:, idelta, irho] for idelta, irho in cells], axis=1)
+        if self.solvetime is not None:
+            partial[u'solvetime'] = np.stack([self.solvetime[:, idelta, irho] for idelta, irho in cells], axis=1)
+        if self.iterations is not None:
+            partial[u'iterations'] = np.stack([self.iterations[:, idelta, irho] for idelta, irho in cells], axis=1)
+        if self.ERCsuccess is not None:
+            partial[u'ERCsuccess'] = np.stack([self.ERCsuccess[:, idelta, irho] for idelta, irho in cells], axis=1)
+        if self.gamma is not None:
+            partial[u'gamma'] = np.stack([self.gamma[:, idelta, irho] for idelta, irho in cells], axis=1)
+        if self.support is not None:
+            partial[u'support'] = [[suppsolver[idelta][irho] for idelta, irho in cells] for suppsolver in self.support]
+        simdata = [self.simData[idelta][irho] if self.simData else dict() for idelta, irho in cells]
+
+        # Shallow copy, so that clearing the results does not affect self
+        skeleton = copy.copy(self)
+        skeleton.err = None
+        skeleton.solvetime = None
+        skeleton.iterations = None
+        skeleton.ERCsuccess = None
+        skeleton.gamma = None
+        skeleton.support = None
+        skeleton.simData = []
+
+        with open(filename, "wb") as f:
+            cPickle.dump(skeleton, f)
+            cPickle.dump(partial, f)
+            cPickle.dump(simdata, f)
+
+    @classmethod
+    def merge_partial(cls, filenames, load_simdata=False):
+        """
+        Classmethod.
+        Combines partial result files saved with savepartial() into a single complete PhaseTransition object.
+
+        Files are processed one at a time. The simulation data is only read if load_simdata is True, otherwise
+         it is skipped and the merged object has empty simData.
+        :param filenames: List of partial result files, one for each shard
+        :param load_simdata: If True, also load the simulation data of every shard
+        :return: The merged object
+        """
+        obj = None
+        done = None
+        for filename in filenames:
+            with open(filename, "rb") as f:
+                skeleton = cPickle.load(f)
+                partial = cPickle.load(f)
+                if obj is None:
+                    obj = skeleton
+                    obj.shard = None
+                    done = np.zeros((len(obj.deltas), len(obj.rhos)), dtype=bool)
+                    if load_simdata:
+                        obj.simData = [[dict() for _ in obj.rhos] for _ in obj.deltas]
+                    if partial[u'err'] is not None:
+                        obj.err = np.zeros((partial[u'err'].shape[0], len(obj.deltas), len(obj.rhos))
+                                           + partial[u'err'].shape[2:], dtype=partial[u'err'].dtype)
+                    if partial.get(u'solvetime') is not None:
+                        obj.solvetime = np.zeros((partial[u'solvetime'].shape[0], len(obj.deltas), len(obj.rhos)))
+                    if partial.get(u'iterations') is not None:
+                        obj.iterations = np.zeros((partial[u'iterations'].shape[0], len(obj.deltas), len(obj.rhos))
+                                                  + partial[u'iterations'].shape[2:], dtype=int)
+                    if partial[u'ERCsuccess'] is not None:
+                        obj.ERCsuccess = np.zeros((partial[u'ERCsuccess'].shape[0], len(obj.deltas), len(obj.rhos))
+                                                  + partial[u'ERCsuccess'].shape[2:], dtype=bool)
+                    if partial[u'gamma'] is not None:
+                        obj.gamma = np.zeros((partial[u'gamma'].shape[0], len(obj.deltas), len(obj.rhos))
+                                             + partial[u'gamma'].shape[2:], dtype=partial[u'gamma'].dtype)
+                    if partial[u'support'] is not None:
+                        obj.support = [[[[] for _ in obj.rhos] for _ in obj.deltas] for _ in partial[u'support']]
+                elif skeleton.solverNames != obj.solverNames or len(skeleton.deltas) != len(obj.deltas) \
+                        or len(skeleton.rhos) != len(obj.rhos):
+                    raise ValueError("Partial result file " + filename + " belongs to a different phase transition")
+
+                for icell, (idelta, irho) in enumerate(partial[u'cells']):
+                    if obj.err is not None:
+                        obj.err[:, idelta, irho] = partial[u'err'][:, icell]
+                    if obj.solvetime is not None:
+                        obj.solvetime[:, idelta, irho] = partial[u'solvetime'][:, icell]
+                    if obj.iterations is not None:
+                        obj.iterations[:, idelta, irho] = partial[u'iterations'][:, icell]
+                    if obj.ERCsuccess is not None:
+                        obj.ERCsuccess[:, idelta, irho] = partial[u'ERCsuccess'][:, icell]
+                    if obj.gamma is not None:
+                        obj.gamma[:, idelta, irho] = partial[u'gamma'][:, icell]
+                    if obj.support is not None:
+                        for isolver, suppsolver in enumerate(partial[u'support']):
+                            obj.support[isolver][idelta][irho] = suppsolver[icell]
+                    done[idelta, irho] = True
+
+                if load_simdata:
+                    simdata = cPickle.load(f)
+                    for (idelta, irho), celldata in zip(partial[u'cells'], simdata):
+                        obj.simData[idelta][irho] = celldata
+                    del simdata
+
+        if obj is None:
+            raise ValueError("No partial result files given")
+        if not np.all(done):
+            raise ValueError(str(np.count_nonzero(~done)) + " cells are missing from the partial result files")
+        return obj
+
 
     def compute_global_average_error(self, shape, thresh=None, textfilename=None):
         """
@@ -377,6 +586,7 @@ class PhaseTransition(with_metaclass(ABCMeta, object)):
         """
         Plots an array same shape as 'solvers' array, containing the average value of the phase transition
         """
+        import matplotlib.pyplot as plt
 
         if show is False and saveexts is None and textfilename is None:
             RuntimeError('Neither showing nor saving plot nor writing data!')
@@ -419,12 +629,30 @@ class SynthesisPhaseTransition(PhaseTransition):
     Class for running and plotting synthesis-based phase transitions
     """
 
-    def __init__(self, signaldim, dictdim, deltas, rhos, numdata, snr_db_sparse, snr_db_signal, snr_db_meas, solvers=[], dictionary="randn", acqumatrix="randn"):
-        super(SynthesisPhaseTransition, self).__init__(signaldim, dictdim, deltas, rhos, numdata, snr_db_sparse, snr_db_signal, snr_db_meas, solvers)
+    def __init__(self, signaldim, dictdim, deltas, rhos, numdata, snr_db_sparse, snr_db_signal, snr_db_meas, solvers=[], dictionary="randn", acqumatrix="randn",
+                 dtype=np.float64, group_size=1):
+        super(SynthesisPhaseTransition, self).__init__(signaldim, dictdim, deltas, rhos, numdata, snr_db_sparse, snr_db_signal, snr_db_meas, solvers,
+                                                       dtype)
         self.dictionary=dictionary
         self.acqumatrix=acqumatrix
+        # Signals come in groups of group_size consecutive signals sharing the same support (joint sparsity),
+        #  e.g. for SimultaneousOrthogonalMatchingPursuit
+        if group_size < 1 or numdata % group_size != 0:
+            raise ValueError("numdata must be a multiple of group_size")
+        self.group_size = group_size
 
-    def run(self, solve=True, check=False, processes=None, random_state=None):
+    def run(self, solve=True, check=False, processes=None, random_state=None, shard=None):
+        """
+        Generates the data and runs the solvers on all the cells of the phase transition.
+
+        :param solve: If True, run the solvers
+        :param check: If True, check the Exact Recovery Condition of the ERC solvers
+        :param processes: Number of processes to use (default = number of CPUs)
+        :param random_state: Random state passed to the data generation in every cell
+        :param shard: None to run all cells, or (i, K) to run only the cells of shard i out of K.
+         Save the result of a sharded run with savepartial() and combine the shards with merge_partial().
+         Use an integer random_state to have the same data in every cell irrespective of sharding.
+        """
 
         # Both can be False: only generates compressed sensing problems data
         #if solve is False and check is False:
@@ -434,11 +662,17 @@ class SynthesisPhaseTransition(PhaseTransition):
         if processes is None:
             processes = multiprocessing.cpu_count()
 
+        cells = self.get_cells(shard)
+        self.shard = shard
+
         # Initialize zero-filled arrays
         if solve is True:
             #self.err = [np.zeros(shape=(len(self.deltas), len(self.rhos), self.numdata)) for _ in self.solvers]
             self.err   = np.zeros(shape=(len(self.solvers), len(self.deltas), len(self.rhos), self.numdata))
-            self.gamma = np.zeros(shape=(len(self.solvers), len(self.deltas), len(self.rhos), self.dictionary.shape[1], self.numdata))
+            self.solvetime = np.zeros(shape=(len(self.solvers), len(self.deltas), len(self.rhos)))
+            self.iterations = np.full((len(self.solvers), len(self.deltas), len(self.rhos), self.numdata), -1)
+            self.gamma = np.zeros(shape=(len(self.solvers), len(self.deltas), len(self.rhos), self.dictdim, self.numdata),
+                                  dtype=self.dtype)
             self.support = [[[[] for r in self.rhos] for d in self.deltas] for s in self.solvers]
             
 
@@ -452,22 +686,24 @@ class SynthesisPhaseTransition(PhaseTransition):
             self.simData = [[dict() for _ in self.rhos] for _ in self.deltas]
 
         # Generate data if needed
-        for idelta, delta in enumerate(self.deltas):
-            for irho, rho in enumerate(self.rhos):
-                m = int(round(self.signaldim * delta, 0))  # delta = m/n
-                k = int(round(m * rho, 0))  # rho = k/m
-
-                if not self.simData[idelta][irho]:
-                    measurements, acqumatrix, realdata, dictionary, realgamma, realsupport, cleardata = \
-                        gen.make_compressed_sensing_problem(
-                            m, self.signaldim, self.dictdim, k, self.numdata, self.snr_db_sparse, self.snr_db_signal, self.snr_db_meas, self.dictionary, self.acqumatrix, random_state=random_state)
-                    self.simData[idelta][irho][u'measurements'] = measurements
-                    self.simData[idelta][irho][u'acqumatrix'] = acqumatrix
-                    self.simData[idelta][irho][u'realdata'] = realdata
-                    self.simData[idelta][irho][u'dictionary'] = dictionary
-                    self.simData[idelta][irho][u'realgamma'] = realgamma
-                    self.simData[idelta][irho][u'realsupport'] = realsupport
-                    self.simData[idelta][irho][u'cleardata'] = cleardata
+        for idelta, irho in cells:
+            delta = self.deltas[idelta]
+            rho = self.rhos[irho]
+            m = int(round(self.signaldim * delta, 0))  # delta = m/n
+            k = int(round(m * rho, 0))  # rho = k/m
+
+            if not self.simData[idelta][irho]:
+                measurements, acqumatrix, realdata, dictionary, realgamma, realsupport, cleardata = \
+                    gen.make_compressed_sensing_problem(
+                        m, self.signaldim, self.dictdim, k, self.numdata, self.snr_db_sparse, self.snr_db_signal, self.snr_db_meas, self.dictionary, self.acqumatrix, random_state=random_state,
+                        dtype=self.dtype, group_size=self.group_size)
+                self.simData[idelta][irho][u'measurements'] = measurements
+                self.simData[idelta][irho][u'acqumatrix'] = acqumatrix
+                self.simData[idelta][irho][u'realdata'] = realdata
+                self.simData[idelta][irho][u'dictionary'] = dictionary
+                self.simData[idelta][irho][u'realgamma'] = realgamma
+                self.simData[idelta][irho][u'realsupport'] = realsupport
+                self.simData[idelta][irho][u'cleardata'] = cleardata
 
         # Only run if solve or check
         if solve or check:
@@ -485,38 +721,39 @@ class SynthesisPhaseTransition(PhaseTransition):
                                 solve,
                                 check
                                )
-                               for idelta in range(len(self.deltas)) for irho in range(len(self.rhos))
+                               for idelta, irho in cells
                                ]
 
             # Run tasks, possibly in parallel
-            if processes is not 1:
+            if processes != 1:
                 #if pool is None:
                 pool = multiprocessing.Pool(processes=processes)
-                results = pool.map(run_synthesis_delta_rho, task_parameters)
+                results = pool.map(run_synthesis_delta_rho, enumerate(task_parameters))
             else:
                 results = map(run_synthesis_delta_rho, enumerate(task_parameters))
 
 
             # Process results
-            result_iter = iter(results)
-            for idelta in range(len(self.deltas)):
-                for irho in range(len(self.rhos)):
-                    result = next(result_iter)
+            for (idelta, irho), result in zip(cells, results):
 
-                    # Unpack results
-                    res_err        = result[0]
-                    res_ERCsuccess = result[1]
-                    res_gamma      = result[2]
-                    res_supp       = result[3]
+                # Unpack results
+                res_err        = result[0]
+                res_ERCsuccess = result[1]
+                res_gamma      = result[2]
+                res_supp       = result[3]
+                res_solvetime  = result[4]
+                res_iterations = result[5]
 
-                    if solve is True:
-                        self.err[:,idelta,irho,:] = res_err
-                        self.gamma[:,idelta,irho, :, :] = res_gamma
-                        for isolver, res_supp_solver in enumerate(res_supp):
-                            self.support[isolver][idelta][irho]  = res_supp_solver
+                if solve is True:
+                    self.err[:,idelta,irho,:] = res_err
+                    self.solvetime[:,idelta,irho] = res_solvetime
+                    self.iterations[:,idelta,irho,:] = res_iterations
+                    self.gamma[:,idelta,irho, :, :] = res_gamma
+                    for isolver, res_supp_solver in enumerate(res_supp):
+                        self.support[isolver][idelta][irho]  = res_supp_solver
 
-                    if check is True:
-                        self.ERCsuccess[:,idelta,irho,:] = res_ERCsuccess
+                if check is True:
+                    self.ERCsuccess[:,idelta,irho,:] = res_ERCsuccess
 
 
 
@@ -544,19 +781,26 @@ def run_synthesis_delta_rho(enum_tuple_data):
     ERCsuccess = np.zeros(shape=(len(ERCsolvers), num_data), dtype=bool)
     err = np.empty(shape=(len(solvers), num_data))
     err[:] = np.nan  # Create an array full of NaN, not if zeros. Then they are ignored with nanmean()
-    gammaout = np.zeros(shape=(len(solvers), dictionary.shape[1], num_data))
+    gammaout = np.zeros(shape=(len(solvers), dictionary.shape[1], num_data), dtype=measurements.dtype)
     suppout = []  # pass a list not an array the support of each signal may have different lengths
+    solvetime = np.zeros(len(solvers))  # average solving time per signal
+    iterations = np.full((len(solvers), num_data), -1)  # -1 for the solvers which don't report it
 
     if check is True:
         for iERCsolver, ERCsolver in enumerate(ERCsolvers):
             #self.ERCsuccess[iERCsolver, idelta, irho] = ERCsolver.checkERC(acqumatrix, dictionary, realsupport)
-            ERCsuccess[iERCsolver] = ERCsolver.checkERC(acqumatrix, dictionary, realsupport)
+            ERCsuccess[iERCsolver] = ERCsolver.checkERC(as_dense(acqumatrix), dictionary, realsupport)
     if solve is True:
+        # same for all solvers, also for matrix-free, sparse and memory-mapped matrices
+        effdict = effective_dictionary(acqumatrix, dictionary)
         for isolver, solver in enumerate(solvers):
             print('{} --- --- Data point number {}, solver {}'.format(datetime.datetime.now().strftime("%Y-%m-%d-%H:%M:%S:%f"), index, str(solver)))
 
-            result = solver.solve(measurements, np.dot(acqumatrix, dictionary), realdict)
-            
+            tic = time.time()
+            result = solver.solve(measurements, effdict, realdict)
+            solvetime[isolver] = (time.time() - tic) / num_data
+            _save_iterations(iterations[isolver], solver)
+
             # Support solvers which return a tuple (gamma, support list) as well as the older ones which return only gamma
             if isinstance(result, tuple):
                 gamma = result[0]
@@ -569,7 +813,7 @@ def run_synthesis_delta_rho(enum_tuple_data):
                     supp.append(np.array(np.nonzero(gamma[:,isig])[0]))
            
             # Compute and save relative error
-            data = np.dot(dictionary, gamma)
+            data = matvec(dictionary, gamma)
 
             # Data may be smaller if solver is restricted in number of signals (for making it faster)
             #errors = data - realdata
@@ -588,7 +832,15 @@ def run_synthesis_delta_rho(enum_tuple_data):
             # Save support for output
             suppout.append(supp)
 
-    return err, ERCsuccess, gammaout, suppout
+    return err, ERCsuccess, gammaout, suppout, solvetime, iterations
+
+
+def _save_iterations(iterations, solver):
+    # number of iterations of every signal, kept in n_iter_ by the solvers which report it
+    n_iter = getattr(solver, 'n_iter_', None)
+    if n_iter is not None:
+        n_iter = np.atleast_1d(n_iter)
+        iterations[:n_iter.size] = n_iter
 
 
 # TODO: maybe needs refactoring, it's very similar to PhaseTransition()
@@ -597,21 +849,42 @@ class AnalysisPhaseTransition(PhaseTransition):
     Class for running and plotting analysis-based phase transitions
     """
 
-    def __init__(self, signaldim, operatordim, deltas, rhos, numdata, snr_db, solvers=[], oper_type="randn", acqu_type="randn"):
-        super(AnalysisPhaseTransition, self).__init__(signaldim, operatordim, deltas, rhos, numdata, snr_db, solvers)
+    def __init__(self, signaldim, operatordim, deltas, rhos, numdata, snr_db, solvers=[], oper_type="randn", acqu_type="randn",
+                 operator_cache=None, dtype=np.float64):
+        # Analysis problems only have signal noise
+        super(AnalysisPhaseTransition, self).__init__(signaldim, operatordim, deltas, rhos, numdata, np.inf, snr_db, np.inf, solvers,
+                                                      dtype)
+        self.snr_db = snr_db
         self.oper_type=oper_type
         self.acqu_type=acqu_type
+        # Directory where generated tight frame operators are cached (see generate.make_tight_frame())
+        self.operator_cache = operator_cache
 
-    def run(self, solve=True, check=False, processes=None, random_state=None):
+    def run(self, solve=True, check=False, processes=None, random_state=None, shard=None):
+        """
+        Generates the data and runs the solvers on all the cells of the phase transition.
+
+        :param solve: If True, run the solvers
+        :param check: If True, check the Exact Recovery Condition of the ERC solvers
+        :param processes: Number of processes to use (default = number of CPUs)
+        :param random_state: Random state passed to the data generation in every cell (only if processes == 1)
+        :param shard: None to run all cells, or (i, K) to run only the cells of shard i out of K.
+         Save the result of a sharded run with savepartial() and combine the shards with merge_partial().
+        """
 
         # Number of processes
         if processes is None:
             processes = multiprocessing.cpu_count()
         pool = None
 
+        cells = self.get_cells(shard)
+        self.shard = shard
+
         # Initialize zero-filled arrays
         if solve is True:
             self.err = np.zeros(shape=(len(self.solvers), len(self.deltas), len(self.rhos), self.numdata))
+            self.solvetime = np.zeros(shape=(len(self.solvers), len(self.deltas), len(self.rhos)))
+            self.iterations = np.full((len(self.solvers), len(self.deltas), len(self.rhos), self.numdata), -1)
         if check is True:
             self.ERCsuccess = \
                 np.zeros(shape=(len(self.ERCsolvers), len(self.deltas), len(self.rhos), self.numdata), dtype=bool)
@@ -619,63 +892,29 @@ class AnalysisPhaseTransition(PhaseTransition):
         if not self.simData:
             self.simData = [[dict() for _ in self.rhos] for _ in self.deltas]
 
-        # Generate data if needed
-        # for idelta, delta in enumerate(self.deltas):
-        #     for irho, rho in enumerate(self.rhos):
-        #         m = int(round(self.signaldim * delta, 0))  # delta = m/n
-        #         l = self.signaldim - int(round(m * rho, 0))  # rho = (n-l)/m
-        #
-        #         if not self.simData[idelta][irho]:
-        #             measurements, acqumatrix, realdata, operator, realgamma, realcosupport, cleardata = \
-        #                 gen.make_analysis_compressed_sensing_problem(
-        #                     m, self.signaldim, self.dictdim, l, self.numdata, self.snr_db, operator=self.oper_type, acquisition=self.acqu_type)
-        #             self.simData[idelta][irho][u'measurements'] = measurements
-        #             self.simData[idelta][irho][u'acqumatrix'] = acqumatrix
-        #             self.simData[idelta][irho][u'realdata'] = realdata
-        #             self.simData[idelta][irho][u'operator'] = operator
-        #             self.simData[idelta][irho][u'realgamma'] = realgamma
-        #             self.simData[idelta][irho][u'realcosupport'] = realcosupport
-        #             self.simData[idelta][irho][u'cleardata'] = cleardata
+        # Generate data only for the cells that have none
+        gen_cells = [(idelta, irho) for idelta, irho in cells if not self.simData[idelta][irho]]
 
         # When multiprocessing, don't use random_state
-        if processes is not 1:
-            gen_parameters = [(int(round(self.signaldim * delta, 0)), # this is m,  delta = m/n
-                                self.signaldim,
-                                self.dictdim,
-                                self.signaldim - int(round(
-                                    int(round(self.signaldim * delta, 0))  # this is m
-                                    * rho, 0)), # this is l,  rho = (n-l)/m
-                                self.numdata,
-                                self.snr_db,
-                                self.oper_type,
-                                self.acqu_type,
-                                None, # random_state
-                               )
-                               for idelta, delta in enumerate(self.deltas)
-                               for irho, rho in enumerate(self.rhos)
-                               if not self.simData[idelta][irho]
-            ]
-        else:
-            # add random_state to parameters
-            gen_parameters = [(int(round(self.signaldim * delta, 0)), # this is m,  delta = m/n
-                               self.signaldim,
-                               self.dictdim,
-                               self.signaldim - int(round(
-                                   int(round(self.signaldim * delta, 0))  # this is m
-                                   * rho, 0)), # this is l,  rho = (n-l)/m
-                               self.numdata,
-                               self.snr_db,
-                               self.oper_type,
-                               self.acqu_type,
-                               random_state,
-                              )
-                              for idelta, delta in enumerate(self.deltas)
-                              for irho, rho in enumerate(self.rhos)
-                              if not self.simData[idelta][irho]
-            ]
+        gen_parameters = [(int(round(self.signaldim * self.deltas[idelta], 0)), # this is m,  delta = m/n
+                           self.signaldim,
+                           self.dictdim,
+                           self.signaldim - int(round(
+                               int(round(self.signaldim * self.deltas[idelta], 0))  # this is m
+                               * self.rhos[irho], 0)), # this is l,  rho = (n-l)/m
+                           self.numdata,
+                           self.snr_db,
+                           self.oper_type,
+                           self.acqu_type,
+                           random_state if processes == 1 else None,
+                           self.operator_cache,
+                           self.dtype,
+                          )
+                          for idelta, irho in gen_cells
+        ]
 
         # Run generation tasks
-        if processes is not 1:
+        if processes != 1:
             if pool is None:
                 pool = multiprocessing.Pool(processes=processes)
             results = pool.map(tuplewrap_make_analysis_compressed_sensing_problem, gen_parameters)
@@ -683,17 +922,14 @@ class AnalysisPhaseTransition(PhaseTransition):
             results = map(tuplewrap_make_analysis_compressed_sensing_problem, gen_parameters)
 
         # Process generation results
-        result_iter = iter(results)
-        for idelta in range(len(self.deltas)):
-            for irho in range(len(self.rhos)):
-                result = next(result_iter)
-                self.simData[idelta][irho][u'measurements'] = result[0]
-                self.simData[idelta][irho][u'acqumatrix'] = result[1]
-                self.simData[idelta][irho][u'realdata'] = result[2]
-                self.simData[idelta][irho][u'operator'] = result[3]
-                self.simData[idelta][irho][u'realgamma'] = result[4]
-                self.simData[idelta][irho][u'realcosupport'] = result[5]
-                self.simData[idelta][irho][u'cleardata'] = result[6]
+        for (idelta, irho), result in zip(gen_cells, results):
+            self.simData[idelta][irho][u'measurements'] = result[0]
+            self.simData[idelta][irho][u'acqumatrix'] = result[1]
+            self.simData[idelta][irho][u'realdata'] = result[2]
+            self.simData[idelta][irho][u'operator'] = result[3]
+            self.simData[idelta][irho][u'realgamma'] = result[4]
+            self.simData[idelta][irho][u'realcosupport'] = result[5]
+            self.simData[idelta][irho][u'cleardata'] = result[6]
 
         # Only run if solve or check
         if solve or check:
@@ -711,7 +947,7 @@ class AnalysisPhaseTransition(PhaseTransition):
                                 solve,
                                 check
                                )
-                               for idelta in range(len(self.deltas)) for irho in range(len(self.rhos))
+                               for idelta, irho in cells
             ]
 
             print("Starting solver processes:")
@@ -719,7 +955,7 @@ class AnalysisPhaseTransition(PhaseTransition):
             print(time_start.strftime("%Y-%m-%d --- %H:%M:%S:%f"))
 
             # Run run tasks
-            if processes is not 1:
+            if processes != 1:
                 if pool is None:
                     pool = multiprocessing.Pool(processes=processes)
                 results = pool.map(run_analysis_delta_rho, run_parameters)
@@ -727,14 +963,13 @@ class AnalysisPhaseTransition(PhaseTransition):
                 results = map(run_analysis_delta_rho, run_parameters)
 
             # Process results
-            result_iter = iter(results)
-            for idelta in range(len(self.deltas)):
-                for irho in range(len(self.rhos)):
-                    result = next(result_iter)
-                    if solve is True:
-                        self.err[:,idelta,irho,:] = result[0]
-                    if check is True:
-                        self.ERCsuccess[:,idelta,irho,:] = result[1]
+            for (idelta, irho), result in zip(cells, results):
+                if solve is True:
+                    self.err[:,idelta,irho,:] = result[0]
+                    self.solvetime[:,idelta,irho] = result[2]
+                    self.iterations[:,idelta,irho,:] = result[3]
+                if check is True:
+                    self.ERCsuccess[:,idelta,irho,:] = result[1]
 
             time_end = datetime.datetime.now()
             print("End time: " + time_end.strftime("%Y-%m-%d --- %H:%M:%S:%f"))
@@ -763,6 +998,10 @@ def run_analysis_delta_rho(tuple_data):
 
     realdict = {'data': realdata, 'gamma': realgamma, 'cosupport': realcosupport}
 
+    # Analysis solvers need the explicit acquisition matrix and operator
+    acqumatrix = as_dense(acqumatrix)
+    operator = as_dense(operator)
+
     realsupport = np.zeros((operator.shape[0] - realcosupport.shape[0], realcosupport.shape[1]), dtype=int)
     for i in range(realcosupport.shape[1]):
         realsupport[:, i] = np.setdiff1d(range(operator.shape[0]), realcosupport[:, i])
@@ -771,33 +1010,84 @@ def run_analysis_delta_rho(tuple_data):
     num_data = measurements.shape[1]
     ERCsuccess = np.zeros(shape=(len(ERCsolvers), num_data), dtype=bool)
     err = np.zeros(shape=(len(solvers), num_data))
+    solvetime = np.zeros(len(solvers))  # average solving time per signal
+    iterations = np.full((len(solvers), num_data), -1)  # -1 for the solvers which don't report it
 
     if check is True:
         for iERCsolver, ERCsolver in enumerate(ERCsolvers):
             ERCsuccess[iERCsolver] = ERCsolver.checkERC(acqumatrix, operator, realsupport)
     if solve is True:
         for isolver, solver in enumerate(solvers):
+            tic = time.time()
             data = solver.solve(measurements, acqumatrix, operator, realdict)
+            solvetime[isolver] = (time.time() - tic) / num_data
+            _save_iterations(iterations[isolver], solver)
             errors = data - realdata
             for i in range(errors.shape[1]):
                 errors[:, i] = errors[:, i] / np.linalg.norm(realdata[:, i])
                 err[isolver,i] = np.sqrt(sum(errors[:, i] ** 2))
 
-    return err, ERCsuccess
+    return err, ERCsuccess, solvetime, iterations
+
+
+def label_delta_rho_axes(deltas, rhos):
+    """
+    Sets the labels and ticks of the delta (x) and rho (y) axes of the current phase transition plot
+    """
+    import matplotlib.pyplot as plt
+
+    deltas = np.asarray(deltas)
+    rhos = np.asarray(rhos)
+    plt.xlabel(r"$\delta$")
+    plt.ylabel(r"$\rho$")
+    # Show x and y ticks: always 3 ticks: left, middle, right
+    tcks = [0, round((deltas.size-1)/2), deltas.size-1]
+    plt.xticks(tcks, ["%.2f"%(val) for val in deltas[tcks]])
+    tcks = [0, round((rhos.size-1)/2), rhos.size-1]
+    plt.yticks(tcks, ["%.2f"%(val) for val in rhos[tcks]])
+
+
+def render_phase_transition_figure(tuple_data):
+    """
+    Renders a single phase transition figure and saves it in all the requested formats.
+    Used as worker function by PhaseTransition.export_figures(). In worker processes it selects the non-interactive
+     'Agg' backend, in the main process the current backend is kept.
+
+    :param tuple_data: Tuple (matrix, deltas, rhos, reverse_colormap, title, filename, saveexts)
+    :return: List with the names of the saved files
+    """
+    import matplotlib
+    if multiprocessing.current_process().name != 'MainProcess':
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    (matrix, deltas, rhos, reverse_colormap, title, filename, saveexts) = tuple_data
+
+    fig = plt.figure()
+    plot_phase_transition(matrix, reverse_colormap=reverse_colormap)
+    if title is not None:
+        plt.title(title)
+    label_delta_rho_axes(deltas, rhos)
+    filenames = []
+    for ext in saveexts:
+        fig.savefig(filename + '.' + ext, bbox_inches='tight')
+        filenames.append(filename + '.' + ext)
+    plt.close(fig)
+    return filenames
 
 
 # TODO: add many more parameters
 def plot_phase_transition(matrix, transpose=True, reverse_colormap=False, xvals=[], yvals=[]):
+    import matplotlib.pyplot as plt
+    import matplotlib.cm as cm
+    import matplotlib.colors as mcolors
+
     # restrict to [0, 1]
     np.clip(matrix, 0, 1, out=matrix)
 
     N = 1
-    # Prepare bigger matrix
-    rows, cols = matrix.shape
-    bigmatrix = np.zeros((N * rows, N * cols))
-    for i in np.arange(rows):
-        for j in np.arange(cols):
-            bigmatrix[i * N:i * N + N, j * N:j * N + N] = matrix[i, j]
+    # Prepare bigger matrix: every cell becomes an N x N block
+    bigmatrix = np.repeat(np.repeat(matrix, N, axis=0), N, axis=1)
 
     if transpose:
         bigmatrix = bigmatrix.T
@@ -817,16 +1107,17 @@ def plot_phase_transition(matrix, transpose=True, reverse_colormap=False, xvals=
 
 class SparseCodingMixin:
 
-    def __init__(self, *args):
+    def __init__(self, *args, **kwargs):
         self.err = None
         self.deltas = None
         self.rhos = None
         self.solverNames = None
-        super().__init__(*args)  # mixin calls super too
+        super().__init__(*args, **kwargs)  # mixin calls super too
 
 
     def plot(self, thresh=None, basename=None, saveexts=[], showtitle=False, legend=[], rhomax=1, plot_options={}, 
                 xlim=(None, None), ylim=(None, None)):
+        import matplotlib.pyplot as plt
 
         markers = ['o','x','^','v','+']
 
@@ -907,6 +1198,7 @@ class SparseCodingMixin:
 
     
     def plot_suppport_recovered(self, basename=None, saveexts=[], showtitle=False, legend=[], rhomax=1):
+        import matplotlib.pyplot as plt
 
         markers = ['o','x','^','v','+']
 
@@ -962,7 +1254,8 @@ class SparseCodingMixin:
             plt.close()
 
 class SynthesisSparseCoding(SparseCodingMixin, SynthesisPhaseTransition):
-    def __init__(self, signaldim=None, dictdim=None, rhos=[], ks=None, numdata=1, snr_db_sparse=np.Inf, snr_db_signal=np.Inf, solvers=[], dictionary="randn"):
+    def __init__(self, signaldim=None, dictdim=None, rhos=[], ks=None, numdata=1, snr_db_sparse=np.Inf, snr_db_signal=np.Inf, solvers=[], dictionary="randn",
+                 dtype=np.float64, group_size=1):
 
         if signaldim == None:
             signaldim = dictionary.shape[0]
@@ -982,4 +1275,115 @@ class SynthesisSparseCoding(SparseCodingMixin, SynthesisPhaseTransition):
         #  signal noise = decompostion noise
         #  decomposition noise = another decompostion noise
 
-        super().__init__(dictdim, dictdim, deltas, rhos, numdata, np.Inf, snr_db_sparse, snr_db_signal, solvers, np.eye(dictdim), dictionary) # dictionary is eye(), acqumatrix is dictionary
\ No newline at end of file
+        # a sparse identity keeps the effective dictionary sparse for a scipy.sparse dictionary
+        if scipy.sparse.issparse(dictionary):
+            eye = scipy.sparse.identity(dictdim, dtype=dtype, format='csc')
+        else:
+            eye = np.eye(dictdim, dtype=dtype)
+
+        super().__init__(dictdim, dictdim, deltas, rhos, numdata, np.Inf, snr_db_sparse, snr_db_signal, solvers, eye, dictionary, dtype,
+                         group_size) # dictionary is eye(), acqumatrix is dictionary
+    def run(self, solve=True, check=False, processes=None, random_state=None, shard=None):
+        """
+        Generates the data and runs the solvers for all the sparsity levels.
+
+        All sparsity levels share the same dictionary (a random dictionary is generated only once),
+         so the solvers which don't need the real sparsity of the data (see SparseSolver.uses_realdict())
+         solve the signals of all sparsity levels in a single batch, and their dictionary-dependent
+         precomputations are done only once. OrthogonalMatchingPursuit("real") is batched as well: a single
+         OMP path up to max(ks) gives the solutions of all the sparsity levels.
+         The other solvers run separately for every sparsity level.
+
+        Parameters are the same as for SynthesisPhaseTransition.run().
+        """
+
+        # Number of processes
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        # The acquisition matrix plays the role of the dictionary: create it once, shared by all sparsity levels
+        if isinstance(self.acqumatrix, str):
+            m = int(round(self.signaldim * self.deltas[0], 0))
+            self.acqumatrix = gen.make_dictionary(m, self.dictdim, self.acqumatrix, random_state=random_state,
+                                                  dtype=self.dtype)
+
+        # Generate data only
+        super().run(solve=False, check=False, processes=1, random_state=random_state, shard=shard)
+        cells = self.get_cells(shard)
+
+        if solve is True:
+            self.err   = np.zeros(shape=(len(self.solvers), len(self.deltas), len(self.rhos), self.numdata))
+            self.solvetime = np.zeros(shape=(len(self.solvers), len(self.deltas), len(self.rhos)))
+            self.iterations = np.full((len(self.solvers), len(self.deltas), len(self.rhos), self.numdata), -1)
+            self.gamma = np.zeros(shape=(len(self.solvers), len(self.deltas), len(self.rhos), self.dictdim, self.numdata),
+                                  dtype=self.dtype)
+            self.support = [[[[] for r in self.rhos] for d in self.deltas] for s in self.solvers]
+        if check is True:
+            self.ERCsuccess = np.zeros(shape=(len(self.ERCsolvers), len(self.deltas), len(self.rhos), self.numdata), dtype=bool)
+
+        if not (solve or check) or not cells:
+            return
+
+        simdata = [self.simData[idelta][irho] for idelta, irho in cells]
+
+        def make_task(solvers, ERCsolvers, datas, solve, check):
+            if len(datas) == 1:
+                realsupport = datas[0][u'realsupport']
+            else:
+                realsupport = None   # different sparsity levels, cannot be concatenated
+            return (solvers,
+                    ERCsolvers,
+                    np.hstack([data[u'measurements'] for data in datas]),
+                    datas[0][u'acqumatrix'],
+                    datas[0][u'dictionary'],
+                    np.hstack([data[u'realdata'] for data in datas]),
+                    np.hstack([data[u'realgamma'] for data in datas]),
+                    realsupport,
+                    np.hstack([data[u'cleardata'] for data in datas]),
+                    solve,
+                    check)
+
+        # Tasks: (solver indices, cell indices, task parameters)
+        tasks = []
+        if solve is True:
+            # OMP with the real sparsity reads it from the real decomposition of every signal, so it also solves
+            #  all the sparsity levels at once, with a single OMP path up to the largest sparsity
+            batch_solvers = [isolver for isolver, solver in enumerate(self.solvers)
+                             if not (hasattr(solver, 'uses_realdict') and solver.uses_realdict())
+                             or (isinstance(solver, OrthogonalMatchingPursuit)
+                                 and solver.stopcrit == StopCriterion.REAL)]
+            cell_solvers = [isolver for isolver in range(len(self.solvers)) if isolver not in batch_solvers]
+            if batch_solvers:
+                tasks.append((batch_solvers, list(range(len(cells))),
+                              make_task([self.solvers[i] for i in batch_solvers], [], simdata, True, False)))
+            if cell_solvers:
+                for icell, data in enumerate(simdata):
+                    tasks.append((cell_solvers, [icell],
+                                  make_task([self.solvers[i] for i in cell_solvers], [], [data], True, False)))
+        if check is True:
+            # ERC depends on the real support, check every sparsity level separately
+            for icell, data in enumerate(simdata):
+                tasks.append(([], [icell], make_task([], self.ERCsolvers, [data], False, True)))
+
+        # Run tasks, possibly in parallel
+        if processes != 1 and len(tasks) > 1:
+            pool = multiprocessing.Pool(processes=processes)
+            results = pool.map(run_synthesis_delta_rho, enumerate([task[2] for task in tasks]))
+        else:
+            results = map(run_synthesis_delta_rho, enumerate([task[2] for task in tasks]))
+
+        # Split results back to cells
+        for (isolvers, icells, task), result in zip(tasks, results):
+            res_err, res_ERCsuccess, res_gamma, res_supp, res_solvetime, res_iterations = result
+            for ipos, icell in enumerate(icells):
+                idelta, irho = cells[icell]
+                cols = slice(ipos * self.numdata, (ipos + 1) * self.numdata)
+                if task[9] is True:
+                    for ires, isolver in enumerate(isolvers):
+                        self.err[isolver, idelta, irho, :] = res_err[ires, cols]
+                        self.gamma[isolver, idelta, irho, :, :] = res_gamma[ires, :, cols]
+                        self.support[isolver][idelta][irho] = res_supp[ires][cols]
+                        self.solvetime[isolver, idelta, irho] = res_solvetime[ires]
+                        self.iterations[isolver, idelta, irho, :] = res_iterations[ires, cols]
+                if task[10] is True:
+                    self.ERCsuccess[:, idelta, irho, :] = res_ERCsuccess
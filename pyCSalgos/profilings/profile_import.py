@@ -0,0 +1,25 @@
+"""
+Measures the time of `import pyCSalgos` in fresh interpreters (as in every spawned worker process),
+ and lists which of the heavy optional dependencies got imported.
+"""
+
+import subprocess
+import sys
+
+import numpy as np
+
+heavy_modules = ['matplotlib.pyplot', 'hdf5storage', 'cvxopt', 'sklearn.linear_model', 'sklearn.datasets']
+
+code = ("import sys, time\n"
+        "t = time.time()\n"
+        "import pyCSalgos\n"
+        "print(time.time() - t)\n"
+        "print(','.join(m for m in " + repr(heavy_modules) + " if m in sys.modules))\n")
+
+if __name__ == '__main__':
+    times = []
+    for _ in range(10):
+        output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True).split('\n')
+        times.append(float(output[0]))
+    print('import pyCSalgos: median {:.3f} s, min {:.3f} s'.format(np.median(times), np.min(times)))
+    print('Heavy modules imported: ' + (output[1] if output[1] else 'none'))
@@ -0,0 +1,38 @@
+"""
+Times the algorithm variants of OrthogonalMatchingPursuit for a few problem sizes (fixed number of atoms),
+ including "auto" (calibrated only if pyCSalgos.omp.calibrate_omp() was run),
+ and prints the fastest one for every size.
+"""
+
+import time
+
+import numpy as np
+
+from pyCSalgos import OrthogonalMatchingPursuit
+from pyCSalgos.generate import make_sparse_coded_signal
+
+algorithms = ["sklearn", "gram", "cholesky", "qr", "sparsify_QR", "sturm_QR", "sturm_QR_gram", "batch", "auto"]
+
+# signal size, dictionary size, number of atoms, number of signals
+sizes = [(64, 128, 8, 100), (256, 1024, 32, 50), (1024, 4096, 64, 5)]
+
+
+def best_time(solver, data, dictionary, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t = time.time()
+        solver.solve(data, dictionary)
+        times.append(time.time() - t)
+    return min(times)
+
+
+if __name__ == '__main__':
+    for n, N, k, L in sizes:
+        data, dictionary, _, _, _ = make_sparse_coded_signal(n, N, k, L, np.inf, np.inf, random_state=47)
+        times = {}
+        for algorithm in algorithms:
+            times[algorithm] = best_time(OrthogonalMatchingPursuit(k, algorithm=algorithm), data, dictionary)
+        print('n={}, N={}, k={}, {} signals:'.format(n, N, k, L))
+        for algorithm in algorithms:
+            print('    {:15s} {:.4f} s'.format(algorithm, times[algorithm]))
+        print('    fastest: ' + min(times, key=times.get))
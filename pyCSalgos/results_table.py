@@ -0,0 +1,167 @@
+"""
+results_table.py
+
+Export of phase transition results as a long table, one row per (solver, delta, rho, signal),
+ stored in a compressed columnar HDF5 file, and the matching reader.
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import numpy as np
+
+# Names of the columns available in the table. The iterations column is written only if the phase transition has
+#  the number of iterations of every signal, and is -1 for the solvers which don't report it (see n_iter_)
+table_columns = ['solver_name', 'solver_params', 'delta', 'rho', 'signal', 'err', 'success', 'time', 'iterations']
+
+# Number of rows per HDF5 chunk. Reading a subset of rows only decompresses the chunks containing them.
+chunk_rows = 65536
+
+
+def write_results_table(pt, filename, thresh=1e-6, compression="gzip"):
+    """
+    Writes the results of a phase transition as a long table in a compressed columnar HDF5 file.
+
+    Rows are ordered by solver, then delta, then rho, then signal, so that the rows of any solver and of any
+     contiguous range of deltas form a single contiguous block of every column.
+    Each column is stored as a separate chunked and compressed dataset in the group "columns".
+    The solver name and parameters are stored once per solver and referenced by a solver index column.
+
+    :param pt: A PhaseTransition object, after run()
+    :param filename: Name of the HDF5 file to write
+    :param thresh: Threshold on the error for a signal to be counted as successfully recovered
+    :param compression: Compression filter for the columns, passed to h5py
+    :return: Nothing
+    """
+    import h5py
+
+    if pt.err is None:
+        raise ValueError("No results to export (have you run()?)")
+
+    numsolvers, numdeltas, numrhos, numdata = pt.err.shape
+    deltas = np.asarray(pt.deltas, dtype=float)
+    rhos = np.asarray(pt.rhos, dtype=float)
+
+    solver_params = []
+    for isolver in range(numsolvers):
+        if pt.solvers and len(pt.solvers) == numsolvers:
+            try:
+                solver_params.append(str(pt.solvers[isolver].get_params(deep=False)))
+            except AttributeError:
+                solver_params.append(str(pt.solvers[isolver]))
+        else:
+            solver_params.append("")
+
+    # Build the columns in row order: the index arrays are broadcast over the 4D err shape
+    shape = pt.err.shape
+    data = {
+        'solver': np.broadcast_to(np.arange(numsolvers, dtype=np.int16)[:, None, None, None], shape).ravel(),
+        'delta': np.broadcast_to(deltas[None, :, None, None], shape).ravel(),
+        'rho': np.broadcast_to(rhos[None, None, :, None], shape).ravel(),
+        'signal': np.broadcast_to(np.arange(numdata, dtype=np.int32)[None, None, None, :], shape).ravel(),
+        'err': pt.err.ravel(),
+        'success': (np.abs(pt.err) < thresh).ravel(),
+    }
+    if getattr(pt, 'iterations', None) is not None:
+        data['iterations'] = np.asarray(pt.iterations, dtype=np.int32).ravel()
+    if pt.solvetime is not None:
+        data['time'] = np.broadcast_to(pt.solvetime[:, :, :, None], shape).ravel()
+    else:
+        data['time'] = np.full(pt.err.size, np.nan)
+
+    with h5py.File(filename, "w") as f:
+        f.attrs['numsolvers'] = numsolvers
+        f.attrs['numdata'] = numdata
+        f.attrs['thresh'] = thresh
+        f.create_dataset('deltas', data=deltas)
+        f.create_dataset('rhos', data=rhos)
+        strtype = h5py.special_dtype(vlen=str)
+        f.create_dataset('solver_names', data=np.array(pt.solverNames, dtype=object), dtype=strtype)
+        f.create_dataset('solver_params', data=np.array(solver_params, dtype=object), dtype=strtype)
+        group = f.create_group('columns')
+        for name, values in data.items():
+            group.create_dataset(name, data=values, chunks=(min(chunk_rows, values.size),),
+                                 compression=compression, shuffle=True)
+
+
+def read_results_table(filename, columns=None, solvers=None, delta_range=None):
+    """
+    Reads a table written by write_results_table().
+
+    Only the requested columns and the rows of the requested solvers and deltas are read from the file.
+
+    :param filename: Name of the HDF5 file
+    :param columns: List of column names to read (default: all the columns in the file). See table_columns.
+    :param solvers: List of solvers to read, given by name or index (default: all)
+    :param delta_range: Tuple (min, max) of the delta values to read, inclusive (default: all)
+    :return: A dictionary {column name: numpy array}
+    """
+    import h5py
+
+    if columns is not None:
+        for column in columns:
+            if column not in table_columns:
+                raise ValueError("Unknown column '" + str(column) + "'")
+
+    with h5py.File(filename, "r") as f:
+        stored = [column for column in table_columns
+                  if column in f['columns'] or column in ('solver_name', 'solver_params')]
+        if columns is None:
+            columns = stored
+        for column in columns:
+            if column not in stored:
+                raise ValueError("Column '" + str(column) + "' is not in the file")
+        numdata = int(f.attrs['numdata'])
+        deltas = f['deltas'][:]
+        rhos = f['rhos'][:]
+        names = [name.decode() if isinstance(name, bytes) else name for name in f['solver_names'][:]]
+        params = [param.decode() if isinstance(param, bytes) else param for param in f['solver_params'][:]]
+
+        # Select solvers
+        if solvers is None:
+            isolvers = list(range(len(names)))
+        else:
+            isolvers = []
+            for solver in solvers:
+                if isinstance(solver, str):
+                    if solver not in names:
+                        raise ValueError("Unknown solver '" + solver + "'")
+                    isolvers.append(names.index(solver))
+                else:
+                    isolvers.append(int(solver))
+
+        # Select deltas: rows are ordered by delta within a solver, so every delta is a contiguous block of rows
+        ideltas = np.arange(deltas.size)
+        if delta_range is not None:
+            ideltas = np.flatnonzero((deltas >= delta_range[0]) & (deltas <= delta_range[1]))
+
+        # Make the list of row slices to read, joining adjacent blocks
+        rows_per_delta = rhos.size * numdata
+        rows_per_solver = deltas.size * rows_per_delta
+        slices = []
+        for isolver in isolvers:
+            for idelta in ideltas:
+                start = isolver * rows_per_solver + idelta * rows_per_delta
+                if slices and slices[-1][1] == start:
+                    slices[-1][1] = start + rows_per_delta
+                else:
+                    slices.append([start, start + rows_per_delta])
+
+        def read_column(name):
+            dataset = f['columns'][name]
+            if not slices:
+                return dataset[0:0]
+            return np.concatenate([dataset[start:stop] for start, stop in slices])
+
+        result = dict()
+        solvercodes = None
+        for column in columns:
+            if column in ('solver_name', 'solver_params'):
+                if solvercodes is None:
+                    solvercodes = read_column('solver')
+                table = names if column == 'solver_name' else params
+                result[column] = np.array(table, dtype=object)[solvercodes]
+            else:
+                result[column] = read_column(column)
+
+    return result
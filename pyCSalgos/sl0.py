@@ -5,8 +5,10 @@ Provides the Smoothed-L0 (SL0) algorithm
 """
 
 import numpy as np
+import scipy.sparse
 
 from .base import SparseSolver
+from .utils import solution_dtype
 
 
 class SmoothedL0(SparseSolver):
@@ -42,14 +44,21 @@ class SmoothedL0(SparseSolver):
 
         N = dictionary.shape[1]
         Ndata = data.shape[1]
-        coef = np.zeros((N, Ndata))
+        coef = np.zeros((N, Ndata), dtype=solution_dtype(data, dictionary))
 
         if self.algorithm == "exact":
+            # The pseudo-inverse is the same for all signals, compute only once
+            #  (it is dense, even for a scipy.sparse dictionary)
+            if scipy.sparse.issparse(dictionary):
+                dictionary_pinv = np.linalg.pinv(dictionary.toarray())
+            else:
+                dictionary_pinv = np.linalg.pinv(dictionary)
             for i in range(Ndata):
                 coef[:, i] = sl0_exact(dictionary, data[:,i], self.sigma_min,
                                        sigma_decrease_factor=self.sigma_decrease_factor,
                                        mu_0=self.mu_0,
-                                       L=self.L)
+                                       L=self.L,
+                                       A_pinv=dictionary_pinv)
         else:
             raise ValueError("Algorithm '%s' does not exist", self.algorithm)
         return coef
@@ -62,7 +71,7 @@ def sl0_exact(A, x, sigma_min, sigma_decrease_factor=0.5, mu_0=2, L=3, A_pinv=No
     """
 
     if A_pinv is None:
-        A_pinv = np.linalg.pinv(A)
+        A_pinv = np.linalg.pinv(A.toarray() if scipy.sparse.issparse(A) else A)
 
     if true_s is not None:
         ShowProgress = True
@@ -78,7 +87,7 @@ def sl0_exact(A, x, sigma_min, sigma_decrease_factor=0.5, mu_0=2, L=3, A_pinv=No
         for i in np.arange(L):
             delta = s * np.exp( (-np.abs(s)**2) / sigma**2) # old function OurDelta()
             s = s - mu_0*delta
-            s = s - np.dot(A_pinv,(np.dot(A,s)-x))   # Projection
+            s = s - np.dot(A_pinv,(A.dot(s)-x))   # Projection
 
         if ShowProgress:
             string = '     sigma=%f, SNR=%f\n' % sigma, _estimate_SNR(s,true_s)
@@ -0,0 +1,155 @@
+"""
+stomp.py
+
+Provides Stagewise Orthogonal Matching Pursuit (StOMP)
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import numpy as np
+import scipy.special
+from scipy.sparse.linalg import LinearOperator
+
+from .base import SparseSolver
+from .l1min import cgsolve
+from .utils import solution_dtype, dense_columns, rmatvec
+
+
+class StagewiseOrthogonalMatchingPursuit(SparseSolver):
+    """
+    Stagewise Orthogonal Matching Pursuit (D. L. Donoho, Y. Tsaig, I. Drori, J.-L. Starck, "Sparse Solution of
+     Underdetermined Systems of Linear Equations by Stagewise Orthogonal Matching Pursuit", 2012)
+
+    At every stage, all the atoms whose correlation with the residual exceeds a threshold are added to the support,
+     and the least-squares problem on the support is solved with conjugate gradients. A few stages (about 10)
+     are enough even for a large number of atoms.
+
+    The correlations are compared with the formal noise level ||r|| / sqrt(n), which assumes atoms with unit norm
+     (e.g. random gaussian matrices). Threshold policies:
+        - "cfar" (Constant False Alarm Rate): an atom outside the support is selected with probability ``alpha''
+        - "cfdr" (Constant False Discovery Rate): the expected fraction of wrong atoms among the selected ones is
+          ``alpha'' (Benjamini-Hochberg procedure)
+        - a number: fixed threshold on the normalized correlations
+
+    Works with numpy, scipy.sparse, memory-mapped matrices and matrix-free linear operators
+     (scipy.sparse.linalg.LinearOperator), since only products with the dictionary and its transpose are used.
+
+    The number of stages of every signal in the last solve() is kept in n_iter_.
+    """
+
+    def __init__(self, threshold="cfdr", alpha=0.5, stages=10, stoptol=1e-6, cgtol=1e-10, cgmaxiter=200):
+
+        # parameter check
+        if isinstance(threshold, str) and threshold not in ["cfar", "cfdr"] \
+                or not isinstance(threshold, str) and not threshold > 0:
+            raise ValueError("threshold must be 'cfar', 'cfdr' or a positive number")
+        if not 0 < alpha < 1:
+            raise ValueError("alpha must be between 0 and 1")
+        if stages <= 0:
+            raise ValueError("number of stages is not positive")
+        if stoptol < 0:
+            raise ValueError("stopping tolerance is negative")
+
+        self.threshold = threshold
+        self.alpha = alpha
+        self.stages = stages
+        self.stoptol = stoptol
+        self.cgtol = cgtol
+        self.cgmaxiter = cgmaxiter
+
+    def __str__(self):
+        return "StOMP (" + str(self.threshold) + ", " + str(self.alpha) + ", " + str(self.stages) + " | " \
+               + str(self.stoptol) + ")"
+
+    def solve(self, data, dictionary, realdict=None):
+        coef, self.n_iter_ = stagewise_omp(data, dictionary, self.threshold, self.alpha, self.stages, self.stoptol,
+                                           self.cgtol, self.cgmaxiter, return_n_iter=True)
+        return coef
+
+
+def stagewise_omp(data, dictionary, threshold="cfdr", alpha=0.5, stages=10, stoptol=1e-6, cgtol=1e-10, cgmaxiter=200,
+                  return_n_iter=False):
+    """
+    Stagewise Orthogonal Matching Pursuit, see StagewiseOrthogonalMatchingPursuit.
+
+    :param data: The data vector or matrix, with signals as columns
+    :param dictionary: The dictionary (numpy, scipy.sparse or memory-mapped matrix, or linear operator)
+    :param threshold: Threshold policy, "cfar", "cfdr" or a fixed threshold
+    :param alpha: False alarm rate ("cfar") or false discovery rate ("cfdr")
+    :param stages: Maximum number of stages
+    :param stoptol: Stop when the residual norm is below stoptol times the signal norm
+    :param cgtol: Tolerance of the conjugate gradients solver
+    :param cgmaxiter: Maximum number of conjugate gradients iterations
+    :param return_n_iter: If True, also return the number of stages for every signal
+    :return: The coefficients, and the number of stages if return_n_iter is True
+    """
+
+    squeeze = (data.ndim == 1)
+    data = data.reshape(data.shape[0], -1)
+    n, N = dictionary.shape
+    Ndata = data.shape[1]
+    coef = np.zeros((N, Ndata), dtype=solution_dtype(data, dictionary))
+    n_iter = np.zeros(Ndata, dtype=int)
+
+    for i in range(Ndata):
+        y = data[:, i]
+        ynorm = np.linalg.norm(y)
+        x = np.zeros(N)
+        support = np.zeros(N, dtype=bool)
+        r = y.copy()
+        rnorm = ynorm
+        while n_iter[i] < stages and rnorm > stoptol * ynorm:
+            # normalized correlations of the atoms outside the support
+            z = np.abs(rmatvec(dictionary, r)) * np.sqrt(n) / rnorm
+            z[support] = 0
+            new = z >= _stage_threshold(z[~support], threshold, alpha)
+            if not np.any(new):
+                break
+            support |= new
+            n_iter[i] += 1
+
+            # least squares on the support, with conjugate gradients on the normal equations,
+            #  warm started from the previous solution
+            I = np.flatnonzero(support)
+            if isinstance(dictionary, LinearOperator):
+                P = lambda u: dictionary.matvec(_embed(u, I, N))
+                Pt = lambda v: dictionary.rmatvec(v)[I]
+            else:
+                atoms = dense_columns(dictionary, I)
+                P = lambda u: np.dot(atoms, u)
+                Pt = lambda v: np.dot(atoms.T, v)
+            dx = cgsolve(lambda u: Pt(P(u)), Pt(r), cgtol, cgmaxiter, verbose=0)[0]
+            x[I] += dx
+            r = y - P(x[I])
+            rnorm = np.linalg.norm(r)
+        coef[:, i] = x
+
+    if squeeze:
+        coef, n_iter = coef[:, 0], n_iter[0]
+    if return_n_iter:
+        return coef, n_iter
+    return coef
+
+
+def _embed(u, I, N):
+    x = np.zeros(N, dtype=u.dtype)
+    x[I] = u
+    return x
+
+
+def _stage_threshold(z, threshold, alpha):
+    # threshold for the normalized correlations z of the atoms outside the support, which are approximately
+    #  standard normal for the atoms not in the real support
+    if threshold == "cfar":
+        return scipy.special.ndtri(1 - alpha / 2)
+    if threshold == "cfdr":
+        # Benjamini-Hochberg: largest p-value p_(j) <= alpha * j / M, with p-values sorted in increasing order
+        zsorted = np.sort(z)[::-1]
+        pvalues = 2 * scipy.special.ndtr(-zsorted)
+        M = pvalues.size
+        below = np.flatnonzero(pvalues <= alpha * np.arange(1, M + 1) / M)
+        if below.size == 0:
+            return np.inf
+        return zsorted[below[-1]]
+    return threshold
@@ -0,0 +1,68 @@
+"""
+test_acquisition.py
+
+Tests for acquisition.py
+
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import pickle
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+from numpy.testing import assert_raises
+from numpy.testing import assert_equal
+from numpy.testing import assert_allclose
+
+from ..acquisition import fwht
+from ..acquisition import make_partial_dct
+from ..acquisition import make_randomized_hadamard
+from ..acquisition import make_sparse_sign
+from ..acquisition import as_dense
+
+
+def test_fwht():
+    from scipy.linalg import hadamard
+    x = np.random.RandomState(47).randn(16, 3)
+    assert_allclose(fwht(x), np.dot(hadamard(16), x))
+    assert_allclose(fwht(x[:, 0]), np.dot(hadamard(16), x[:, 0]))
+    assert_raises(ValueError, fwht, np.zeros(12))
+
+
+def test_structured_operators():
+    m, n = 10, 32
+    rng = np.random.RandomState(47)
+    X = rng.randn(n, 4)
+    Y = rng.randn(m, 4)
+
+    for A in [make_partial_dct(m, n, 47), make_randomized_hadamard(m, n, 47), make_sparse_sign(m, n, random_state=47)]:
+        M = as_dense(A)
+        assert_equal(M.shape, (m, n))
+        # apply and adjoint, on matrices and vectors
+        assert_allclose(A.dot(X), np.dot(M, X), atol=1e-12)
+        assert_allclose(A.matvec(X[:, 0]), np.dot(M, X[:, 0]), atol=1e-12)
+        assert_allclose(A.H.dot(Y), np.dot(M.T, Y), atol=1e-12)
+        assert_allclose(A.rmatvec(Y[:, 0]), np.dot(M.T, Y[:, 0]), atol=1e-12)
+        # picklable, for multiprocessing
+        assert_allclose(pickle.loads(pickle.dumps(A)).dot(X), A.dot(X))
+
+    # orthogonal rows, unit norm columns for Hadamard
+    M = as_dense(make_randomized_hadamard(m, n, 47))
+    assert_allclose(np.dot(M, M.T), float(n) / m * np.eye(m), atol=1e-12)
+    assert_allclose(np.linalg.norm(M, axis=0), np.ones(n))
+    M = as_dense(make_partial_dct(m, n, 47))
+    assert_allclose(np.dot(M, M.T), float(n) / m * np.eye(m), atol=1e-12)
+    # sparse: exactly nnz_per_column non-zeros per column, unit norm columns
+    M = as_dense(make_sparse_sign(m, n, nnz_per_column=3, random_state=47))
+    assert_equal(np.count_nonzero(M, axis=0), 3 * np.ones(n))
+    assert_allclose(np.linalg.norm(M, axis=0), np.ones(n))
+
+    # closed forms of the structured operators, and generic linear operators built by blocks of columns
+    for A in [make_partial_dct(m, n, 47), make_randomized_hadamard(m, n, 47), make_sparse_sign(m, n, random_state=47)]:
+        generic = LinearOperator(A.shape, matvec=A.matvec, rmatvec=A.rmatvec, dtype=A.dtype)
+        assert_allclose(as_dense(A), A.dot(np.eye(n)), atol=1e-12)
+        assert_allclose(as_dense(generic), A.dot(np.eye(n)), atol=1e-12)
+
+    assert_raises(ValueError, make_randomized_hadamard, m, 30)
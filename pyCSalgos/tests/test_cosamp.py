@@ -0,0 +1,76 @@
+"""
+test_cosamp.py
+
+Testing functions for cosamp.py
+
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import numpy as np
+import scipy.sparse
+from numpy.testing import assert_raises
+from numpy.testing import assert_equal
+from numpy.testing import assert_allclose
+
+from ..generate import make_sparse_coded_signal
+from ..cosamp import CompressiveSamplingMatchingPursuit, SubspacePursuit, cosamp, subspace_pursuit
+
+n, N, k, Ndata = 20, 30, 3, 10
+
+X, D, gamma, support, clearX = make_sparse_coded_signal(n, N, k, Ndata, np.inf, np.inf, random_state=47)
+
+solver_classes = [CompressiveSamplingMatchingPursuit, SubspacePursuit]
+
+
+def test_correct_shapes():
+    for SolverClass in solver_classes:
+        solver = SolverClass(k)
+        assert_equal(solver.solve(X[:, 0], D).shape, (N,))
+        assert_equal(solver.solve(X, D).shape, (N, Ndata))
+
+
+def test_perfect_recovery():
+    for SolverClass in solver_classes:
+        coef = SolverClass(k).solve(X, D)
+        assert_allclose(coef, gamma, atol=1e-10)
+        # real sparsity
+        solver = SolverClass("real")
+        assert solver.uses_realdict()
+        assert_allclose(solver.solve(X, D, {'support': support}), gamma, atol=1e-10)
+        assert_raises(ValueError, solver.solve, X, D)
+
+
+def test_n_iter():
+    for function in [cosamp, subspace_pursuit]:
+        coef, n_iter = function(X, D, k, return_n_iter=True)
+        assert_equal(n_iter.shape, (Ndata,))
+        assert np.all(n_iter >= 1)
+        # a single iteration
+        coef1, n_iter1 = function(X, D, k, maxiter=1, return_n_iter=True)
+        assert_equal(n_iter1, np.ones(Ndata))
+        # zero signal is already solved
+        coef0, n_iter0 = function(np.zeros(n), D, k, return_n_iter=True)
+        assert_equal(n_iter0, 0)
+        assert_equal(coef0, np.zeros(N))
+    # kept by the solvers
+    for SolverClass in solver_classes:
+        solver = SolverClass(k, maxiter=1)
+        solver.solve(X, D)
+        assert_equal(solver.n_iter_, np.ones(Ndata))
+
+
+def test_sparse_dictionary():
+    dictionary = scipy.sparse.random(n, N, density=0.3, random_state=4, format='csc') + scipy.sparse.eye(n, N)
+    data = dictionary.dot(gamma)
+    for function in [cosamp, subspace_pursuit]:
+        assert_allclose(function(data, dictionary, k), function(data, dictionary.toarray(), k), atol=1e-10)
+
+
+def test_bad_input():
+    for SolverClass in solver_classes:
+        assert_raises(ValueError, SolverClass, k, -1)
+        assert_raises(ValueError, SolverClass, k, 1e-6, 0)
+        assert_raises(ValueError, SolverClass(0).solve, X, D)
+        assert_raises(ValueError, SolverClass(n + 1).solve, X, D)
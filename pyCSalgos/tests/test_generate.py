@@ -5,17 +5,26 @@ Tests for generate.py
 # Author: Nicolae Cleju
 # License: BSD 3 clause
 
+import os
+import shutil
+import tempfile
+
 import numpy
 from numpy.testing import assert_array_almost_equal
-from sklearn.utils.testing import assert_raises
-from sklearn.utils.testing import assert_equal
-from sklearn.utils.testing import assert_array_equal
-from sklearn.utils.testing import assert_allclose
+from numpy.testing import assert_raises
+from numpy.testing import assert_equal
+from numpy.testing import assert_array_equal
+from numpy.testing import assert_allclose
 
+from ..generate import make_random_support
 from ..generate import make_sparse_coded_signal
 from ..generate import make_compressed_sensing_problem
+from ..generate import make_tight_frame
 from ..generate import make_cosparse_coded_signal
+from ..generate import sample_cosparse_nullspace
 from ..generate import make_analysis_compressed_sensing_problem
+from ..generate import make_compressed_sensing_problem_batches
+from ..generate import make_analysis_compressed_sensing_problem_batches
 
 
 def test_make_sparse_coded_signal():
@@ -27,15 +36,15 @@ def test_make_sparse_coded_signal():
     snr_db = numpy.inf
     # Parameterized test:
     for use_sklearn in [True,False]:
-        yield subtest_make_sparse_coded_signal, n, N, k, Ndata, snr_db, use_sklearn
+        subtest_make_sparse_coded_signal(n, N, k, Ndata, snr_db, use_sklearn)
 
 def subtest_make_sparse_coded_signal(n,N,k,Ndata,snr_db,use_sklearn):
 
-    X, D, gamma, support, clearX = make_sparse_coded_signal(n, N, k, Ndata, snr_db, "randn", use_sklearn)
+    X, D, gamma, support, clearX = make_sparse_coded_signal(n, N, k, Ndata, snr_db, snr_db, "randn", use_sklearn)
 
     # check shapes
-    print X.shape
-    print (n, N)
+    print(X.shape)
+    print((n, N))
 
     assert_equal(X.shape, (n, Ndata), "X shape mismatch")
     assert_equal(D.shape, (n, N), "D shape mismatch")
@@ -55,24 +64,46 @@ def subtest_make_sparse_coded_signal(n,N,k,Ndata,snr_db,use_sklearn):
         assert(not numpy.any(gamma[izero, i])) # check if all zeros are zero
 
 
+def test_make_random_support():
+    N, Ndata = 30, 20000
+
+    # k=5 uses Floyd's algorithm, k=25 uses the blockwise argpartition
+    for k in [5, 25]:
+        support = make_random_support(N, k, Ndata, random_state=47, block_elements=N*1000)
+        assert_equal(support.shape, (k, Ndata))
+        # sorted, distinct, in range
+        assert(numpy.all(numpy.diff(support, axis=0) > 0))
+        assert(support.min() >= 0 and support.max() < N)
+        # uniform: every index appears in about k/N of the supports
+        freq = numpy.bincount(support.ravel(), minlength=N) / float(Ndata)
+        assert_allclose(freq, k / float(N) * numpy.ones(N), atol=0.02)
+
+        # reproducible
+        assert_array_equal(support, make_random_support(N, k, Ndata, random_state=47, block_elements=N*1000))
+
+    assert_equal(make_random_support(N, 0, Ndata).shape, (0, Ndata))
+    assert_array_equal(make_random_support(N, N, 3), numpy.tile(numpy.arange(N)[:, None], (1, 3)))
+    assert_raises(ValueError, make_random_support, N, N+1, Ndata)
+
+
 def test_make_sparse_coded_signal_dictionary():
     n, N = 20, 30
     k = 5
     Ndata = 10
     snr_db = numpy.inf
 
-    assert_raises(ValueError, make_sparse_coded_signal, n, N, k, Ndata, snr_db, "orthonormal", True)
+    assert_raises(ValueError, make_sparse_coded_signal, n, N, k, Ndata, snr_db, snr_db, "orthonormal", True)
 
-    X, D, gamma, support, clearX = make_sparse_coded_signal(n, n, k, Ndata, snr_db, dictionary="orthonormal", use_sklearn=True)
+    X, D, gamma, support, clearX = make_sparse_coded_signal(n, n, k, Ndata, snr_db, snr_db, dictionary="orthonormal", use_sklearn=True)
     assert_allclose(numpy.dot(D, D.T), numpy.eye(n), atol=1e-10)
     assert_allclose(numpy.dot(D.T, D), numpy.eye(n), atol=1e-10)
 
     Dict = numpy.random.randn(n,N)
-    assert_raises(ValueError, make_sparse_coded_signal, n, N+1, k, Ndata, snr_db, Dict, True)
-    X, D, gamma, support, clearX = make_sparse_coded_signal(n, N, k, Ndata, snr_db, dictionary=Dict, use_sklearn=True)
+    assert_raises(ValueError, make_sparse_coded_signal, n, N+1, k, Ndata, snr_db, snr_db, Dict, True)
+    X, D, gamma, support, clearX = make_sparse_coded_signal(n, N, k, Ndata, snr_db, snr_db, dictionary=Dict, use_sklearn=True)
     assert_array_equal(D, Dict)
 
-    assert_raises(ValueError, make_sparse_coded_signal, n, N, k, Ndata, snr_db, "somethingwrong", True)
+    assert_raises(ValueError, make_sparse_coded_signal, n, N, k, Ndata, snr_db, snr_db, "somethingwrong", True)
 
 
 def test_make_compressed_sensing_problem():
@@ -82,12 +113,12 @@ def test_make_compressed_sensing_problem():
     Ndata = 10
     snr_db = numpy.inf
 
-    assert_raises(ValueError, make_compressed_sensing_problem, m, n, N, k, Ndata, snr_db, "randn", "somethingwrong", True)
+    assert_raises(ValueError, make_compressed_sensing_problem, m, n, N, k, Ndata, snr_db, snr_db, snr_db, "randn", "somethingwrong", True)
     P = numpy.random.randn(m,n)
-    assert_raises(ValueError, make_compressed_sensing_problem, m+1, n, N, k, Ndata,snr_db, "randn", P, True)
+    assert_raises(ValueError, make_compressed_sensing_problem, m+1, n, N, k, Ndata, snr_db, snr_db, snr_db, "randn", P, True)
 
     measurements, acqumatrix, data, dictionary, gamma, support, cleardata = \
-        make_compressed_sensing_problem(m, n, N, k, Ndata, snr_db, "randn", "randn", True)
+        make_compressed_sensing_problem(m, n, N, k, Ndata, snr_db, snr_db, snr_db, "randn", "randn", True)
 
     assert_equal(measurements.shape, (m,Ndata))
     assert_equal(acqumatrix.shape, (m,n))
@@ -137,6 +168,79 @@ def test_make_cosparse_coded_signal():
         assert(numpy.all(gamma[inonzero, i])) # check if all non-zeros are non-zero
 
 
+
+
+def test_make_tight_frame():
+    N, n = 30, 20
+
+    operator = make_tight_frame(N, n, random_state=47, tol=1e-10)
+    assert_allclose(numpy.sqrt(numpy.sum(operator**2, axis=1)), numpy.ones(N), atol=1e-10)
+    assert_allclose(numpy.dot(operator.T, operator), float(N)/n * numpy.eye(n), atol=1e-8)
+
+    # fewer rows than columns: singular Gram matrix, the frame has orthonormal rows
+    operator = make_tight_frame(10, n, random_state=1)
+    assert_allclose(numpy.dot(operator, operator.T), numpy.eye(10), atol=1e-10)
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        operator = make_tight_frame(N, n, random_state=47, cache_dir=tmpdir)
+        assert_equal(os.listdir(tmpdir), ["tightframe_30x20_seed47_tol1e-06_iter200.npy"])
+        assert_array_equal(make_tight_frame(N, n, random_state=47, cache_dir=tmpdir), operator)
+        assert_array_equal(make_tight_frame(N, n, random_state=47), operator)
+
+        # a different tolerance is not served from the cache
+        loose = make_tight_frame(N, n, random_state=47, tol=1e-1, cache_dir=tmpdir)
+        assert_equal(len(os.listdir(tmpdir)), 2)
+        assert_array_equal(make_tight_frame(N, n, random_state=47, cache_dir=tmpdir), operator)
+        assert_array_equal(make_tight_frame(N, n, random_state=47, tol=1e-1, cache_dir=tmpdir), loose)
+        shutil.rmtree(tmpdir)
+
+        # the cache doesn't change the generated problems
+        data = make_cosparse_coded_signal(n, N, 15, 10, numpy.inf, "tightframe", random_state=47)[0]
+        for _ in range(2):
+            data_cached = make_cosparse_coded_signal(n, N, 15, 10, numpy.inf, "tightframe", random_state=47,
+                                                     operator_cache=tmpdir)[0]
+            assert_array_equal(data_cached, data)
+        assert_equal(len(os.listdir(tmpdir)), 1)
+
+        # without an int seed, nothing is cached
+        make_cosparse_coded_signal(n, N, 15, 10, numpy.inf, "tightframe", operator_cache=tmpdir)
+        make_analysis_compressed_sensing_problem(15, n, N, 15, 10, numpy.inf, operator_cache=tmpdir,
+                                                 random_state=numpy.random.RandomState(47))
+        assert_equal(len(os.listdir(tmpdir)), 1)
+
+        # the analysis problems use the cache too, and draw the same frame seed from the same int seed
+        shutil.rmtree(tmpdir)
+        for _ in range(2):
+            make_analysis_compressed_sensing_problem(15, n, N, 15, 10, numpy.inf, operator_cache=tmpdir,
+                                                     random_state=47)
+            assert_equal(len(os.listdir(tmpdir)), 1)
+    finally:
+        shutil.rmtree(tmpdir)
+
+def test_sample_cosparse_nullspace():
+    N, n, l, numdata = 30, 20, 15, 50
+    rng = numpy.random.RandomState(47)
+    operator = rng.randn(N, n)
+    cosupport = make_random_support(N, l, numdata, random_state=rng)
+
+    # several blocks
+    data = sample_cosparse_nullspace(operator, cosupport, 47, block_elements=7*l*n)
+    assert_equal(data.shape, (n, numdata))
+    for i in range(numdata):
+        assert_allclose(numpy.dot(operator[cosupport[:, i]], data[:, i]), numpy.zeros(l), atol=1e-10)
+    assert_array_equal(data, sample_cosparse_nullspace(operator, cosupport, 47))
+
+    # linearly dependent cosupport rows
+    operator[1] = operator[0]
+    cosupport[:2, 0] = [0, 1]
+    data = sample_cosparse_nullspace(operator, cosupport, 47)
+    for i in range(numdata):
+        assert_allclose(numpy.dot(operator[cosupport[:, i]], data[:, i]), numpy.zeros(l), atol=1e-10)
+
+    # nullspace is {0}
+    assert_array_equal(sample_cosparse_nullspace(operator, make_random_support(N, n, 3), 47), numpy.zeros((n, 3)))
+
 def test_make_analysis_compressed_sensing_problem():
     m = 10
     N, n = 30, 20
@@ -153,4 +257,158 @@ def test_make_analysis_compressed_sensing_problem():
 
     assert_equal(measurements.shape, (m,numdata))
     assert_equal(acqumatrix.shape, (m,n))
-    assert_array_equal(measurements, numpy.dot(acqumatrix, data))
\ No newline at end of file
+    assert_array_equal(measurements, numpy.dot(acqumatrix, data))
+
+
+def test_make_compressed_sensing_problem_batches():
+    m, n, N, k = 10, 20, 30, 5
+    Ndata, batch_size = 23, 10
+
+    batches = list(make_compressed_sensing_problem_batches(m, n, N, k, Ndata, batch_size, numpy.inf, numpy.inf, 20,
+                                                           random_state=47))
+    assert_equal([batch[0].shape[1] for batch in batches], [10, 10, 3])
+    for measurements, acqumatrix, data, dictionary, gamma, support, cleardata in batches:
+        # shared matrices
+        assert acqumatrix is batches[0][1]
+        assert dictionary is batches[0][3]
+        assert_allclose(data, numpy.dot(dictionary, gamma), atol=1e-10)
+        assert_equal(support.shape, (k, measurements.shape[1]))
+
+    # reproducible
+    again = make_compressed_sensing_problem_batches(m, n, N, k, Ndata, batch_size, numpy.inf, numpy.inf, 20,
+                                                    random_state=47)
+    for batch, batch_again in zip(batches, again):
+        for x, y in zip(batch, batch_again):
+            assert_array_equal(x, y)
+
+    # infinite stream
+    stream = make_compressed_sensing_problem_batches(m, n, N, k, None, batch_size, numpy.inf, numpy.inf, numpy.inf)
+    assert_equal([next(stream)[0].shape[1] for _ in range(5)], [batch_size] * 5)
+
+
+def test_make_analysis_compressed_sensing_problem_batches():
+    m, n, N, l = 10, 20, 30, 15
+    Ndata, batch_size = 23, 10
+
+    batches = list(make_analysis_compressed_sensing_problem_batches(m, n, N, l, Ndata, batch_size, numpy.inf,
+                                                                    "randn", random_state=47))
+    assert_equal([batch[0].shape[1] for batch in batches], [10, 10, 3])
+    for measurements, acqumatrix, data, operator, gamma, cosupport, cleardata in batches:
+        assert acqumatrix is batches[0][1]
+        assert operator is batches[0][3]
+        assert_array_equal(measurements, numpy.dot(acqumatrix, data))
+        for i in range(data.shape[1]):
+            assert_allclose(numpy.dot(operator[cosupport[:, i]], data[:, i]), numpy.zeros(l), atol=1e-10)
+
+
+def test_structured_acquisition():
+    m, n, N, k = 16, 32, 40, 3
+    from ..acquisition import as_dense
+    for acquisition in ["dct", "hadamard", "sparse"]:
+        measurements, acqumatrix, data, dictionary, gamma, support, cleardata = \
+            make_compressed_sensing_problem(m, n, N, k, 5, numpy.inf, numpy.inf, numpy.inf, "randn", acquisition,
+                                            random_state=47)
+        assert_equal(acqumatrix.shape, (m, n))
+        assert_allclose(measurements, numpy.dot(as_dense(acqumatrix), data), atol=1e-12)
+
+        measurements, acqumatrix, data, operator, gamma, cosupport, cleardata = \
+            make_analysis_compressed_sensing_problem(m, n, N, 20, 5, numpy.inf, "randn", acquisition, random_state=47)
+        assert_allclose(measurements, numpy.dot(as_dense(acqumatrix), data), atol=1e-12)
+
+
+def test_single_precision():
+    m, n, N, k, l = 16, 32, 40, 3, 20
+    for acquisition in ["randn", "dct", "hadamard", "sparse"]:
+        measurements, acqumatrix, data, dictionary, gamma, support, cleardata = \
+            make_compressed_sensing_problem(m, n, N, k, 5, numpy.inf, numpy.inf, 30, "randn", acquisition,
+                                            random_state=47, dtype=numpy.float32)
+        for array in [measurements, data, dictionary, gamma, cleardata]:
+            assert_equal(array.dtype, numpy.float32)
+        # the structured operators are applied in single precision too
+        assert_equal(acqumatrix.dtype, numpy.float32)
+        assert_equal(acqumatrix.dot(data).dtype, numpy.float32)
+        assert_equal(acqumatrix.T.dot(measurements).dtype, numpy.float32)
+
+    measurements, acqumatrix, data, operator, gamma, cosupport, cleardata = \
+        make_analysis_compressed_sensing_problem(m, n, N, l, 5, 30, "randn", random_state=47, dtype=numpy.float32)
+    for array in [measurements, acqumatrix, data, operator, cleardata]:
+        assert_equal(array.dtype, numpy.float32)
+
+
+def test_sparse_matrices():
+    import scipy.sparse
+    m, n, N, k, l = 10, 20, 30, 3, 15
+    dictionary = scipy.sparse.random(n, N, density=0.3, random_state=1) + scipy.sparse.eye(n, N)
+    acquisition = scipy.sparse.random(m, n, density=0.5, random_state=2)
+    measurements, acqumatrix, data, D, gamma, support, cleardata = \
+        make_compressed_sensing_problem(m, n, N, k, 5, numpy.inf, numpy.inf, numpy.inf, dictionary, acquisition,
+                                        random_state=47)
+    assert scipy.sparse.issparse(D) and scipy.sparse.issparse(acqumatrix)
+    assert_allclose(data, numpy.dot(dictionary.toarray(), gamma))
+    assert_allclose(measurements, numpy.dot(acquisition.toarray(), data))
+
+    # cosupport rows: 0, 1 and their sum (linearly dependent, uses the QR fallback)
+    operator = scipy.sparse.lil_matrix(scipy.sparse.random(N, n, density=0.3, random_state=3) + scipy.sparse.eye(N, n))
+    operator[2] = operator[0] + operator[1]
+    cosupport = numpy.tile(numpy.arange(l)[:, None], (1, 4))
+    data = sample_cosparse_nullspace(operator.tocsr(), cosupport, random_state=47)
+    assert_allclose(operator.toarray()[:l].dot(data), numpy.zeros((l, 4)), atol=1e-10)
+
+    data, operator, gamma, cosupport, cleardata = make_cosparse_coded_signal(n, N, l, 5, numpy.inf, operator,
+                                                                             random_state=47)
+    assert scipy.sparse.issparse(operator)
+    for i in range(data.shape[1]):
+        assert_allclose(operator[cosupport[:, i]].dot(data[:, i]), numpy.zeros(l), atol=1e-10)
+
+
+def test_make_joint_sparse_compressed_sensing_problem():
+    from ..generate import make_joint_sparse_compressed_sensing_problem
+    m, n, N, k, groups, L = 10, 20, 30, 3, 4, 5
+
+    for group_acquisition in [False, True]:
+        measurements, acqumatrix, data, dictionary, gamma, support, cleardata = \
+            make_joint_sparse_compressed_sensing_problem(m, n, N, k, groups, L, numpy.inf, numpy.inf, numpy.inf,
+                                                         group_acquisition=group_acquisition, random_state=47)
+        assert_equal(measurements.shape, (m, groups * L))
+        assert_equal(support.shape, (k, groups))
+        assert_allclose(data, numpy.dot(dictionary, gamma))
+        for i in range(groups):
+            cols = slice(i * L, (i + 1) * L)
+            assert_array_equal(numpy.flatnonzero(numpy.any(gamma[:, cols] != 0, axis=1)), numpy.sort(support[:, i]))
+            groupacqu = acqumatrix[i] if group_acquisition else acqumatrix
+            assert_allclose(measurements[:, cols], numpy.dot(groupacqu, data[:, cols]))
+        if group_acquisition:
+            assert_equal(len(acqumatrix), groups)
+
+    assert_raises(ValueError, make_sparse_coded_signal, n, N, k, 7, numpy.inf, numpy.inf, group_size=2)
+
+
+def test_make_memmap_dictionary():
+    from ..generate import make_memmap_dictionary
+    n, N, k = 20, 300, 3
+    tmpdir = tempfile.mkdtemp()
+    try:
+        # small blocks, to write and read in several blocks
+        dictionary = make_memmap_dictionary(os.path.join(tmpdir, "dict.npy"), n, N, random_state=47,
+                                            block_elements=500)
+        assert isinstance(dictionary, numpy.memmap)
+        assert_allclose(numpy.sqrt(numpy.sum(dictionary**2, axis=0)), numpy.ones(N))
+        assert_array_equal(numpy.load(os.path.join(tmpdir, "dict.npy")), dictionary)
+
+        data, D, gamma, support, cleardata = make_sparse_coded_signal(n, N, k, 5, numpy.inf, numpy.inf, dictionary,
+                                                                      random_state=47)
+        assert D is dictionary
+        assert_allclose(data, numpy.dot(numpy.asarray(dictionary), gamma))
+
+        copy = make_memmap_dictionary(os.path.join(tmpdir, "copy.npy"), n, N, dictionary, block_elements=500)
+        assert_array_equal(copy, dictionary)
+
+        # single precision stays memory-mapped
+        data, D, gamma, support, cleardata = make_sparse_coded_signal(n, N, k, 5, numpy.inf, numpy.inf, dictionary,
+                                                                      random_state=47, dtype=numpy.float32)
+        assert isinstance(D, numpy.memmap)
+        assert_equal(D.dtype, numpy.float32)
+        assert_allclose(D, dictionary, rtol=1e-6)
+        del dictionary, D, copy
+    finally:
+        shutil.rmtree(tmpdir)
@@ -0,0 +1,25 @@
+"""
+test_import.py
+
+Guards the import time of the package: heavy optional dependencies must not be imported by `import pyCSalgos`
+"""
+
+# License: BSD 3 clause
+
+import os
+import subprocess
+import sys
+
+from numpy.testing import assert_equal
+
+# Keep in sync with profilings/profile_import.py
+heavy_modules = ['matplotlib.pyplot', 'hdf5storage', 'cvxopt', 'sklearn.linear_model', 'sklearn.datasets']
+
+
+def test_no_heavy_imports():
+    code = ("import sys\n"
+            "import pyCSalgos\n"
+            "print(','.join(m for m in " + repr(heavy_modules) + " if m in sys.modules))\n")
+    rootdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=rootdir, universal_newlines=True)
+    assert_equal(output.strip(), '')
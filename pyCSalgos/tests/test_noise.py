@@ -0,0 +1,47 @@
+"""
+test_noise.py
+
+Tests for noise.py
+
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import numpy as np
+from numpy.testing import assert_raises
+from numpy.testing import assert_allclose
+from numpy.testing import assert_array_equal
+
+from ..noise import add_noise_snr
+
+
+def test_add_noise_snr():
+    data = np.random.RandomState(47).randn(20, 10)
+
+    noisy = add_noise_snr(data, 20, np.random.RandomState(1))
+    snr = 20 * np.log10(np.linalg.norm(data, axis=0) / np.linalg.norm(noisy - data, axis=0))
+    assert_allclose(snr, 20 * np.ones(10))
+
+    # in place, same result
+    inplace = data.copy()
+    result = add_noise_snr(inplace, 20, np.random.RandomState(1), out=inplace)
+    assert result is inplace
+    assert_allclose(inplace, noisy)
+
+    # no noise
+    clean = add_noise_snr(data, np.inf)
+    assert clean is not data
+    assert_array_equal(clean, data)
+
+    # no random state given, single vector
+    noisy = add_noise_snr(data[:, 0], 10)
+    assert_allclose(20 * np.log10(np.linalg.norm(data[:, 0]) / np.linalg.norm(noisy - data[:, 0])), 10)
+
+    # dtype of the data is kept
+    for dtype in [np.float32, np.float64]:
+        assert add_noise_snr(data.astype(dtype), 20, 1).dtype == dtype
+        assert add_noise_snr(data.astype(dtype), np.inf).dtype == dtype
+    assert add_noise_snr(np.arange(10), 20, 1).dtype == np.float64
+
+    assert_raises(ValueError, add_noise_snr, data, 20, None, np.zeros((20, 9)))
@@ -14,12 +14,11 @@ Heavily inspired from test_omp in scikit-learn, copyrighted Vlad Niculae
 import scipy
 
 import numpy as np
-from sklearn.utils.testing import assert_raises
-from sklearn.utils.testing import assert_true
-from sklearn.utils.testing import assert_equal
-from sklearn.utils.testing import assert_array_equal
-from sklearn.utils.testing import assert_allclose
-from sklearn.utils.testing import assert_warns
+from numpy.testing import assert_raises
+from numpy.testing import assert_equal
+from numpy.testing import assert_array_equal
+from numpy.testing import assert_allclose
+from numpy.testing import assert_warns
 
 from ..generate import make_sparse_coded_signal
 from ..omp import OrthogonalMatchingPursuit
@@ -30,22 +29,22 @@ rng = np.random.RandomState(47)
 
 SolverClass = OrthogonalMatchingPursuit
 
-X, D, gamma, support, clearX = make_sparse_coded_signal(n, N, k, Ndata, np.inf, random_state=47)
+X, D, gamma, support, clearX = make_sparse_coded_signal(n, N, k, Ndata, np.inf, np.inf, random_state=47)
 tol = 1e-6
 
-algorithms = ["sklearn", "sklearn_local", "sparsify_QR", "sturm_QR"]
+algorithms = ["sklearn", "sklearn_local", "gram", "cholesky", "qr", "sparsify_QR", "sturm_QR", "sturm_QR_gram", "batch"]
 
 def test_correct_shapes():
     stopvals = [1e-6, k]
     for algo in algorithms:
         for stopval in stopvals:
-            yield subtest_correct_shapes, stopval, algo
+            subtest_correct_shapes(stopval, algo)
 
 def subtest_correct_shapes(stopval, algorithm):
     omp = SolverClass(stopval = stopval, algorithm=algorithm)
     # single vector
     coef = omp.solve(X[:,0], D)
-    assert_equal(coef.shape, (N,)) # KNOWN FAIL: sturm_QR returns (N,1), other return (N,)
+    assert_equal(coef.shape, (N,))
     # multiple vectors
     coef = omp.solve(X, D)
     assert_equal(coef.shape, (N, Ndata))
@@ -55,38 +54,38 @@ def test_tol():
     stopvals = [1e-6]
     for algo in algorithms:
         for stopval in stopvals:
-            yield subtest_tol, stopval, algo
+            subtest_tol(stopval, algo)
 
 def subtest_tol(stopval, algorithm):
     omp = SolverClass(stopval = stopval, algorithm=algorithm)
     coef = omp.solve(X, D)
     for i in range(X.shape[1]):
-        assert_true(np.sum((X[:, i] - np.dot(D, coef[:,i])) ** 2) <= stopval)
+        assert np.sum((X[:, i] - np.dot(D, coef[:,i])) ** 2) <= stopval
 
 
 def test_n_nonzero_coefs():
     stopvals = [k]
     for algo in algorithms:
         for stopval in stopvals:
-            yield subtest_n_nonzero_coefs, stopval, algo
+            subtest_n_nonzero_coefs(stopval, algo)
 
 def subtest_n_nonzero_coefs(stopval, algorithm):
     omp = SolverClass(stopval = stopval, algorithm=algorithm)
     coef = omp.solve(X, D)
     for i in range(X.shape[1]):
-        assert_true(np.count_nonzero(coef[:,i]) <= stopval)
+        assert np.count_nonzero(coef[:,i]) <= stopval
 
 def test_perfect_support_recovery():
     stopvals = [k]
     for algo in algorithms:
         for stopval in stopvals:
-            yield subtest_perfect_support_recovery, stopval, algo
+            subtest_perfect_support_recovery(stopval, algo)
 
 def subtest_perfect_support_recovery(stopval, algorithm):
     # check support only when stopping criterion = fixed sparsity
     # otherwise might get very small but non-zero coefficients
     omp = SolverClass(stopval = stopval, algorithm=algorithm)
-    notused, Dortho, gammaortho, supportortho, notused = make_sparse_coded_signal(n, n, k, Ndata, np.inf, random_state=48)
+    notused, Dortho, gammaortho, supportortho, notused = make_sparse_coded_signal(n, n, k, Ndata, np.inf, np.inf, random_state=48)
     Dortho = scipy.linalg.orth(Dortho)
     Xortho = np.dot(Dortho, gammaortho)
     coef = omp.solve(Xortho, Dortho)
@@ -100,7 +99,7 @@ def test_perfect_signal_recovery():
     stopvals = [1e-6]
     for algo in algorithms:
         for stopval in stopvals:
-            yield subtest_perfect_signal_recovery, stopval, algo
+            subtest_perfect_signal_recovery(stopval, algo)
 
 def subtest_perfect_signal_recovery(stopval, algorithm):
     omp = SolverClass(stopval = stopval, algorithm=algorithm)
@@ -110,7 +109,7 @@ def subtest_perfect_signal_recovery(stopval, algorithm):
 
 def test_omp_reaches_least_squares():
     for algo in algorithms:
-        yield subtest_omp_reaches_least_squares, algo
+        subtest_omp_reaches_least_squares(algo)
 
 def subtest_omp_reaches_least_squares(algorithm):
     n1 = 10
@@ -195,3 +194,324 @@ def test_swapped_regressors():
 
 
 
+
+
+def test_single_precision():
+    for algo in ["sparsify_QR", "sturm_QR", "batch"]:
+        subtest_single_precision(algo)
+
+def subtest_single_precision(algorithm):
+    omp = SolverClass(stopval = k, algorithm=algorithm)
+    coef = omp.solve(X.astype(np.float32), D.astype(np.float32))
+    assert_equal(coef.dtype, np.float32)
+    assert_allclose(gamma, coef, atol=1e-4)
+
+
+def test_batch_matches_sparsify_QR():
+    Xnoisy, Dnoisy, notused, notused, notused = make_sparse_coded_signal(n, N, k, 50, np.inf, 20, random_state=49)
+    for stopval in [k, 1e-6, 0.3]:
+        subtest_batch_matches_sparsify_QR(Xnoisy, Dnoisy, stopval)
+
+def subtest_batch_matches_sparsify_QR(X, D, stopval):
+    coef = SolverClass(stopval = stopval, algorithm="batch").solve(X, D)
+    reference = SolverClass(stopval = stopval, algorithm="sparsify_QR").solve(X, D)
+    assert_allclose(coef, reference, atol=1e-10)
+
+
+def test_sparsify_QR_kernel():
+    # matrix (direct column access) and function handles (products with one-hot vectors) give the same result,
+    #  also when Q and R grow beyond their initial size
+    from ..omp import omp_sparsify_greed_omp_qr
+    n1, N1 = 40, 60
+    D1 = rng.randn(n1, N1)
+    x1 = rng.randn(n1)
+    opts = {"nargout": 1, "stopCrit": "mse", "stopTol": 1e-12}
+    coef = omp_sparsify_greed_omp_qr(x1, D1, N1, dict(opts))
+    assert np.count_nonzero(coef) > 16
+    assert_allclose(np.dot(D1, coef), x1, atol=1e-5)
+    opts["P_trans"] = lambda z: np.dot(D1.T, z)
+    coef_handle = omp_sparsify_greed_omp_qr(x1, lambda z: np.dot(D1, z), N1, opts)
+    assert_allclose(coef_handle, coef, atol=1e-10)
+
+
+def test_sturm_QR_gram_matches_sturm_QR():
+    Xnoisy, Dnoisy, notused, notused, notused = make_sparse_coded_signal(n, N, k, 50, np.inf, 20, random_state=49)
+    for stopval in [k, 1e-6, 0.3]:
+        subtest_sturm_QR_gram_matches_sturm_QR(Xnoisy, Dnoisy, stopval)
+
+def subtest_sturm_QR_gram_matches_sturm_QR(X, D, stopval):
+    coef = SolverClass(stopval = stopval, algorithm="sturm_QR_gram").solve(X, D)
+    reference = SolverClass(stopval = stopval, algorithm="sturm_QR").solve(X, D)
+    assert_allclose(coef, reference, atol=1e-10)
+
+
+def test_solve_path():
+    # every sparsity level of the path is the OMP solution for that sparsity
+    Xnoisy, Dnoisy, notused, notused, notused = make_sparse_coded_signal(n, N, k, 50, np.inf, 20, random_state=49)
+    path = SolverClass(stopval = k).solve_path(Xnoisy, Dnoisy)
+    assert_equal(path.kmax, k)
+    assert_equal(path.coefs().shape, (k, N, Xnoisy.shape[1]))
+    for kk in range(1, k+1):
+        reference = SolverClass(stopval = kk, algorithm="sparsify_QR").solve(Xnoisy, Dnoisy)
+        assert_allclose(path.coef(kk), reference, atol=1e-10)
+        assert_allclose(path.residual_norms[kk], np.linalg.norm(Xnoisy - np.dot(Dnoisy, reference), axis=0))
+    assert_allclose(path.residual_norms[0], np.linalg.norm(Xnoisy, axis=0))
+
+    # with a tolerance the path stops, and the solution doesn't change after that
+    path = SolverClass(stopval = 1e-6).solve_path(X, D)
+    reference = SolverClass(stopval = 1e-6, algorithm="sturm_QR_gram").solve(X, D)
+    assert np.all(path.nsteps < path.kmax)
+    assert_allclose(path.coef(path.kmax), reference, atol=1e-10)
+    assert_allclose(path.coef(int(np.max(path.nsteps))), reference, atol=1e-10)
+
+    assert_raises(ValueError, SolverClass(stopval = k).solve_path, X, D, 0)
+    assert_raises(ValueError, path.coef, path.kmax + 1)
+
+
+def test_simultaneous_omp():
+    from ..generate import make_joint_sparse_compressed_sensing_problem
+    from ..omp import SimultaneousOrthogonalMatchingPursuit
+
+    # groups of one signal: plain OMP
+    coef = SimultaneousOrthogonalMatchingPursuit(k, 1).solve(X, D)
+    assert_allclose(coef, SolverClass(stopval = k, algorithm="sturm_QR_gram").solve(X, D), atol=1e-10)
+
+    # joint support recovered for every group, also with a tolerance
+    measurements, acqumatrix, data, dictionary, gamma1, support1, clear = make_joint_sparse_compressed_sensing_problem(
+        n, n, N, k, 5, 4, np.inf, np.inf, np.inf, random_state=47)
+    effdict = np.dot(acqumatrix, dictionary)
+    norms = np.linalg.norm(effdict, axis=0)
+    effdict, gamma1 = effdict / norms, gamma1 * norms[:, None]
+    for stopval in [k, 1e-6]:
+        coef = SimultaneousOrthogonalMatchingPursuit(stopval, 4).solve(measurements, effdict)
+        assert_allclose(coef, gamma1, atol=1e-10)
+        for igroup in range(5):
+            assert_array_equal(np.sort(support1[:,igroup]),
+                               np.nonzero(np.any(coef[:, 4*igroup:4*(igroup+1)], axis=1))[0])
+
+    assert_raises(ValueError, SimultaneousOrthogonalMatchingPursuit, 3, 0)
+    assert_raises(ValueError, SimultaneousOrthogonalMatchingPursuit(k, 3).solve, X, D)
+
+
+def test_checkERC():
+    from ..omp import omp_erc
+    # reference: the definition, one signal at a time
+    def erc_reference(D, support):
+        D = D / np.linalg.norm(D, axis=0)
+        results = []
+        for i in range(support.shape[1]):
+            T = support[:,i]
+            Tc = np.setdiff1d(range(D.shape[1]), T)
+            A = np.dot(D[:,Tc].T, np.linalg.pinv(D[:,T].T))
+            results.append(np.max(np.sum(np.abs(A),1)) < 1)
+        return np.array(results)
+
+    erc_rng = np.random.RandomState(5)
+    A = erc_rng.randn(40, n)
+    supports = np.array([erc_rng.permutation(N)[:2] for _ in range(40)]).T
+    supports[:,20:] = supports[::-1,:20]    # duplicate supports, in another order
+    reference = erc_reference(np.dot(A, D), supports)
+    assert 0 < np.sum(reference) < reference.size
+    assert_array_equal(SolverClass(stopval = 1e-6).checkERC(A, D, supports), reference)
+    # small blocks, in parallel, without the cache
+    assert_array_equal(omp_erc(np.dot(A, D), supports, block_elements=100, cache=False), reference)
+    assert_array_equal(omp_erc(np.dot(A, D), supports, block_elements=100, processes=3, cache=False), reference)
+
+    # empty supports always satisfy ERC
+    assert_array_equal(omp_erc(np.dot(A, D), np.zeros((0, 5), dtype=int)), np.ones(5, dtype=bool))
+    assert_array_equal(SolverClass(stopval = 1e-6).checkERC(A, D, np.zeros((0, 5))), np.ones(5, dtype=bool))
+
+
+def test_checkERC_cache():
+    from .. import omp
+    erc_rng = np.random.RandomState(5)
+    A = erc_rng.randn(40, n)
+    supports = np.array([erc_rng.permutation(N)[:2] for _ in range(10)]).T
+    reference = omp.omp_erc(np.dot(A, D), supports, cache=False)
+
+    omp._omp_erc_cache["dictionary"] = None
+    omp.omp_erc(np.dot(A, D), supports[:,:5])
+    assert_equal(len(omp._omp_erc_cache["results"]), 5)
+    # the known supports are not checked again: a forged cached result is returned as is
+    forged = np.sort(supports[:,0]).tobytes()
+    omp._omp_erc_cache["results"][forged] = not reference[0]
+    result = omp.omp_erc(np.dot(A, D), supports)
+    assert_equal(result[0], not reference[0])
+    assert_array_equal(result[1:], reference[1:])
+    assert_equal(len(omp._omp_erc_cache["results"]), 10)
+
+    # another dictionary starts a new cache
+    assert_array_equal(omp.omp_erc(np.dot(A, D), supports, cache=False), reference)
+    assert_array_equal(omp.omp_erc(2 * np.dot(A, D), supports), reference)
+    assert_equal(len(omp._omp_erc_cache["results"]), 10)
+
+
+# Equivalence of the OMP implementations, for every group of algorithms with the same stopping criterion
+equivalent_algorithms = [["gram", "cholesky", "qr", "sparsify_QR", "batch"],
+                         ["sturm_QR_gram", "sturm_QR"],
+                         ["sklearn_local", "sklearn"]]
+
+def test_equivalent_algorithms():
+    Xnoisy, Dnoisy, notused, notused, notused = make_sparse_coded_signal(n, N, k, 50, np.inf, 20, random_state=49)
+    for group in equivalent_algorithms:
+        for stopval in [k, 1e-6, 0.3, 0.01]:
+            for algo in group[1:]:
+                subtest_equivalent_algorithms(Xnoisy, Dnoisy, stopval, group[0], algo)
+
+def test_equivalent_algorithms_degenerate():
+    # an all-zero signal and signals with a tiny amplitude, below any absolute threshold
+    Xzero = X.copy()
+    Xzero[:,1] = 0
+    for group in equivalent_algorithms:
+        for stopval in [k, 1e-6]:
+            for algo in group[1:]:
+                subtest_equivalent_algorithms(Xzero, D, stopval, group[0], algo)
+    # the stopping criterion of scikit-learn is an absolute tolerance, not scale invariant
+    for group in equivalent_algorithms[:2]:
+        for stopval in [k, 1e-6]:
+            for algo in group[1:]:
+                subtest_equivalent_algorithms(1e-8 * X, D, stopval, group[0], algo)
+    coef = SolverClass(stopval=k, algorithm="gram").solve(Xzero, D)
+    assert_equal(coef[:,1], np.zeros(N))
+    assert_allclose(SolverClass(stopval=k, algorithm="gram").solve(1e-8 * X, D), 1e-8 * gamma, atol=1e-18)
+
+def subtest_equivalent_algorithms(X, D, stopval, reference, algorithm):
+    coef = SolverClass(stopval = stopval, algorithm=algorithm).solve(X, D)
+    expected = SolverClass(stopval = stopval, algorithm=reference).solve(X, D)
+    assert_allclose(coef.reshape(expected.shape), expected, atol=1e-10)
+
+
+def test_omp_core():
+    from ..omp import omp_core, GramCholeskyUpdate
+    Xnoisy, Dnoisy, notused, notused, notused = make_sparse_coded_signal(n, N, k, 10, np.inf, 20, random_state=49)
+    reference = omp_core(Xnoisy, Dnoisy, k, 0, "gram")
+
+    # update strategy given as a class, scipy.sparse dictionary
+    assert_allclose(omp_core(Xnoisy, Dnoisy, k, 0, GramCholeskyUpdate), reference, atol=1e-10)
+    for update in ["gram", "cholesky", "qr"]:
+        assert_allclose(omp_core(Xnoisy, scipy.sparse.csc_matrix(Dnoisy), k, 0, update), reference, atol=1e-10)
+
+    # selection strategy: the atoms with even indices only
+    def select_even(projections):
+        return 2 * np.argmax(np.abs(projections[::2]))
+    for update in ["gram", "cholesky", "qr"]:
+        coef = omp_core(Xnoisy, Dnoisy, k, 0, update, select=select_even)
+        assert np.all(coef[1::2] == 0)
+        assert_allclose(coef, omp_core(Xnoisy, Dnoisy, k, 0, "gram", select=select_even), atol=1e-10)
+
+    # residual energy threshold, one value for every signal
+    energytol = 0.5 * np.sum(Xnoisy ** 2, axis=0)
+    coef = omp_core(Xnoisy, Dnoisy, k, energytol, "cholesky")
+    assert np.all(np.sum((Xnoisy - np.dot(Dnoisy, coef)) ** 2, axis=0) <= energytol + 1e-10)
+
+    assert_raises(ValueError, omp_core, Xnoisy, Dnoisy, k, 0, "lu")
+
+
+def test_auto_algorithm():
+    import os
+    import shutil
+    import tempfile
+    from .. import omp
+
+    tmpdir = tempfile.mkdtemp()
+    default_file = omp.omp_calibration_file
+    try:
+        omp.omp_calibration_file = os.path.join(tmpdir, "omp_calibration.json")
+
+        # without a calibration, built-in rules and no file written
+        omp._omp_calibrations.clear()
+        assert_equal(omp.select_omp_algorithm(X[:,0], D, k), "sparsify_QR")
+        assert_equal(omp.select_omp_algorithm(X, D, k), "batch")
+        SolverClass(stopval=k, algorithm="auto").solve(X, D)
+        assert_equal(os.listdir(tmpdir), [])
+
+        calibration = omp.calibrate_omp(sizes=[(n, N, k, 1), (n, N, k, 20)], repeat=1)
+        assert os.path.isfile(omp.omp_calibration_file)
+        assert_equal(len(calibration["entries"]), 2)
+
+        # the choice follows the timings of the nearest calibrated size
+        calibration["entries"][0]["times"] = {"gram": 1, "qr": 0.5, "batch": 2}
+        calibration["entries"][1]["times"] = {"gram": 1, "qr": 2, "batch": 0.5}
+        assert_equal(omp.select_omp_algorithm(X[:,0], D, k, calibration), "qr")
+        assert_equal(omp.select_omp_algorithm(X, D, k, calibration), "batch")
+        # never sklearn, which gives other results for low-energy signals
+        calibration["entries"][1]["times"]["sklearn"] = 0.1
+        assert_equal(omp.select_omp_algorithm(X, D, k, calibration), "batch")
+
+        # same results as "sparsify_QR", with the calibration stored on disk
+        Xnoisy, Dnoisy, notused, notused, notused = make_sparse_coded_signal(n, N, k, 50, np.inf, 20, random_state=49)
+        omp._omp_calibrations.clear()
+        assert_equal(omp.load_omp_calibration()["entries"][1]["k"], k)
+        for stopval in [k, 0.3]:
+            coef = SolverClass(stopval=stopval, algorithm="auto").solve(Xnoisy, 2 * Dnoisy)
+            expected = SolverClass(stopval=stopval, algorithm="sparsify_QR").solve(Xnoisy, 2 * Dnoisy)
+            assert_allclose(coef, expected, atol=1e-10)
+        assert omp.omp_calibration_file in omp._omp_calibrations
+    finally:
+        omp.omp_calibration_file = default_file
+        omp._omp_calibrations.clear()
+        shutil.rmtree(tmpdir)
+
+
+def test_auto_algorithms_degenerate():
+    # "auto" may pick any candidate: all of them agree with "sparsify_QR" also on an all-zero signal
+    #  and on signals with a tiny amplitude
+    from ..omp import omp_auto_algorithms
+    Xzero = X.copy()
+    Xzero[:,1] = 0
+    Xnoisy, Dnoisy, notused, notused, notused = make_sparse_coded_signal(n, N, k, 10, np.inf, 20, random_state=49)
+    for data, dictionary in [(Xzero, D), (1e-8 * X, D), (1e-8 * Xnoisy, Dnoisy), (np.zeros((n, 2)), D)]:
+        for stopval in [k, 1e-6, 0.3]:
+            expected = SolverClass(stopval=stopval, algorithm="sparsify_QR").solve(data, dictionary)
+            for algo in omp_auto_algorithms:
+                coef = SolverClass(stopval=stopval, algorithm=algo).solve(data, dictionary)
+                assert_array_equal(coef != 0, expected != 0)
+                assert_allclose(coef, expected, rtol=1e-6, atol=0)
+
+
+def test_exact_recovery_stop():
+    # on exact data all variants stop after the real atoms, even with a larger number of atoms
+    for algorithm in ["gram", "cholesky", "qr", "sparsify_QR", "batch"]:
+        coef = SolverClass(stopval=2*k, algorithm=algorithm).solve(X, D)
+        assert np.all(np.count_nonzero(coef, axis=0) == k)
+        assert_allclose(coef, gamma, atol=1e-10)
+
+
+def test_deprecated_modules():
+    import importlib
+    import sys
+    import warnings
+    import sklearn.linear_model
+    from ..omp import orthogonal_mp, orthogonal_mp_gram
+
+    Xnoisy, Dnoisy, notused, notused, notused = make_sparse_coded_signal(n, N, k, 10, np.inf, 20, random_state=49)
+    Dnoisy = Dnoisy / np.linalg.norm(Dnoisy, axis=0)
+    for kwargs in [dict(n_nonzero_coefs=k), dict(tol=0.1), dict()]:
+        assert_allclose(orthogonal_mp(Dnoisy, Xnoisy, **kwargs),
+                        sklearn.linear_model.orthogonal_mp(Dnoisy, Xnoisy, **kwargs), atol=1e-10)
+    norms_squared = np.sum(Xnoisy**2, axis=0)
+    assert_allclose(orthogonal_mp_gram(np.dot(Dnoisy.T, Dnoisy), np.dot(Dnoisy.T, Xnoisy), tol=0.1,
+                                       norms_squared=norms_squared),
+                    orthogonal_mp(Dnoisy, Xnoisy, tol=0.1), atol=1e-10)
+    assert_raises(ValueError, orthogonal_mp_gram, np.dot(Dnoisy.T, Dnoisy), np.dot(Dnoisy.T, Xnoisy), tol=0.1)
+
+    for name in ["pyCSalgos.omp_sklearn_local", "pyCSalgos.OMP.omp_sk_bugfix", "pyCSalgos.OMP.omp_QR"]:
+        sys.modules.pop(name, None)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            module = importlib.import_module(name)
+        assert any(issubclass(warning.category, DeprecationWarning) for warning in w)
+        if hasattr(module, "orthogonal_mp"):
+            assert_allclose(module.orthogonal_mp(Dnoisy, Xnoisy, k), orthogonal_mp(Dnoisy, Xnoisy, k))
+        else:
+            ompopts = {"nargout": 1, "stopCrit": "M", "stopTol": k}
+            assert_allclose(module.greed_omp_qr(Xnoisy[:,0], Dnoisy, N, ompopts),
+                            SolverClass(stopval=k, algorithm="sparsify_QR").solve(Xnoisy[:,0], Dnoisy))
+
+
+def test_real_sparsity():
+    solver = SolverClass("real")
+    assert solver.uses_realdict()
+    coef = solver.solve(X, D, {'gamma': gamma, 'support': None})
+    assert_allclose(coef, SolverClass(k, algorithm="sparsify_QR").solve(X, D), atol=1e-10)
+    assert_raises(ValueError, solver.solve, X, D)
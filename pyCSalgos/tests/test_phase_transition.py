@@ -5,3 +5,206 @@ Tests for phase_transition.py
 
 """
 
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.testing import assert_raises
+from numpy.testing import assert_equal
+from numpy.testing import assert_allclose
+
+from ..omp import OrthogonalMatchingPursuit
+from ..phase_transition import SynthesisPhaseTransition
+
+n, N, Ndata = 20, 30, 3
+deltas = np.array([0.5, 0.7, 0.9])
+rhos = np.array([0.1, 0.2])
+
+
+def make_phase_transition():
+    return SynthesisPhaseTransition(n, N, deltas, rhos, Ndata, np.inf, np.inf, np.inf,
+                                    [OrthogonalMatchingPursuit(1e-6, algorithm="sparsify_QR")])
+
+
+def test_get_cells():
+    pt = make_phase_transition()
+    allcells = pt.get_cells()
+    assert_equal(len(allcells), deltas.size * rhos.size)
+    shardcells = [cell for i in range(4) for cell in pt.get_cells((i, 4))]
+    assert_equal(sorted(shardcells), allcells)
+    assert_raises(ValueError, pt.get_cells, (4, 4))
+
+
+def test_sharded_run_and_merge():
+    full = make_phase_transition()
+    full.run(processes=1, random_state=47)
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        filenames = []
+        for i in range(2):
+            pt = make_phase_transition()
+            pt.run(processes=1, random_state=47, shard=(i, 2))
+            filenames.append(os.path.join(tmpdir, "shard_" + str(i) + ".pickle"))
+            pt.savepartial(filenames[-1])
+
+        merged = SynthesisPhaseTransition.merge_partial(filenames)
+        assert_allclose(merged.err, full.err)
+        assert_allclose(merged.gamma, full.gamma)
+        assert_equal(merged.iterations, full.iterations)
+        assert_equal(merged.simData, [])
+
+        merged = SynthesisPhaseTransition.merge_partial(filenames, load_simdata=True)
+        for idelta, irho in full.get_cells():
+            assert_allclose(merged.simData[idelta][irho][u'measurements'],
+                            full.simData[idelta][irho][u'measurements'])
+
+        assert_raises(ValueError, SynthesisPhaseTransition.merge_partial, filenames[:1])
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_export_figures():
+    pt = SynthesisPhaseTransition(n, N, deltas, rhos, Ndata, np.inf, np.inf, np.inf,
+                                  [OrthogonalMatchingPursuit(1e-6, algorithm="sparsify_QR"),
+                                   OrthogonalMatchingPursuit(1e-6, algorithm="sturm_QR")])
+    pt.run(processes=1, random_state=47)
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        filenames = pt.export_figures(os.path.join(tmpdir, "pt"), saveexts=['png', 'svg'], thresh=1e-6, processes=2)
+        assert_equal(len(filenames), 4)
+        for filename in filenames:
+            assert os.path.isfile(filename)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_plot_phase_transition_matrix():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from ..phase_transition import plot_phase_transition
+
+    matrix = np.array([[0.2, 1.5], [-0.5, 0.7], [0.1, 0.3]])
+    plt.figure()
+    plot_phase_transition(matrix.copy())
+    image = plt.gca().get_images()[0].get_array()
+    assert_allclose(image, np.clip(matrix, 0, 1).T)
+    plt.close()
+
+
+def test_sparse_coding_batched_run():
+    from ..iht import IterativeHardThresholding
+    from ..phase_transition import SynthesisSparseCoding
+
+    dictionary = np.random.RandomState(47).randn(n, N)
+    solvers = [OrthogonalMatchingPursuit(1e-6, algorithm="sparsify_QR"),
+               IterativeHardThresholding(0, 1e-10, sparsity="real", maxiter=100),
+               OrthogonalMatchingPursuit("real")]
+    assert not solvers[0].uses_realdict()
+    assert solvers[1].uses_realdict()
+    assert solvers[2].uses_realdict()
+
+    batched = SynthesisSparseCoding(ks=[2, 4, 6], numdata=Ndata, solvers=solvers, dictionary=dictionary)
+    batched.run(processes=1, random_state=47)
+
+    # Reference: one solve() call per sparsity level
+    reference = SynthesisSparseCoding(ks=[2, 4, 6], numdata=Ndata, solvers=solvers, dictionary=dictionary)
+    SynthesisPhaseTransition.run(reference, processes=1, random_state=47)
+
+    assert_allclose(batched.err, reference.err, atol=1e-10)
+    assert_allclose(batched.gamma, reference.gamma, atol=1e-10)
+
+    # OMP path with the real sparsity gives the k-sparse OMP solution of every level
+    for irho, k in enumerate([2, 4, 6]):
+        data = batched.simData[0][irho]
+        assert_allclose(batched.gamma[2, 0, irho],
+                        OrthogonalMatchingPursuit(k, algorithm="sparsify_QR").solve(data[u'measurements'], dictionary),
+                        atol=1e-10)
+
+    # Random dictionary is generated once and shared by all sparsity levels
+    shared = SynthesisSparseCoding(signaldim=n, dictdim=N, ks=[2, 4], numdata=Ndata, solvers=solvers[:1])
+    shared.run(processes=1, random_state=47)
+    assert_allclose(shared.simData[0][0][u'acqumatrix'], shared.simData[0][1][u'acqumatrix'])
+
+
+def test_single_precision_run():
+    pt = SynthesisPhaseTransition(n, N, deltas, rhos, Ndata, np.inf, np.inf, np.inf,
+                                  [OrthogonalMatchingPursuit(1e-6, algorithm="sparsify_QR")], dtype=np.float32)
+    pt.run(processes=1, random_state=47)
+    assert_equal(pt.gamma.dtype, np.float32)
+    assert_equal(pt.simData[0][0][u'measurements'].dtype, np.float32)
+
+    reference = make_phase_transition()
+    reference.run(processes=1, random_state=47)
+    assert_allclose(pt.gamma, reference.gamma, atol=1e-3)
+
+
+def test_sparse_dictionary():
+    import scipy.sparse
+    from ..iht import IterativeHardThresholding
+
+    dictionary = scipy.sparse.random(n, N, density=0.3, random_state=4, format='csc') + scipy.sparse.eye(n, N)
+    solvers = [OrthogonalMatchingPursuit(1e-6, algorithm="sparsify_QR"),
+               OrthogonalMatchingPursuit(1e-6, algorithm="sturm_QR"),
+               IterativeHardThresholding(0, 1e-10, sparsity="real", maxiter=100)]
+    results = []
+    for D in [dictionary, dictionary.toarray()]:
+        pt = SynthesisPhaseTransition(n, N, deltas, rhos, Ndata, np.inf, np.inf, np.inf, solvers, dictionary=D)
+        pt.run(processes=1, random_state=47)
+        results.append(pt)
+    assert scipy.sparse.issparse(results[0].simData[0][0][u'dictionary'])
+    assert_allclose(results[0].gamma, results[1].gamma, atol=1e-10)
+
+
+def test_memmap_dictionary():
+    from ..amp import ApproximateMessagePassing
+    from ..iht import IterativeHardThresholding
+    from ..generate import make_memmap_dictionary
+
+    solvers = [OrthogonalMatchingPursuit(1e-6, algorithm="sparsify_QR"),
+               IterativeHardThresholding(0, 1e-10, sparsity="real", maxiter=100),
+               ApproximateMessagePassing(1e-6, maxiter=100)]
+    tmpdir = tempfile.mkdtemp()
+    try:
+        dictionary = make_memmap_dictionary(os.path.join(tmpdir, "dict.npy"), n, N, random_state=47)
+        results = []
+        for D in [dictionary, np.array(dictionary)]:
+            pt = SynthesisPhaseTransition(n, N, deltas, rhos, Ndata, np.inf, np.inf, np.inf, solvers, dictionary=D)
+            pt.run(processes=1, random_state=47)
+            results.append(pt)
+        assert isinstance(results[0].simData[0][0][u'dictionary'], np.memmap)
+        assert_allclose(results[0].gamma, results[1].gamma, atol=1e-10)
+        del dictionary, results, pt
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_batch_omp():
+    pt = SynthesisPhaseTransition(n, N, deltas, rhos, Ndata, np.inf, np.inf, 30,
+                                  [OrthogonalMatchingPursuit(0.1, algorithm="sparsify_QR"),
+                                   OrthogonalMatchingPursuit(0.1, algorithm="batch")])
+    pt.run(processes=1, random_state=47)
+    assert_allclose(pt.gamma[1], pt.gamma[0], atol=1e-10)
+
+
+def test_joint_sparse_run():
+    from ..omp import SimultaneousOrthogonalMatchingPursuit
+
+    pt = SynthesisPhaseTransition(n, N, deltas, rhos, 4, np.inf, np.inf, np.inf,
+                                  [SimultaneousOrthogonalMatchingPursuit(1e-6, 2),
+                                   OrthogonalMatchingPursuit(1e-6, algorithm="sturm_QR_gram")], group_size=2)
+    pt.run(processes=1, random_state=47)
+    realsupport = pt.simData[0][0][u'realsupport']
+    assert_equal(realsupport[:, 0], realsupport[:, 1])
+    # SOMP finds the same support for the two signals of a group
+    for igroup in range(2):
+        assert_equal(pt.support[0][0][0][2*igroup], pt.support[0][0][0][2*igroup + 1])
+
+    assert_raises(ValueError, SynthesisPhaseTransition, n, N, deltas, rhos, 3, np.inf, np.inf, np.inf, [],
+                  group_size=2)
@@ -0,0 +1,79 @@
+"""
+test_results_table.py
+
+Tests for results_table.py
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.testing import assert_raises
+from numpy.testing import assert_equal
+from numpy.testing import assert_allclose
+from numpy.testing import assert_array_equal
+
+from ..cosamp import SubspacePursuit
+from ..omp import OrthogonalMatchingPursuit
+from ..phase_transition import SynthesisPhaseTransition
+from ..results_table import read_results_table, table_columns
+
+n, N, Ndata = 20, 30, 3
+deltas = np.array([0.5, 0.7, 0.9])
+rhos = np.array([0.1, 0.2])
+
+pt = SynthesisPhaseTransition(n, N, deltas, rhos, Ndata, np.inf, np.inf, np.inf,
+                              [OrthogonalMatchingPursuit(1e-6, algorithm="sparsify_QR"),
+                               OrthogonalMatchingPursuit(2, algorithm="sparsify_QR"),
+                               SubspacePursuit("real")])
+pt.run(processes=1, random_state=47)
+
+
+def test_roundtrip():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(tmpdir, "table.h5")
+        pt.export_table(filename, thresh=1e-6)
+
+        table = read_results_table(filename)
+        assert_equal(sorted(table.keys()), sorted(table_columns))
+        assert_equal(table['err'].size, pt.err.size)
+        assert_allclose(table['err'], pt.err.ravel())
+        assert_array_equal(table['success'], (pt.err < 1e-6).ravel())
+        assert_equal(set(table['solver_name']), set(pt.solverNames))
+        assert np.all(table['time'] >= 0)
+
+        # iterations are reported only by some solvers
+        iterations = read_results_table(filename, columns=['iterations'], solvers=[2])['iterations']
+        assert_equal(iterations.size, pt.err[2].size)
+        assert np.all(iterations >= 1)
+        assert np.all(read_results_table(filename, columns=['iterations'], solvers=[0])['iterations'] == -1)
+
+        # Select solver and delta range
+        table = read_results_table(filename, columns=['delta', 'rho', 'err'], solvers=[pt.solverNames[1]],
+                                   delta_range=(0.6, 1.0))
+        assert_equal(sorted(table.keys()), ['delta', 'err', 'rho'])
+        assert_allclose(table['err'], pt.err[1, 1:].ravel())
+        assert np.all(table['delta'] >= 0.6)
+
+        table = read_results_table(filename, columns=['err'], solvers=[0], delta_range=(2, 3))
+        assert_equal(table['err'].size, 0)
+
+        assert_raises(ValueError, read_results_table, filename, columns=['nonexistent'])
+        assert_raises(ValueError, read_results_table, filename, solvers=['nonexistent'])
+
+        # no iterations column for results without the number of iterations
+        iterations = pt.iterations
+        try:
+            pt.iterations = None
+            pt.export_table(filename, thresh=1e-6)
+        finally:
+            pt.iterations = iterations
+        assert 'iterations' not in read_results_table(filename)
+        assert_raises(ValueError, read_results_table, filename, columns=['iterations'])
+    finally:
+        shutil.rmtree(tmpdir)
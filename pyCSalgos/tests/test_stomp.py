@@ -0,0 +1,64 @@
+"""
+test_stomp.py
+
+Testing functions for stomp.py
+
+"""
+
+# Author: Nicolae Cleju
+# License: BSD 3 clause
+
+import numpy as np
+from numpy.testing import assert_raises
+from numpy.testing import assert_equal
+from numpy.testing import assert_allclose
+
+from ..acquisition import make_partial_dct, as_dense
+from ..generate import make_sparse_coded_signal
+from ..stomp import StagewiseOrthogonalMatchingPursuit, stagewise_omp
+
+n, N, k, Ndata = 200, 800, 20, 4
+
+X, D, gamma, support, clearX = make_sparse_coded_signal(n, N, k, Ndata, np.inf, np.inf, random_state=47)
+
+
+def test_correct_shapes():
+    solver = StagewiseOrthogonalMatchingPursuit()
+    assert_equal(solver.solve(X[:, 0], D).shape, (N,))
+    assert_equal(solver.solve(X, D).shape, (N, Ndata))
+
+
+def test_perfect_recovery():
+    for threshold, alpha in [("cfdr", 0.5), ("cfar", 0.01), (2.5, 0.5)]:
+        coef, n_iter = stagewise_omp(X, D, threshold, alpha, return_n_iter=True)
+        assert_allclose(coef, gamma, atol=1e-8)
+        assert np.all(n_iter <= 10)
+    assert_allclose(StagewiseOrthogonalMatchingPursuit().solve(X, D), gamma, atol=1e-8)
+
+
+def test_stages():
+    coef, n_iter = stagewise_omp(X, D, stages=1, return_n_iter=True)
+    assert_equal(n_iter, np.ones(Ndata))
+    coef, n_iter = stagewise_omp(np.zeros(n), D, return_n_iter=True)
+    assert_equal(n_iter, 0)
+    assert_equal(coef, np.zeros(N))
+    # kept by the solver
+    solver = StagewiseOrthogonalMatchingPursuit(stages=1)
+    solver.solve(X, D)
+    assert_equal(solver.n_iter_, np.ones(Ndata))
+
+
+def test_linear_operator():
+    operator = make_partial_dct(n, N, random_state=1)
+    data = operator.matmat(gamma)
+    coef = stagewise_omp(data, operator)
+    assert_allclose(coef, gamma, atol=1e-8)
+    assert_allclose(coef, stagewise_omp(data, as_dense(operator)), atol=1e-10)
+
+
+def test_bad_input():
+    assert_raises(ValueError, StagewiseOrthogonalMatchingPursuit, "fdr")
+    assert_raises(ValueError, StagewiseOrthogonalMatchingPursuit, -1.)
+    assert_raises(ValueError, StagewiseOrthogonalMatchingPursuit, "cfar", 0)
+    assert_raises(ValueError, StagewiseOrthogonalMatchingPursuit, "cfar", 0.1, 0)
+    assert_raises(ValueError, StagewiseOrthogonalMatchingPursuit, "cfar", 0.1, 10, -1)
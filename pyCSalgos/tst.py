@@ -12,7 +12,7 @@ import math
 import numpy as np
 
 from .base import SparseSolver
-from .utils import fast_lstsq
+from .utils import fast_lstsq, solution_dtype, dense_columns, column_norms
 
 class TwoStageThresholding(SparseSolver):
     """
@@ -46,7 +46,7 @@ def two_stage_thresholding(data, dictionary, stoptol, maxiter, algorithm="recomm
 
     N = dictionary.shape[1]
     Ndata = data.shape[1]
-    coef = np.zeros((N, Ndata))
+    coef = np.zeros((N, Ndata), dtype=solution_dtype(data, dictionary))
 
     if algorithm == "recommended":
         for i in range(Ndata):
@@ -61,7 +61,8 @@ def two_stage_thresholding(data, dictionary, stoptol, maxiter, algorithm="recomm
 
 def _tst_recommended(X, Y, nsweep=300, tol=0.00001, xinitial=None, ro=None):
 
-    colnorm = np.mean(np.sqrt((X**2).sum(0)))
+    # X is a numpy or scipy.sparse matrix
+    colnorm = np.mean(column_norms(X))
     X = X / colnorm
     Y = Y / colnorm
     [n,p] = X.shape
@@ -80,16 +81,16 @@ def _tst_recommended(X, Y, nsweep=300, tol=0.00001, xinitial=None, ro=None):
     I = []
 
     for sweep in np.arange(nsweep):
-        r = Y - np.dot(X,x1)
-        c = np.dot(X.T, r)
+        r = Y - X.dot(x1)
+        c = X.T.dot(r)
         i_csort = np.argsort(np.abs(c))
         I = np.union1d(I , i_csort[-k2:])
 
         # Make sure X[:,np.int_(I)] is a 2-dimensional matrix even if I has a single value (and therefore yields a column)
         if I.size is 1:
-            a = np.reshape(X[:,np.int_(I)],(X.shape[0],1))
+            a = np.reshape(dense_columns(X, np.int_(I)),(X.shape[0],1))
         else:
-            a = X[:,np.int_(I)]
+            a = dense_columns(X, np.int_(I))
         #xt = np.linalg.lstsq(a, Y)[0]
         # Use fast version
         xt = fast_lstsq(a, Y)
@@ -99,7 +100,7 @@ def _tst_recommended(X, Y, nsweep=300, tol=0.00001, xinitial=None, ro=None):
         x1 = np.zeros(p)
         x1[np.int_(J)] = xt[i_xtsort[-k1:]]
         I = J.copy()
-        if np.linalg.norm(Y-np.dot(X,x1)) / np.linalg.norm(Y) < tol:
+        if np.linalg.norm(Y-X.dot(x1)) / np.linalg.norm(Y) < tol:
             break
 
     return x1.copy()
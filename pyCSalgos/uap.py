@@ -12,7 +12,7 @@ import scipy
 import numpy as np
 
 from .base import AnalysisSparseSolver
-from .utils import fast_lstsq
+from .utils import fast_lstsq, solution_dtype
 
 
 class UnconstrainedAnalysisPursuit(AnalysisSparseSolver):
@@ -49,7 +49,7 @@ class UnconstrainedAnalysisPursuit(AnalysisSparseSolver):
 
         numdata = measurements.shape[1]
         signalsize = acqumatrix.shape[1]
-        outdata = np.zeros((signalsize, numdata))
+        outdata = np.zeros((signalsize, numdata), dtype=solution_dtype(measurements, acqumatrix, operator))
 
         OmegaPinv = None
         P = None
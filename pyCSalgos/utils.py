@@ -5,8 +5,90 @@ Utility functions
 """
 __author__ = 'ncleju'
 
+import tempfile
+
 import numpy as np
 import scipy
+import scipy.sparse
+import scipy.sparse.linalg
+
+# Number of matrix elements read at once from memory-mapped (out-of-core) matrices
+BLOCK_ELEMENTS = 2**22
+
+
+# Floating point type of the solution of a problem with the given arrays (numpy or scipy.sparse):
+#  float32 if all of them are float32 (single precision mode), float64 otherwise
+def solution_dtype(*arrays):
+    return np.promote_types(np.result_type(*[getattr(a, 'dtype', a) for a in arrays]), np.float32)
+
+# Columns ``indices'' (indices or boolean mask) of a numpy or scipy.sparse matrix, as a dense array
+def dense_columns(A, indices):
+    if scipy.sparse.issparse(A):
+        return A[:, indices].toarray()
+    return A[:, indices]
+
+# Euclidean norms of the columns of a numpy or scipy.sparse matrix
+def column_norms(A):
+    if scipy.sparse.issparse(A):
+        return np.sqrt(np.asarray(A.multiply(A).sum(axis=0)).ravel())
+    return np.sqrt((A**2).sum(0))
+
+# Number of columns of a memory-mapped matrix read at once
+def _block_columns(A):
+    return max(1, BLOCK_ELEMENTS // max(1, A.shape[0]))
+
+# A * x, for a numpy, scipy.sparse or memory-mapped (np.memmap) matrix A.
+#  A memory-mapped matrix is read only at the columns of the non-zero rows of x, in blocks of columns
+def matvec(A, x):
+    if not isinstance(A, np.memmap):
+        return A.dot(x)
+    nonzero = np.flatnonzero(x if x.ndim == 1 else np.any(x != 0, axis=1))
+    out = np.zeros((A.shape[0],) + x.shape[1:], dtype=np.result_type(A.dtype, x.dtype))
+    step = _block_columns(A)
+    for start in range(0, nonzero.size, step):
+        cols = nonzero[start:start + step]
+        out += np.asarray(A[:, cols]).dot(x[cols])
+    return out
+
+# A^T * y, for a numpy, scipy.sparse or memory-mapped (np.memmap) matrix A.
+#  A memory-mapped matrix is read in blocks of columns
+def rmatvec(A, y):
+    if not isinstance(A, np.memmap):
+        return A.T.dot(y)
+    out = np.empty((A.shape[1],) + y.shape[1:], dtype=np.result_type(A.dtype, y.dtype))
+    step = _block_columns(A)
+    for start in range(0, A.shape[1], step):
+        out[start:start + step] = np.asarray(A[:, start:start + step]).T.dot(y)
+    return out
+
+# A cast to dtype, for a numpy, scipy.sparse or memory-mapped (np.memmap) matrix A.
+#  A memory-mapped matrix with another dtype is cast in blocks of columns into a temporary memory-mapped file,
+#  so that it is never loaded in memory as a whole
+def astype(A, dtype):
+    if not isinstance(A, np.memmap) or A.dtype == dtype:
+        return A.astype(dtype, copy=False)
+    out = np.memmap(tempfile.TemporaryFile(), dtype=dtype, mode='w+', shape=A.shape, order='F')
+    step = _block_columns(A)
+    for start in range(0, A.shape[1], step):
+        out[:, start:start + step] = A[:, start:start + step]
+    return out
+
+# Frobenius ('fro') or spectral (2) norm of a numpy, scipy.sparse or memory-mapped matrix
+def matrix_norm(A, ord='fro'):
+    if isinstance(A, np.memmap) and ord == 2:
+        # largest singular value from the blocked products
+        op = scipy.sparse.linalg.LinearOperator(A.shape, matvec=lambda x: matvec(A, x),
+                                                rmatvec=lambda y: rmatvec(A, y), dtype=A.dtype)
+        return scipy.sparse.linalg.svds(op, k=1, return_singular_vectors=False)[0]
+    if isinstance(A, np.memmap) and ord == 'fro':
+        step = _block_columns(A)
+        return np.sqrt(sum(np.sum(np.square(A[:, start:start + step])) for start in range(0, A.shape[1], step)))
+    if scipy.sparse.issparse(A):
+        if ord == 2:
+            # largest singular value only, without densifying
+            return scipy.sparse.linalg.svds(A, k=1, return_singular_vectors=False)[0]
+        return scipy.sparse.linalg.norm(A, ord)
+    return np.linalg.norm(A, ord)
 
 # Only returns the first parameter of scipy.linalg.lstsq()
 def fast_lstsq(A, y):
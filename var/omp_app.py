@@ -11,9 +11,9 @@ import numpy as np
 from sklearn.utils import check_random_state
 import time
 
-from omp_sk_bugfix import orthogonal_mp
-from omp_QR import greed_omp_qr
-from omp_QR import omp_qr
+from pyCSalgos.omp import orthogonal_mp
+from pyCSalgos.omp import omp_sparsify_greed_omp_qr as greed_omp_qr
+from pyCSalgos.omp import omp_sturm_omp_qr as omp_qr
 
 """
 Run a problem suite involving sparse vectors in 
@@ -87,7 +87,7 @@ def runProblemSuite(ambientDimension,numGradations,numTrials):
         
         # Nic: test sklearn omp
         starttime = time.time()                     # start timer
-        x_r3 = orthogonal_mp(D.copy(), y.copy(), n_nonzero_coefs=2*sparsity, tol=numMeasurements*1e-14, precompute_gram=False, copy_X=True)
+        x_r3 = orthogonal_mp(D.copy(), y.copy(), n_nonzero_coefs=2*sparsity, tol=numMeasurements*1e-14)
         idx_r3 = np.nonzero(x_r3)[0]
         t3all = t3all + time.time() - starttime     # stop timer        
         